@@ -0,0 +1,236 @@
+const { spawn } = require('child_process');
+
+// 상주 파이썬 분석 워커(tennis_teacher/worker.py) 클라이언트
+// 메시지는 4바이트 big-endian 길이 + UTF-8 JSON 으로 주고받습니다.
+class AnalysisWorker {
+    constructor(options = {}) {
+        this.python = options.python || process.env.PYTHON || 'python3';
+        this.args = options.args || ['-m', 'tennis_teacher.worker'];
+        this.cwd = options.cwd || __dirname;
+        this.restartDelay = options.restartDelay || 1000;
+        this.env = options.env || process.env;
+
+        this.child = null;
+        this.buffer = Buffer.alloc(0);
+        this.nextId = 1;
+        this.pending = new Map();
+        this.ready = null;
+        this.stopped = false;
+        this.holds = 0;
+    }
+
+    start() {
+        if (this.child) {
+            return this.ready;
+        }
+        this.stopped = false;
+        this.buffer = Buffer.alloc(0);
+        this.holds = 0;
+
+        const child = spawn(this.python, this.args, {
+            cwd: this.cwd,
+            env: this.env,
+            stdio: ['pipe', 'pipe', 'pipe']
+        });
+        this.child = child;
+
+        this.ready = new Promise((resolve, reject) => {
+            this.resolveReady = resolve;
+            this.rejectReady = reject;
+        });
+        // 준비 전에 종료되는 경우를 호출 측에서 처리하지 않아도 되도록 함
+        this.ready.catch(() => {});
+
+        child.stdout.on('data', (chunk) => this.onData(chunk));
+        child.stderr.on('data', (data) => {
+            console.error(`worker stderr: ${data}`);
+        });
+        child.on('error', (err) => {
+            console.error('분석 워커 실행 오류:', err);
+        });
+        child.on('exit', (code, signal) => this.onExit(child, code, signal));
+
+        return this.ready;
+    }
+
+    onData(chunk) {
+        this.buffer = Buffer.concat([this.buffer, chunk]);
+        while (this.buffer.length >= 4) {
+            const length = this.buffer.readUInt32BE(0);
+            if (this.buffer.length < 4 + length) {
+                break;
+            }
+            const payload = this.buffer.subarray(4, 4 + length).toString('utf8');
+            this.buffer = this.buffer.subarray(4 + length);
+
+            let message;
+            try {
+                message = JSON.parse(payload);
+            } catch (err) {
+                console.error('분석 워커 응답 파싱 오류:', err);
+                continue;
+            }
+            this.onMessage(message);
+        }
+    }
+
+    onMessage(message) {
+        if (message.type === 'ready') {
+            console.log(`분석 워커 준비 완료 (pid ${message.pid})`);
+            this.resolveReady();
+            return;
+        }
+        const request = this.pending.get(message.id);
+        if (!request) {
+            return;
+        }
+        if (message.type === 'progress') {
+            // 응답 전에 오는 진행 상황 (tennis_teacher/progress.py 의 레코드)
+            if (request.onProgress) {
+                request.onProgress(message.progress);
+            }
+            return;
+        }
+        if (message.type === 'record') {
+            // stream 요청의 프레임별 결과 (tennis_teacher/pipeline.py 의 iter_frame_results)
+            if (request.onRecord) {
+                this.hold(request.onRecord(message.record));
+            }
+            return;
+        }
+        this.pending.delete(message.id);
+        if (message.ok) {
+            request.resolve(message.result);
+        } else {
+            request.reject(new Error(message.error || '분석 중 오류 발생'));
+        }
+    }
+
+    onExit(child, code, signal) {
+        if (this.child !== child) {
+            return;
+        }
+        console.error(`분석 워커 종료 (code ${code}, signal ${signal})`);
+        this.child = null;
+        this.rejectReady(new Error('분석 워커가 준비 전에 종료되었습니다.'));
+
+        const error = new Error('분석 워커가 비정상 종료되었습니다.');
+        for (const request of this.pending.values()) {
+            request.reject(error);
+        }
+        this.pending.clear();
+
+        if (!this.stopped) {
+            setTimeout(() => this.start(), this.restartDelay);
+        }
+    }
+
+    hold(wait) {
+        // onRecord 가 Promise 를 돌려주면(받는 쪽 응답 스트림이 밀린 경우) 그것이 끝날 때까지 워커 출력을 읽지 않습니다.
+        // 파이프가 차면 워커의 쓰기가 멈추므로 디코딩과 추론도 함께 기다립니다.
+        if (!wait || typeof wait.then !== 'function' || !this.child) {
+            return;
+        }
+        const child = this.child;
+        this.holds += 1;
+        child.stdout.pause();
+        const release = () => {
+            if (this.child !== child) {
+                return;
+            }
+            this.holds -= 1;
+            if (!this.holds) {
+                child.stdout.resume();
+            }
+        };
+        wait.then(release, release);
+    }
+
+    write(message) {
+        const payload = Buffer.from(JSON.stringify(message), 'utf8');
+        const header = Buffer.alloc(4);
+        header.writeUInt32BE(payload.length, 0);
+        this.child.stdin.write(Buffer.concat([header, payload]));
+    }
+
+    send(message, handlers = {}) {
+        // handlers: { onProgress(record), onRecord(record), signal } 응답 전에 오는 메시지를 받을 함수들과
+        // 요청을 멈출 AbortSignal. 멈추면 워커에 cancel 을 보내고, 요청은 'cancelled' 오류로 끝납니다.
+        return this.start().then(() => new Promise((resolve, reject) => {
+            if (!this.child) {
+                return reject(new Error('분석 워커가 실행 중이 아닙니다.'));
+            }
+            const id = this.nextId++;
+            this.pending.set(id, { resolve, reject, onProgress: handlers.onProgress, onRecord: handlers.onRecord });
+            this.write({ ...message, id });
+
+            const { signal } = handlers;
+            if (signal) {
+                if (signal.aborted) {
+                    this.cancel(id);
+                } else {
+                    signal.addEventListener('abort', () => this.cancel(id), { once: true });
+                }
+            }
+        }));
+    }
+
+    cancel(id) {
+        if (this.child && this.pending.has(id)) {
+            this.write({ type: 'cancel', request_id: id });
+        }
+    }
+
+    analyze(videoPath, options = {}, onProgress = null) {
+        // options: 워커 요청에 그대로 덧붙는 선택 항목 (job_id, impact_mode 등, tennis_teacher/worker.py 참고)
+        // onProgress(record): 분석 중 워커가 보내는 진행 상황마다 호출됩니다.
+        return this.send({ ...options, type: 'analyze', video_path: videoPath }, { onProgress });
+    }
+
+    stream(videoPath, options = {}, handlers = {}) {
+        // 모든 프레임을 분석하며 handlers.onRecord 로 프레임별 결과(meta, frame..., end)를 넘깁니다.
+        // 끝나면 { frames } 로 resolve 합니다.
+        return this.send({ ...options, type: 'stream', video_path: videoPath }, handlers);
+    }
+
+    get busy() {
+        return this.pending.size;
+    }
+
+    stop() {
+        this.stopped = true;
+        if (this.child) {
+            this.child.stdin.end();
+        }
+    }
+}
+
+// 상주 워커 여러 개. 각 워커는 요청을 하나씩 처리하므로, 처리 중인 요청이 가장 적은 워커에 보냅니다.
+// 작업마다 출력 디렉토리가 따로 있어(job_id) 워커들이 동시에 분석해도 결과가 섞이지 않습니다.
+class AnalysisWorkerPool {
+    constructor(size, options = {}) {
+        this.workers = Array.from({ length: Math.max(1, size) }, () => new AnalysisWorker(options));
+    }
+
+    start() {
+        return Promise.all(this.workers.map((worker) => worker.start()));
+    }
+
+    leastBusy() {
+        return this.workers.reduce((best, candidate) => (candidate.busy < best.busy ? candidate : best));
+    }
+
+    analyze(videoPath, options = {}, onProgress = null) {
+        return this.leastBusy().analyze(videoPath, options, onProgress);
+    }
+
+    stream(videoPath, options = {}, handlers = {}) {
+        return this.leastBusy().stream(videoPath, options, handlers);
+    }
+
+    stop() {
+        this.workers.forEach((worker) => worker.stop());
+    }
+}
+
+module.exports = { AnalysisWorker, AnalysisWorkerPool };
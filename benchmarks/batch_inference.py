@@ -0,0 +1,41 @@
+import sys
+import argparse
+
+from tennis_teacher import config
+from tennis_teacher.models import get_net
+from tennis_teacher.pose import detect_keypoints, detect_keypoints_batch
+
+from .common import load_frames, best_of, print_table
+
+# 배치 크기별 포즈 추론 처리량(frames/s)
+#   python -m benchmarks.batch_inference --video clip.mp4 --size 368 --batch-sizes 1 2 4 8
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pose inference throughput against batch size.")
+    parser.add_argument("--video", help="take frames from this clip instead of random frames")
+    parser.add_argument("--frames", type=int, default=16)
+    parser.add_argument("--size", type=int, default=config.SCAN_INPUT_SIZE[0], help="network input side length")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    frames = load_frames(args.video, args.frames)
+    size = (args.size, args.size)
+    get_net()
+    detect_keypoints(frames[0], size)  # 워밍업
+
+    baseline, expected = best_of(lambda: [detect_keypoints(frame, size) for frame in frames], args.repeat)
+    rows = [["single", f"{len(frames) / baseline:.2f}", "1.00x", "yes"]]
+    for batch_size in args.batch_sizes:
+        elapsed, points = best_of(lambda: detect_keypoints_batch(frames, size, batch_size), args.repeat)
+        rows.append([batch_size, f"{len(frames) / elapsed:.2f}", f"{baseline / elapsed:.2f}x",
+                     "yes" if points == expected else "no"])
+
+    print(f"{len(frames)} frames at {args.size}x{args.size}")
+    print_table(["batch", "fps", "speedup", "same keypoints"], rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+import time
+
+from tennis_teacher.profiling import lazy_import
+
+# 벤치마크 공통 도구
+
+
+def load_frames(video_path=None, count=16, shape=(720, 1280)):
+    # 영상이 주어지면 앞쪽 프레임을, 아니면 무작위 프레임을 사용합니다.
+    np = lazy_import("numpy")
+    if video_path:
+        from tennis_teacher.video import open_video, iter_frames
+        cap = open_video(video_path)
+        if cap is None:
+            raise SystemExit(1)
+        try:
+            frames = [frame for _, frame in zip(range(count), (f for _, f in iter_frames(cap)))]
+        finally:
+            cap.release()
+        return frames
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, size=shape + (3,), dtype=np.uint8) for _ in range(count)]
+
+
+def best_of(fn, repeat=3):
+    # 가장 빠른 실행 시간(초)과 마지막 결과를 반환
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(h)), *(len(str(row[i])) for row in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).rjust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(v).rjust(w) for v, w in zip(row, widths)))
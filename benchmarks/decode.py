@@ -0,0 +1,95 @@
+import os
+import sys
+import argparse
+import subprocess
+import tempfile
+
+from tennis_teacher import config
+from tennis_teacher.profiling import lazy_import
+from tennis_teacher.video import open_frame_reader
+
+from .common import best_of, print_table
+
+# 디코딩 처리량: cv2.VideoCapture + cv2.resize(INTER_AREA) 와 ffmpeg 파이프(디코딩 시 축소)
+#   python -m benchmarks.decode clip1080.mp4 clip4k.mp4 --strides 1 5
+#   python -m benchmarks.decode --synthetic      # 1080p/4K 테스트 클립을 만들어서 측정
+
+SYNTHETIC_CLIPS = {"1080p": (1920, 1080), "4K": (3840, 2160)}
+
+
+def make_synthetic_clip(directory, name, size, seconds=5, fps=30):
+    path = os.path.join(directory, f"{name}.mp4")
+    subprocess.run([config.FFMPEG_BINARY, "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+                    "-f", "lavfi", "-i", f"testsrc2=size={size[0]}x{size[1]}:rate={fps}:duration={seconds}",
+                    "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p", path], check=True)
+    return path
+
+
+def decode_opencv(video_path, stride, max_side):
+    # 지금까지의 경로: 원본 해상도로 디코딩한 뒤 파이썬에서 줄입니다.
+    cv2 = lazy_import("cv2")
+    reader = open_frame_reader(video_path, "opencv", stride)
+    count = 0
+    try:
+        while True:
+            item = reader.read()
+            if item is None:
+                break
+            frame = item[1]
+            height, width = frame.shape[:2]
+            scale = max_side / max(width, height)
+            cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+            count += 1
+    finally:
+        reader.close()
+    return count
+
+
+def decode_ffmpeg(video_path, stride, max_side):
+    reader = open_frame_reader(video_path, "ffmpeg", stride, max_side=max_side)
+    count = 0
+    buffer = None
+    try:
+        while True:
+            item = reader.read(buffer)
+            if item is None:
+                break
+            buffer = item[1]
+            count += 1
+    finally:
+        reader.close()
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Decode throughput of the OpenCV and ffmpeg frame sources.")
+    parser.add_argument("videos", nargs="*")
+    parser.add_argument("--synthetic", action="store_true", help="generate 1080p and 4K test clips with ffmpeg")
+    parser.add_argument("--strides", type=int, nargs="+", default=[1, config.SCAN_COARSE_STRIDE])
+    parser.add_argument("--max-side", type=int, default=config.MAX_INPUT_SIDE)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        videos = list(args.videos)
+        if args.synthetic:
+            videos += [make_synthetic_clip(directory, name, size) for name, size in SYNTHETIC_CLIPS.items()]
+        if not videos:
+            parser.error("give video paths or --synthetic")
+
+        rows = []
+        for video_path in videos:
+            for stride in args.strides:
+                baseline, expected = best_of(lambda: decode_opencv(video_path, stride, args.max_side), args.repeat)
+                elapsed, count = best_of(lambda: decode_ffmpeg(video_path, stride, args.max_side), args.repeat)
+                rows.append([os.path.basename(video_path), stride, expected,
+                             f"{expected / baseline:.1f}", f"{count / elapsed:.1f}", f"{baseline / elapsed:.2f}x",
+                             "yes" if count == expected else "no"])
+
+    print(f"frames scaled to a {args.max_side}px long side")
+    print_table(["clip", "stride", "frames", "opencv fps", "ffmpeg fps", "speedup", "same count"], rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+import base64
+import argparse
+import tempfile
+from datetime import datetime
+
+from tennis_teacher import config
+from tennis_teacher.features import PoseAngles
+from tennis_teacher.pose import resize_for_inference
+from tennis_teacher.profiling import lazy_import
+from tennis_teacher.report import HTML_TEMPLATE, render_report
+from tennis_teacher.scoring import calculate_scores
+
+from .common import load_frames, best_of, print_table
+
+# 보고서(result.html) 생성 지연 시간: 예전 matplotlib 경로와 메모리 렌더러 비교
+#   python -m benchmarks.report                       # 무작위 결과 이미지
+#   python -m benchmarks.report --video clip.mp4 --repeat 20
+# before 는 예전 save_results_to_html 을 그대로 옮긴 것입니다 (매번 Template 파싱, matplotlib 도넛 차트를
+# dpi=200 PNG 로 저장했다가 다시 읽기). after 는 지금의 렌더러로, inline 은 이미지와 차트를 HTML 에 넣는 경우,
+# assets 는 내용 해시 이름의 파일로 따로 쓰는 기본 경우입니다 (html KB 는 HTML 만, assets KB 는 나머지 파일).
+# cold 는 첫 호출(matplotlib import 포함), warm 은 --repeat 번 중 가장 빠른 시간.
+# 결과 이미지는 analyze_frame 과 같이 MAX_INPUT_SIDE 로 줄인 크기입니다.
+
+
+def legacy_save_results_to_html(image, features, feedback_list, output_path, work_dir):
+    cv2 = lazy_import("cv2")
+    plt = lazy_import("matplotlib.pyplot")
+    jinja2 = lazy_import("jinja2")
+
+    _, buffer = cv2.imencode('.jpg', image)
+    img_str = base64.b64encode(buffer).decode('utf-8')
+    current_date = datetime.now().strftime("%Y-%m-%d")
+    total_score = calculate_scores(features)
+
+    chart_path = os.path.join(work_dir, "score_chart.png")
+    fig, ax = plt.subplots(figsize=(4, 4))
+    wedges, texts, autotexts = ax.pie([total_score, 100-total_score], startangle=90, colors=['#007bff', '#d3d3d3'],
+                                      counterclock=False, wedgeprops=dict(width=0.3, edgecolor='white'), autopct='%1.1f%%')
+    plt.setp(autotexts, size=12, weight="bold", color="white")
+    ax.text(0, 0, f"{total_score:.2f}/100", ha='center', va='center', fontsize=20, color='black')
+    plt.savefig(chart_path, bbox_inches='tight', pad_inches=0.1, dpi=200)
+    plt.close(fig)
+
+    with open(chart_path, 'rb') as image_file:
+        img_base64 = base64.b64encode(image_file.read()).decode('utf-8')
+
+    template = jinja2.Template(HTML_TEMPLATE)
+    score_chart = f'<img src="data:image/png;base64,{img_base64}" alt="Score Chart" class="img-fluid" />'
+    html_content = template.render(frame_src="data:image/jpeg;base64," + img_str, results=features.to_records(),
+                                   feedback_list=feedback_list, current_date=current_date, score_chart=score_chart,
+                                   total_score=total_score)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(html_content)
+
+
+def sample_features(image, seed=0):
+    # 모델 없이도 돌 수 있도록 무작위 키포인트와 분류 결과를 만듭니다.
+    np = lazy_import("numpy")
+    rng = np.random.default_rng(seed)
+    height, width = image.shape[:2]
+    keypoints = np.column_stack([rng.uniform(0, width, 15), rng.uniform(0, height, 15),
+                                 np.ones(15)]).astype(np.float32)
+    features = PoseAngles.from_keypoints(keypoints)
+    features.is_correct = np.where(features.valid, rng.integers(0, 2, len(features.valid)), -1)
+    return features
+
+
+def save_report(image, features, feedback_list, output_path, inline, assets_root):
+    # 매번 새 디렉토리에 써서 이미 있는 보고서를 재사용하지 않게 합니다.
+    html_content, _ = render_report(image, features, feedback_list, inline=inline,
+                                    assets_dir=tempfile.mkdtemp(dir=assets_root))
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(html_content)
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def measure(fn, repeat):
+    start = time.perf_counter()
+    fn()
+    cold = time.perf_counter() - start
+    warm, _ = best_of(fn, repeat)
+    return cold, warm
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Report generation latency: matplotlib round trip vs in-memory SVG and hashed assets.")
+    parser.add_argument("--video", help="take the result image from this clip (default: random pixels)")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    lazy_import("cv2")
+    lazy_import("jinja2")
+    image = resize_for_inference(load_frames(args.video, 1)[0], config.MAX_INPUT_SIDE)
+    features = sample_features(image)
+    feedback_list = ["피드백"] * 3
+
+    rows = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        cases = []
+        try:
+            lazy_import("matplotlib")
+            cases.append(("before (matplotlib png)",
+                          lambda path, assets_root: legacy_save_results_to_html(image, features, feedback_list, path,
+                                                                                assets_root)))
+        except ImportError:
+            print("matplotlib is not installed; skipping the 'before' measurement")
+        for inline in (True, False):
+            cases.append((f"after ({'inline' if inline else 'assets'})",
+                          lambda path, assets_root, inline=inline: save_report(image, features, feedback_list, path,
+                                                                               inline, assets_root)))
+
+        for index, (name, fn) in enumerate(cases):
+            path = os.path.join(work_dir, f"{index}.html")
+            assets_root = os.path.join(work_dir, str(index))
+            os.makedirs(assets_root)
+            cold, warm = measure(lambda: fn(path, assets_root), args.repeat)
+            if name.startswith("before"):
+                os.remove(os.path.join(assets_root, "score_chart.png"))
+            assets = directory_size(assets_root) / (1 + args.repeat)
+            rows.append([name, f"{1000 * cold:.1f}", f"{1000 * warm:.2f}", f"{os.path.getsize(path) / 1024:.0f}",
+                         f"{assets / 1024:.0f}"])
+
+    print(f"result image {image.shape[1]}x{image.shape[0]}, warm = best of {args.repeat}")
+    print_table(["renderer", "cold ms", "warm ms", "html KB", "assets KB"], rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
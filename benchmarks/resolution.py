@@ -0,0 +1,165 @@
+import os
+import sys
+import glob
+import time
+import argparse
+
+from tennis_teacher import config
+from tennis_teacher.models import get_net
+from tennis_teacher.pose import (detect_keypoint_array, detect_keypoint_arrays_batch, keypoint_mask, preset_sizes,
+                                 resize_for_inference)
+from tennis_teacher.profiling import lazy_import
+
+from .common import load_frames, print_table
+
+# 해상도 프리셋별 지연 시간/메모리/정확도
+#   python -m benchmarks.resolution                           # 저장소에 들어 있는 openpose 예제 이미지
+#   python -m benchmarks.resolution frames/*.jpg --video clip.mp4 --video-frames 16
+# 각 프리셋으로 두 경로를 돌립니다.
+#   analyze: analyze_frame 처럼 긴 변을 max_input_side 로 줄인 이미지를 그 크기 그대로 forward
+#   scan:    임팩트 탐색처럼 scan_input_size 정사각형 입력으로 forward
+# 프레임당 forward 시간(중앙값), forward 에 필요한 중간 결과(blob) 메모리, 가장 큰 프리셋 결과와의 일치도를 출력합니다.
+#   blob MB: cv2.dnn 의 getMemoryConsumption 추정치 (analyze 는 가장 큰 입력 기준). 가중치 메모리는 프리셋과 무관합니다.
+#   PCK: 기준에서 보이는 키포인트 중 긴 변의 --pck 비율 이내에 있는 비율
+#   visible: 키포인트 검출 여부가 기준과 같은 비율
+#   labels: 양쪽에서 유효한 관절 쌍 중 분류 결과(IsCorrect)가 기준과 같은 비율 (분류 모델이 있을 때)
+
+BUNDLED_IMAGES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "openpose", "examples", "media", "*.jpg")
+
+
+def load_images(paths):
+    cv2 = lazy_import("cv2")
+    images = []
+    for path in paths:
+        image = cv2.imread(path)
+        if image is None:
+            print(f"Skipping unreadable image: {path}")
+            continue
+        images.append(image)
+    return images
+
+
+def run_analyze_path(images, max_side):
+    # 원본 좌표계의 (N, 15, 3) 키포인트와 프레임별 시간(초)
+    np = lazy_import("numpy")
+    keypoints = []
+    times = []
+    for image in images:
+        start = time.perf_counter()
+        resized = resize_for_inference(image, max_side)
+        result = detect_keypoint_array(resized)
+        times.append(time.perf_counter() - start)
+        result[:, 0] *= image.shape[1] / resized.shape[1]
+        result[:, 1] *= image.shape[0] / resized.shape[0]
+        keypoints.append(result)
+    return np.stack(keypoints), times
+
+
+def run_scan_path(images, size):
+    np = lazy_import("numpy")
+    keypoints = []
+    times = []
+    for image in images:
+        start = time.perf_counter()
+        keypoints.append(detect_keypoint_arrays_batch([image], size, 1)[0])
+        times.append(time.perf_counter() - start)
+    return np.stack(keypoints), times
+
+
+def blob_memory_mb(shapes):
+    net = get_net()
+    return max(net.getMemoryConsumption((1, 3, height, width))[1] for height, width in shapes) / (1024 * 1024)
+
+
+def pair_labels(keypoints):
+    # 분류 모델을 읽을 수 없으면 None
+    from tennis_teacher.classifier import classify_angles
+    from tennis_teacher.features import compute_angle_array
+
+    angles, valid = compute_angle_array(keypoints)
+    try:
+        return classify_angles(angles, valid), valid
+    except (OSError, ValueError):
+        return None
+
+
+def agreement(keypoints, reference, images, pck):
+    np = lazy_import("numpy")
+    long_sides = np.array([max(image.shape[:2]) for image in images], dtype=np.float64)[:, None]
+    visible = keypoint_mask(keypoints)
+    reference_visible = keypoint_mask(reference)
+    distance = np.linalg.norm(keypoints[..., :2] - reference[..., :2], axis=-1) / long_sides
+    within = (distance <= pck) & visible & reference_visible
+    pck_value = within.sum() / max(1, reference_visible.sum())
+    return pck_value, (visible == reference_visible).mean()
+
+
+def label_agreement(labels, reference_labels):
+    if labels is None or reference_labels is None:
+        return None
+    (predicted, valid), (reference, reference_valid) = labels, reference_labels
+    both = valid & reference_valid
+    if not both.any():
+        return None
+    return (predicted[both] == reference[both]).mean()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latency, memory and keypoint agreement per resolution preset.")
+    parser.add_argument("images", nargs="*", help=f"labelled frames (default: {BUNDLED_IMAGES})")
+    parser.add_argument("--video", help="also take frames from this clip")
+    parser.add_argument("--video-frames", type=int, default=16)
+    parser.add_argument("--presets", nargs="+", choices=list(config.RESOLUTION_PRESETS),
+                        default=list(config.RESOLUTION_PRESETS))
+    parser.add_argument("--pck", type=float, default=0.02, help="PCK threshold as a fraction of the long side")
+    args = parser.parse_args(argv)
+
+    np = lazy_import("numpy")
+    images = load_images(args.images or sorted(glob.glob(BUNDLED_IMAGES)))
+    if args.video:
+        images += load_frames(args.video, args.video_frames)
+    if not images:
+        parser.error("no frames to run")
+
+    get_net()
+    detect_keypoint_array(images[0], (64, 64))  # 워밍업
+
+    # 가장 큰 프리셋을 기준으로 삼습니다.
+    presets = sorted(args.presets, key=lambda name: config.RESOLUTION_PRESETS[name]["max_input_side"])
+    reference_name = presets[-1]
+    results = {}
+    for name in presets:
+        max_side, scan_size, _ = preset_sizes(name)
+        analyze, analyze_times = run_analyze_path(images, max_side)
+        scan, scan_times = run_scan_path(images, scan_size)
+        analyze_shapes = {resize_for_inference(image, max_side).shape[:2] for image in images}
+        results[name] = {
+            "analyze": analyze, "analyze_ms": 1000 * float(np.median(analyze_times)),
+            "analyze_mb": blob_memory_mb(analyze_shapes),
+            "scan": scan, "scan_ms": 1000 * float(np.median(scan_times)),
+            "scan_mb": blob_memory_mb([scan_size[::-1]]),
+            "labels": pair_labels(analyze),
+        }
+
+    reference = results[reference_name]
+    rows = []
+    for name in presets:
+        result = results[name]
+        max_side, scan_size, _ = preset_sizes(name)
+        analyze_pck, analyze_visible = agreement(result["analyze"], reference["analyze"], images, args.pck)
+        scan_pck, scan_visible = agreement(result["scan"], reference["scan"], images, args.pck)
+        labels = label_agreement(result["labels"], reference["labels"])
+        rows.append([name, max_side, f"{result['analyze_ms']:.0f}", f"{result['analyze_mb']:.0f}",
+                     f"{analyze_pck:.1%}", f"{analyze_visible:.1%}", "-" if labels is None else f"{labels:.1%}",
+                     f"{scan_size[0]}", f"{result['scan_ms']:.0f}", f"{result['scan_mb']:.0f}",
+                     f"{scan_pck:.1%}", f"{scan_visible:.1%}"])
+
+    print(f"{len(images)} frames; agreement against '{reference_name}', PCK@{args.pck:g} of the long side")
+    print_table(["preset", "analyze side", "ms", "blob MB", "PCK", "visible", "labels",
+                 "scan side", "ms", "blob MB", "PCK", "visible"], rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import os
+import sys
+import argparse
+
+from tennis_teacher import config
+from tennis_teacher.impact import impact_pose_mask
+from tennis_teacher.models import get_net
+from tennis_teacher.pose import detect_keypoint_array, detect_keypoint_arrays_batch, keypoint_mask
+from tennis_teacher.profiling import lazy_import
+from tennis_teacher.roi import PlayerRoi
+
+from .common import load_frames, best_of, print_table
+
+# 선수 영역(ROI) 자르기와 전체 프레임 추론의 처리량 비교
+#   python -m benchmarks.roi                                  # 저장소에 들어 있는 openpose 예제 영상
+#   python -m benchmarks.roi clip.mp4 --frames 120 --scales 0.5 0.75
+# 스캔과 같이 POSE_BATCH_SIZE 단위로 추론하며, 전체 프레임 결과 대비 키포인트 위치 차이(양쪽에서 보이는 점,
+# 긴 변 대비 %)와 임팩트 판정이 달라진 프레임 수도 함께 출력합니다.
+
+BUNDLED_CLIPS = [os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "openpose", "examples", "media", "video.avi")]
+
+
+def run_full(frames, size, batch_size):
+    np = lazy_import("numpy")
+    return np.concatenate([detect_keypoint_arrays_batch(frames[start:start + batch_size], size, batch_size)
+                           for start in range(0, len(frames), batch_size)])
+
+
+def run_roi(frames, size, batch_size, scale):
+    np = lazy_import("numpy")
+    roi = PlayerRoi(size, input_scale=scale)
+    keypoints = np.concatenate([roi.detect_batch(frames[start:start + batch_size])
+                                for start in range(0, len(frames), batch_size)])
+    return keypoints, roi
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pose throughput with player ROI cropping against full frames.")
+    parser.add_argument("videos", nargs="*", default=BUNDLED_CLIPS)
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--size", type=int, default=config.SCAN_INPUT_SIZE[0], help="full-frame input side length")
+    parser.add_argument("--scales", type=float, nargs="+", default=[config.ROI_INPUT_SCALE])
+    parser.add_argument("--batch-size", type=int, default=config.POSE_BATCH_SIZE)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    np = lazy_import("numpy")
+    size = (args.size, args.size)
+    get_net()
+    rows = []
+    for video_path in args.videos:
+        frames = load_frames(video_path, args.frames)
+        long_side = max(frames[0].shape[:2])
+        detect_keypoint_array(frames[0], size)  # 워밍업
+
+        baseline, full = best_of(lambda: run_full(frames, size, args.batch_size), args.repeat)
+        name = os.path.basename(video_path)
+        rows.append([name, "full frame", f"{len(frames) / baseline:.2f}", "1.00x", "-", "-", "-", "-"])
+        full_visible = keypoint_mask(full)
+        full_impact = impact_pose_mask(full)
+        for scale in args.scales:
+            elapsed, (keypoints, roi) = best_of(lambda: run_roi(frames, size, args.batch_size, scale), args.repeat)
+            both = keypoint_mask(keypoints) & full_visible
+            distance = np.linalg.norm(keypoints[..., :2] - full[..., :2], axis=-1)[both]
+            rows.append([name, f"roi x{scale:g} ({roi.roi_size[0]}px)", f"{len(frames) / elapsed:.2f}",
+                         f"{baseline / elapsed:.2f}x",
+                         f"{roi.stats['cropped'] / len(frames):.0%}", roi.stats["fallbacks"],
+                         f"{100 * distance.mean() / long_side:.2f}" if len(distance) else "-",
+                         int((impact_pose_mask(keypoints) != full_impact).sum())])
+
+    print(f"{args.frames} frames per clip, full-frame input {args.size}x{args.size}, batch {args.batch_size}")
+    print_table(["clip", "mode", "fps", "speedup", "cropped", "fallbacks", "mean dev %", "impact diff"], rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
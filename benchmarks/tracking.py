@@ -0,0 +1,73 @@
+import sys
+import time
+import argparse
+
+from tennis_teacher import config
+from tennis_teacher.impact import find_impact_index, impact_pose_mask
+from tennis_teacher.models import get_net
+from tennis_teacher.pose import detect_keypoint_array, detect_keypoint_arrays_batch, keypoint_mask
+from tennis_teacher.profiling import lazy_import
+from tennis_teacher.tracking import KeypointTracker
+
+from .common import load_frames, print_table
+
+# 추적 모드(희소 DNN 키프레임 + 광학 흐름)와 모든 프레임 DNN 의 비교
+#   python -m benchmarks.tracking clip.mp4 --frames 300 --size 368 --fixed 2 4 8
+# 각 설정의 DNN 호출 수/감소율, 촘촘한 기준 대비 키포인트 위치 차이(양쪽에서 보이는 점, 긴 변 대비 %),
+# 검출 여부가 달라진 키포인트 비율, 임팩트 판정이 달라진 프레임 수와 첫 임팩트 프레임을 출력합니다.
+
+
+def deviation(tracked, dense):
+    np = lazy_import("numpy")
+    tracked_visible = keypoint_mask(tracked)
+    dense_visible = keypoint_mask(dense)
+    both = tracked_visible & dense_visible
+    distance = np.linalg.norm(tracked[..., :2] - dense[..., :2], axis=-1)[both]
+    flipped = float((tracked_visible != dense_visible).mean())
+    return distance, flipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Optical-flow keypoint tracking against the dense per-frame baseline.")
+    parser.add_argument("video")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--size", type=int, default=config.SCAN_INPUT_SIZE[0], help="network input side length")
+    parser.add_argument("--fixed", type=int, nargs="*", default=[4, 8],
+                        help="also run with a fixed keyframe interval k (forced keyframes still apply)")
+    args = parser.parse_args(argv)
+
+    np = lazy_import("numpy")
+    frames = load_frames(args.video, args.frames)
+    size = (args.size, args.size)
+    long_side = max(frames[0].shape[:2])
+    get_net()
+    detect_keypoint_array(frames[0], size)  # 워밍업
+
+    start = time.perf_counter()
+    dense = detect_keypoint_arrays_batch(frames, size)
+    dense_time = time.perf_counter() - start
+    dense_impact = impact_pose_mask(dense)
+
+    configs = [("adaptive", KeypointTracker(size))]
+    configs += [(f"fixed k={k}", KeypointTracker(size, min_interval=k, max_interval=k)) for k in args.fixed]
+    rows = [["dense", len(frames), "-", f"{dense_time:.2f}", "-", "-", "-", "-", find_impact_index(dense)]]
+    for name, tracker in configs:
+        start = time.perf_counter()
+        tracked = np.stack([tracker.update(frame) for frame in frames])
+        elapsed = time.perf_counter() - start
+        distance, flipped = deviation(tracked, dense)
+        calls = tracker.stats["dnn_calls"]
+        mean = f"{100 * distance.mean() / long_side:.2f}" if len(distance) else "-"
+        p95 = f"{100 * np.percentile(distance, 95) / long_side:.2f}" if len(distance) else "-"
+        rows.append([name, calls, f"{1 - calls / len(frames):.0%}", f"{elapsed:.2f}", mean, p95,
+                     f"{flipped:.1%}", int((impact_pose_mask(tracked) != dense_impact).sum()),
+                     find_impact_index(tracked)])
+
+    print(f"{len(frames)} frames at {args.size}x{args.size}; deviation in % of the {long_side}px long side")
+    print_table(["mode", "dnn calls", "saved", "seconds", "mean dev %", "p95 dev %", "visibility diff",
+                 "impact diff", "first impact"], rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
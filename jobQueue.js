@@ -0,0 +1,311 @@
+const fs = require('fs');
+const path = require('path');
+const { EventEmitter } = require('events');
+
+// 분석 작업 큐와 스케줄러
+//
+// - submit 은 작업을 큐에 넣고 바로 돌려줍니다. 동시에 실행하는 작업은 concurrency 개(상주 워커 수)까지입니다.
+// - 대기 중인 작업이 maxQueued 개면 QueueFullError 를 던지고, server.js 는 429 + Retry-After 로 답합니다.
+//   Retry-After 는 최근 작업들의 평균 소요 시간으로 실행 중인 작업 하나가 끝날 때까지를 어림합니다.
+// - 우선순위(high/normal/low)가 높은 작업부터 실행합니다. 같은 순위는 먼저 온 순서대로이며, 오래 기다린 작업은
+//   agingMs 마다 한 단계씩 앞당겨져 긴 영상도 무한히 밀리지 않습니다.
+// - 작업 목록을 statePath 의 JSON 파일에 저장(임시 파일 + rename)해 두어 서버를 다시 시작해도 대기 작업이 이어집니다.
+//   실행 중에 서버가 멈춘 작업은 다시 대기열 맨 앞에 넣습니다.
+// - 진행률은 워커가 보내는 진행 상황 레코드(tennis_teacher/progress.py)의 percent 이고, 레코드 전체는
+//   progressDetail 에 둡니다. 작업이 바뀔 때마다 'update' 이벤트(job)를 내보내 server.js 가 SSE 로 전달합니다.
+// - mode 가 'stream' 인 작업은 보고서 대신 프레임별 결과를 'record' 이벤트(job, record)로 내보냅니다. 결과를 받을
+//   연결이 있어야 의미가 있으므로 저장해 두었다가 이어서 실행하지 않고, 연결이 끊기면 대기 중이든 실행 중이든 취소합니다.
+//   'record' 를 받은 쪽이 밀려 있으면 hold(jobId, promise) 로 알리고, 워커는 그동안 다음 결과를 읽지 않습니다.
+
+const PRIORITIES = { high: 0, normal: 1, low: 2 };
+const STATE_VERSION = 1;
+const DURATION_SAMPLES = 20;
+
+class QueueFullError extends Error {
+    constructor(retryAfter) {
+        super('분석 대기열이 가득 찼습니다.');
+        this.retryAfter = retryAfter;
+    }
+}
+
+class JobQueue extends EventEmitter {
+    constructor(pool, options = {}) {
+        super();
+        // 작업마다 SSE 연결이 하나씩 리스너를 붙이므로 기본 상한(10)을 두지 않습니다.
+        this.setMaxListeners(0);
+        this.pool = pool;
+        this.concurrency = options.concurrency || 1;
+        this.maxQueued = options.maxQueued || 32;
+        this.history = options.history || 200;
+        this.agingMs = options.agingMs || 60000;
+        this.statePath = options.statePath || null;
+        this.defaultDurationMs = options.defaultDurationMs || 30000;
+
+        this.jobs = new Map(); // jobId → 작업 (넣은 순서 유지)
+        this.running = 0;
+        this.durations = [];
+        this.saveTimer = null;
+        this.aborts = new Map(); // 실행 중인 stream 작업 id → AbortController
+        this.holds = new Map(); // stream 작업 id → 'record' 를 받은 쪽이 다 보낼 때까지의 Promise
+    }
+
+    // 저장해 둔 작업 목록을 읽고 대기 작업을 다시 시작합니다.
+    load() {
+        if (!this.statePath) {
+            return;
+        }
+        let state;
+        try {
+            state = JSON.parse(fs.readFileSync(this.statePath, 'utf8'));
+        } catch (err) {
+            if (err.code !== 'ENOENT') {
+                console.error(`작업 목록을 읽지 못했습니다 (${this.statePath}): ${err.message}`);
+            }
+            return;
+        }
+        if (state.version !== STATE_VERSION) {
+            return;
+        }
+        for (const job of state.jobs || []) {
+            if (job.mode === 'stream' && (job.status === 'queued' || job.status === 'running')) {
+                job.status = 'error';
+                job.error = '서버가 다시 시작되어 스트리밍이 끊겼습니다.';
+                job.finishedAt = new Date().toISOString();
+            }
+            if (job.status === 'running') {
+                // 실행 중에 멈춘 작업: 처음부터 다시
+                job.status = 'queued';
+                job.progress = 0;
+                job.progressDetail = null;
+                job.startedAt = null;
+                job.requeued = (job.requeued || 0) + 1;
+            }
+            this.jobs.set(job.id, job);
+        }
+        this.durations = (state.durations || []).slice(-DURATION_SAMPLES);
+        const queued = this.queued().length;
+        if (queued) {
+            console.log(`저장된 대기 작업 ${queued}개를 이어서 실행합니다.`);
+        }
+        this.schedule();
+    }
+
+    has(jobId) {
+        return this.jobs.has(jobId);
+    }
+
+    get(jobId) {
+        return this.jobs.get(jobId);
+    }
+
+    queued() {
+        return [...this.jobs.values()].filter((job) => job.status === 'queued');
+    }
+
+    // 다음에 실행할 작업일수록 작은 값
+    rank(job, now) {
+        const waited = now - Date.parse(job.createdAt);
+        return PRIORITIES[job.priority] * this.agingMs - waited - (job.requeued ? this.agingMs * 10 : 0);
+    }
+
+    position(job) {
+        if (job.status !== 'queued') {
+            return 0;
+        }
+        const now = Date.now();
+        const rank = this.rank(job, now);
+        return this.queued().filter((other) => this.rank(other, now) < rank).length + 1;
+    }
+
+    averageDurationMs() {
+        if (!this.durations.length) {
+            return this.defaultDurationMs;
+        }
+        return this.durations.reduce((sum, value) => sum + value, 0) / this.durations.length;
+    }
+
+    // 대기열에 자리가 날 때까지(실행 중인 작업 하나가 끝날 때까지)의 예상 시간(초)
+    retryAfterSeconds() {
+        return Math.max(1, Math.ceil(this.averageDurationMs() / this.concurrency / 1000));
+    }
+
+    submit(job) {
+        // job: { id, filePath, priority, mode?: 'analyze' | 'stream', options } → 큐에 넣은 작업 객체
+        if (this.queued().length >= this.maxQueued) {
+            throw new QueueFullError(this.retryAfterSeconds());
+        }
+        const entry = {
+            id: job.id,
+            filePath: job.filePath,
+            priority: PRIORITIES[job.priority] !== undefined ? job.priority : 'normal',
+            mode: job.mode === 'stream' ? 'stream' : 'analyze',
+            options: job.options || {},
+            status: 'queued',
+            progress: 0,
+            progressDetail: null,
+            result: null,
+            error: null,
+            createdAt: new Date().toISOString(),
+            startedAt: null,
+            finishedAt: null
+        };
+        this.jobs.set(entry.id, entry);
+        this.trimHistory();
+        this.save();
+        this.emit('update', entry);
+        this.schedule();
+        return entry;
+    }
+
+    schedule() {
+        while (this.running < this.concurrency) {
+            const now = Date.now();
+            const next = this.queued().reduce(
+                (best, job) => (best === null || this.rank(job, now) < this.rank(best, now) ? job : best), null);
+            if (!next) {
+                break;
+            }
+            this.start(next);
+        }
+    }
+
+    start(job) {
+        this.running += 1;
+        job.status = 'running';
+        job.startedAt = new Date().toISOString();
+        this.save();
+        this.emit('update', job);
+
+        // 진행 상황은 자주 오므로 메모리에만 반영하고 파일에는 상태가 바뀔 때만 씁니다.
+        const onProgress = (record) => {
+            job.progress = record.percent;
+            job.progressDetail = record;
+            this.emit('update', job);
+        };
+
+        let controller = null;
+        let run;
+        if (job.mode === 'stream') {
+            controller = new AbortController();
+            this.aborts.set(job.id, controller);
+            run = this.pool.stream(job.filePath, job.options, {
+                onProgress,
+                onRecord: (record) => {
+                    this.emit('record', job, record);
+                    const hold = this.holds.get(job.id);
+                    this.holds.delete(job.id);
+                    return hold;
+                },
+                signal: controller.signal
+            });
+        } else {
+            run = this.pool.analyze(job.filePath, { ...job.options, job_id: job.id }, onProgress);
+        }
+        run
+            .then((result) => {
+                job.status = 'done';
+                job.result = result;
+                job.progress = 100; // 분석 완료 시 진행률 100%로 설정
+            })
+            .catch((err) => {
+                console.error(`analyze worker error (job ${job.id}): ${err.message}`);
+                job.status = 'error';
+                job.error = controller && controller.signal.aborted ? controller.signal.reason : err.message;
+            })
+            .finally(() => {
+                this.aborts.delete(job.id);
+                this.holds.delete(job.id);
+                job.finishedAt = new Date().toISOString();
+                this.durations.push(Date.parse(job.finishedAt) - Date.parse(job.startedAt));
+                this.durations = this.durations.slice(-DURATION_SAMPLES);
+                this.running -= 1;
+                this.trimHistory();
+                this.save();
+                this.emit('update', job);
+                this.schedule();
+            });
+    }
+
+    // 작업을 취소합니다. 실행 중인 stream 작업은 워커에 cancel 을 보내 다음 프레임에서 멈추고(끝나면 'update'),
+    // 실행 중인 analyze 작업은 멈출 수 없으므로 false.
+    cancel(jobId, reason = '취소되었습니다.') {
+        const job = this.jobs.get(jobId);
+        if (job && job.status === 'running' && this.aborts.has(jobId)) {
+            this.aborts.get(jobId).abort(reason);
+            return true;
+        }
+        if (!job || job.status !== 'queued') {
+            return false;
+        }
+        job.status = 'error';
+        job.error = reason;
+        job.finishedAt = new Date().toISOString();
+        this.save();
+        this.emit('update', job);
+        return true;
+    }
+
+    // 'record' 리스너가 부릅니다: promise 가 끝날 때까지 이 작업의 다음 결과를 받지 않습니다.
+    hold(jobId, promise) {
+        this.holds.set(jobId, promise);
+    }
+
+    trimHistory() {
+        // Map 은 넣은 순서를 유지하므로 앞에서부터 끝난 작업을 지웁니다.
+        for (const [id, job] of this.jobs) {
+            if (this.jobs.size <= this.history + this.maxQueued + this.concurrency) {
+                break;
+            }
+            if (job.status === 'done' || job.status === 'error') {
+                this.jobs.delete(id);
+            }
+        }
+    }
+
+    save() {
+        // 짧은 시간에 여러 번 바뀌면 한 번만 씁니다.
+        if (!this.statePath || this.saveTimer) {
+            return;
+        }
+        this.saveTimer = setTimeout(() => {
+            this.saveTimer = null;
+            this.saveNow();
+        }, 100);
+    }
+
+    saveNow() {
+        if (!this.statePath) {
+            return;
+        }
+        const state = { version: STATE_VERSION, durations: this.durations, jobs: [...this.jobs.values()] };
+        const temp = `${this.statePath}.tmp-${process.pid}`;
+        try {
+            fs.mkdirSync(path.dirname(this.statePath), { recursive: true });
+            fs.writeFileSync(temp, JSON.stringify(state));
+            fs.renameSync(temp, this.statePath);
+        } catch (err) {
+            console.error(`작업 목록을 저장하지 못했습니다 (${this.statePath}): ${err.message}`);
+        }
+    }
+
+    stats() {
+        // running: 실행 중인 작업별 단계와 처리 속도 (작업별 처리량을 한눈에 보는 용도)
+        const running = [...this.jobs.values()].filter((job) => job.status === 'running').map((job) => ({
+            jobId: job.id,
+            progress: job.progress,
+            stage: job.progressDetail ? job.progressDetail.stage : null,
+            fps: job.progressDetail ? job.progressDetail.fps : null,
+            etaSeconds: job.progressDetail ? job.progressDetail.eta_s : null
+        }));
+        return {
+            concurrency: this.concurrency,
+            running: this.running,
+            queued: this.queued().length,
+            maxQueued: this.maxQueued,
+            averageDurationMs: Math.round(this.averageDurationMs()),
+            jobs: running
+        };
+    }
+}
+
+module.exports = { JobQueue, QueueFullError, PRIORITIES };
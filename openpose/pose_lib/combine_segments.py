@@ -1,18 +1,15 @@
-import glob
 import os
+import sys
 
-def combine_files():
-    segment_dir = '/app/openpose/pose_lib'
-    output_file = os.path.join(segment_dir, 'pose_iter_160000.caffemodel')
-    input_pattern = os.path.join(segment_dir, 'segment_*')
+# 실제 결합 로직은 저장소 루트의 tennis_teacher/model_assets.py 에 있습니다.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from tennis_teacher.model_assets import ensure_caffemodel
 
-    with open(output_file, 'wb') as f:
-        for part in sorted(glob.glob(input_pattern)):
-            with open(part, 'rb') as p:
-                f.write(p.read())
 
-    # Set the correct permissions
-    os.chmod(output_file, 0o777)
+def combine_files():
+    segment_dir = os.path.dirname(os.path.abspath(__file__))
+    return ensure_caffemodel(segment_dir)
 
 if __name__ == '__main__':
     combine_files()
@@ -12,6 +12,7 @@ document.addEventListener('DOMContentLoaded', function() {
     const resultImage = document.getElementById('resultImage');
     const backButton = document.getElementById('backButton');
     let selectedVideoPath = '';
+    let resultUrl = '/result.html';
 
     backButton.addEventListener('click', function() {
         window.history.back();
@@ -115,34 +116,7 @@ document.addEventListener('DOMContentLoaded', function() {
         analysisProgressBar.value = 0;
         analysisProgressText.textContent = '진행률: 0%';
 
-        const interval = setInterval(() => {
-            fetch('/get-analysis-progress')
-                .then(response => response.json())
-                .then(data => {
-                    const progress = data.progress;
-                    const currentProgress = analysisProgressBar.value;
-                    const increment = (progress - currentProgress) / 10; // 자연스럽게 증가시키기 위한 계산
-                    let counter = 0;
-
-                    const smoothIncrement = setInterval(() => {
-                        if (counter >= 10) {
-                            clearInterval(smoothIncrement);
-                        } else {
-                            analysisProgressBar.value += increment;
-                            analysisProgressText.textContent = `진행률: ${analysisProgressBar.value.toFixed(2)}%`;
-                            counter++;
-                        }
-                    }, 100);
-
-                    if (progress >= 100) {
-                        clearInterval(interval);
-                    }
-                })
-                .catch(error => {
-                    console.error('Error fetching analysis progress:', error);
-                });
-        }, 1000);
-
+        // 작업을 대기열에 넣으면 서버가 바로 작업 id 를 돌려주고, 이후 작업 상태를 SSE 로 받습니다.
         fetch('/analyze', {
             method: 'POST',
             headers: {
@@ -151,16 +125,22 @@ document.addEventListener('DOMContentLoaded', function() {
             body: JSON.stringify({ filePath: selectedVideoPath })
         })
         .then(response => {
+            if (response.status === 429) {
+                const retryAfter = response.headers.get('Retry-After');
+                throw new Error(`분석 대기열이 가득 찼습니다. ${retryAfter}초 후에 다시 시도하세요.`);
+            }
             if (!response.ok) {
                 throw new Error('Network response was not ok ' + response.statusText);
             }
             return response.json();
         })
-        .then(data => {
-            alert(data.message);  // 팝업이 뜨도록 합니다.
-            checkResultButton.style.display = 'block';  // 팝업 이후에 버튼을 표시합니다.
+        .then(job => waitForJob(job.jobId))
+        .then(job => {
+            resultUrl = job.resultUrl || resultUrl;
             analysisProgressBar.value = 100;
             analysisProgressText.textContent = '진행률: 100%';
+            alert('분석 완료');  // 팝업이 뜨도록 합니다.
+            checkResultButton.style.display = 'block';  // 팝업 이후에 버튼을 표시합니다.
         })
         .catch(error => {
             console.error('Error analyzing video:', error);
@@ -168,15 +148,73 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 
+    // 진행 상황 단계 이름 (tennis_teacher/progress.py 의 stage)
+    const STAGE_LABELS = {
+        start: '시작',
+        cache: '이전 결과 확인',
+        decode: '프레임 추출',
+        scan: '임팩트 구간 탐색',
+        pose: '자세 분석',
+        report: '보고서 작성',
+        done: '완료'
+    };
+
+    // 서버가 보내는 작업 상태(SSE, /jobs/<jobId>/events)로 진행률을 표시합니다. 끝나면 작업 상태로 resolve 합니다.
+    function waitForJob(jobId) {
+        return new Promise((resolve, reject) => {
+            const source = new EventSource(`/jobs/${jobId}/events`);
+            source.addEventListener('progress', (event) => {
+                const job = JSON.parse(event.data);
+                if (job.status === 'queued') {
+                    analysisProgressText.textContent = `대기 중 (${job.position}번째)`;
+                    return;
+                }
+                showProgress(job.progress, job.progressDetail);
+            });
+            source.addEventListener('done', (event) => {
+                source.close();
+                resolve(JSON.parse(event.data));
+            });
+            source.addEventListener('failed', (event) => {
+                source.close();
+                reject(new Error(JSON.parse(event.data).error || '분석 중 오류 발생'));
+            });
+            source.onerror = () => {
+                // 연결이 잠깐 끊기면 브라우저가 다시 연결합니다. 닫힌 경우(작업 없음 등)만 실패로 처리합니다.
+                if (source.readyState === EventSource.CLOSED) {
+                    reject(new Error('작업 상태를 받을 수 없습니다.'));
+                }
+            };
+        });
+    }
+
+    function showProgress(progress, detail) {
+        analysisProgressBar.value = progress;
+        let text = `진행률: ${progress.toFixed(0)}%`;
+        if (detail) {
+            text += ` · ${STAGE_LABELS[detail.stage] || detail.stage}`;
+            if (detail.total_frames) {
+                text += ` ${detail.frames_decoded}/${detail.total_frames} 프레임`;
+            }
+            if (detail.fps) {
+                text += ` · ${detail.fps.toFixed(1)} fps`;
+            }
+            if (detail.stage === 'scan' && detail.eta_s !== null) {
+                text += ` · 약 ${Math.ceil(detail.eta_s)}초 남음`;
+            }
+        }
+        analysisProgressText.textContent = text;
+    }
+
     // 분석결과 확인하기 버튼 클릭 시
     checkResultButton.addEventListener('click', function() {
-        window.location.href = '/result.html';
+        window.location.href = resultUrl;
     });
 
     // 페이지 로드 시 비디오 옵션 로드
     loadVideoOptions();
 
     document.getElementById('checkResultButton').addEventListener('click', function() {
-        window.location.href = '/result.html';
+        window.location.href = resultUrl;
     });
 });
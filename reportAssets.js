@@ -0,0 +1,117 @@
+const fs = require('fs');
+const path = require('path');
+const zlib = require('zlib');
+const { promisify } = require('util');
+
+// 보고서 파일(tennis_teacher/report.py 가 REPORT_ASSETS_DIR/<보고서 id>/ 에 쓰는 frame.<해시>.jpg 등) 서빙
+//
+// 파일 이름에 내용 해시가 들어 있어 같은 URL 의 내용은 바뀌지 않으므로
+// - Cache-Control: immutable 로 한 번 받은 파일은 다시 요청하지 않고,
+// - ETag 는 이름의 해시(압축본은 인코딩을 덧붙임)로 정해 If-None-Match 에는 304 로 답합니다.
+// svg/json 같은 텍스트 파일은 처음 요청될 때 brotli/gzip 으로 한 번 압축해 옆에 <이름>.br / <이름>.gz 로 두고
+// 이후로는 그 파일을 그대로 보냅니다.
+
+const IMMUTABLE = 'public, max-age=31536000, immutable';
+const HASHED_NAME = /\.([0-9a-f]{16})\.[a-z0-9]+$/;
+const COMPRESSIBLE = new Set(['.svg', '.json', '.html', '.css', '.js', '.txt']);
+const ENCODINGS = {
+    br: { suffix: '.br', compress: promisify(zlib.brotliCompress) },
+    gzip: { suffix: '.gz', compress: promisify(zlib.gzip) }
+};
+
+const compressing = new Map();
+
+function compressOnce(filePath, encoding) {
+    // 같은 파일을 동시에 여러 번 압축하지 않도록 진행 중인 작업을 공유합니다.
+    const target = filePath + ENCODINGS[encoding].suffix;
+    if (compressing.has(target)) {
+        return compressing.get(target);
+    }
+    const task = fs.promises.stat(target)
+        .catch(async () => {
+            const data = await fs.promises.readFile(filePath);
+            const compressed = await ENCODINGS[encoding].compress(data);
+            const temp = `${target}.tmp-${process.pid}`;
+            await fs.promises.writeFile(temp, compressed);
+            await fs.promises.rename(temp, target);
+            return fs.promises.stat(target);
+        })
+        .finally(() => compressing.delete(target));
+    compressing.set(target, task);
+    return task;
+}
+
+function serveReportAssets(root) {
+    const resolvedRoot = path.resolve(root);
+
+    return async (req, res, next) => {
+        if (req.method !== 'GET' && req.method !== 'HEAD') {
+            return next();
+        }
+        let relative;
+        try {
+            relative = decodeURIComponent(req.path);
+        } catch (err) {
+            return res.status(400).end();
+        }
+        const filePath = path.resolve(resolvedRoot, '.' + relative);
+        const name = path.basename(filePath);
+        if (!filePath.startsWith(resolvedRoot + path.sep) || name.startsWith('.') || !HASHED_NAME.test(name)) {
+            return next();
+        }
+
+        let stat;
+        try {
+            stat = await fs.promises.stat(filePath);
+        } catch (err) {
+            return next();
+        }
+        if (!stat.isFile()) {
+            return next();
+        }
+
+        const ext = path.extname(name);
+        let encoding = null;
+        if (COMPRESSIBLE.has(ext)) {
+            res.vary('Accept-Encoding');
+            const accepted = req.acceptsEncodings('br', 'gzip', 'identity');
+            if (accepted === 'br' || accepted === 'gzip') {
+                encoding = accepted;
+            }
+        }
+
+        let sendPath = filePath;
+        if (encoding) {
+            try {
+                stat = await compressOnce(filePath, encoding);
+                sendPath = filePath + ENCODINGS[encoding].suffix;
+            } catch (err) {
+                console.error(`report asset compression failed (${name}): ${err.message}`);
+                encoding = null;
+            }
+        }
+
+        const etag = `"${HASHED_NAME.exec(name)[1]}${encoding ? '-' + encoding : ''}"`;
+        res.type(ext);
+        res.set('Cache-Control', IMMUTABLE);
+        res.set('ETag', etag);
+        if (encoding) {
+            res.set('Content-Encoding', encoding);
+        }
+        if (req.fresh) {
+            return res.status(304).end();
+        }
+        res.set('Content-Length', String(stat.size));
+        if (req.method === 'HEAD') {
+            return res.end();
+        }
+        fs.createReadStream(sendPath)
+            .on('error', (err) => {
+                console.error(`report asset read failed (${name}): ${err.message}`);
+                res.destroy(err);
+            })
+            .pipe(res);
+    };
+}
+
+module.exports = { serveReportAssets };
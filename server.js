@@ -2,17 +2,83 @@ const express = require('express');
 const path = require('path');
 const multer = require('multer');
 const fs = require('fs');
+const os = require('os');
+const crypto = require('crypto');
 const cors = require('cors');
-const { exec } = require('child_process');
+const { AnalysisWorkerPool } = require('./analysisWorker');
+const { JobQueue, QueueFullError, PRIORITIES } = require('./jobQueue');
+const { serveReportAssets } = require('./reportAssets');
 const app = express();
 
 // 환경 변수 설정
 const port = process.env.PORT || 8080;
 const uploadsDir = process.env.UPLOADS_DIR || '/app/uploads';
 const openposeDir = process.env.OPENPOSE_DIR || '/app/openpose';
+const publicDir = process.env.PUBLIC_DIR || '/app/public';
+// tennis_teacher 의 REPORT_ASSETS_DIR / REPORT_ASSETS_URL 과 같아야 합니다.
+const reportAssetsDir = process.env.TENNIS_TEACHER_REPORT_ASSETS_DIR || path.join(publicDir, 'reports');
+const reportAssetsUrl = process.env.TENNIS_TEACHER_REPORT_ASSETS_URL || '/reports';
 
-let analysisResult = {}; // 분석 결과를 저장할 객체 초기화
-let analysisProgress = 0; // 분석 진행률 초기화
+// 동시에 실행할 분석 수 K (상주 워커 프로세스 수). 기본값은 코어 2개당 하나입니다.
+const cores = os.availableParallelism ? os.availableParallelism() : os.cpus().length;
+const analysisWorkers = parseInt(process.env.ANALYSIS_WORKERS || String(Math.max(1, Math.floor(cores / 2))), 10);
+// 워커마다 OpenCV 가 쓸 스레드 수. 코어를 워커끼리 나눠 K 개가 동시에 돌아도 CPU 를 과하게 나눠 쓰지 않게 합니다.
+const cvThreads = Math.max(1, Math.floor(cores / analysisWorkers));
+// 대기열 길이 상한 (넘으면 429), 메모리/파일에 남겨 둘 끝난 작업 수, 작업 목록 파일
+const maxQueuedJobs = parseInt(process.env.MAX_QUEUED_JOBS || String(8 * analysisWorkers), 10);
+const jobHistory = parseInt(process.env.JOB_HISTORY || '200', 10);
+const jobQueuePath = process.env.JOB_QUEUE_PATH || path.join(openposeDir, 'job_queue.json');
+// priority 를 주지 않은 요청 중 이 크기 이하의 영상은 high 로 넣어 긴 영상 뒤에 오래 묶이지 않게 합니다.
+const shortClipBytes = parseInt(process.env.SHORT_CLIP_MB || '20', 10) * 1024 * 1024;
+// tennis_teacher/jobs.py 의 JOB_ID_PATTERN 과 같아야 합니다.
+const JOB_ID_PATTERN = /^[A-Za-z0-9_-]{1,64}$/;
+// SSE 연결이 중간 프록시에서 끊기지 않도록 보내는 주석 줄의 간격
+const sseHeartbeatMs = parseInt(process.env.SSE_HEARTBEAT_MS || '15000', 10);
+
+// 모델을 한 번만 로드해 두는 상주 분석 워커들
+const analysisWorker = new AnalysisWorkerPool(analysisWorkers, {
+    env: { ...process.env, TENNIS_TEACHER_CV_THREADS: String(cvThreads) }
+});
+analysisWorker.start();
+
+// 작업 큐: POST /analyze 는 작업을 넣고 바로 작업 id 를 돌려줍니다.
+// 결과 파일은 작업마다 /app/openpose/jobs/<jobId>/ 와 /app/public/jobs/<jobId>/result.html 에 따로 쓰입니다.
+const jobQueue = new JobQueue(analysisWorker, {
+    concurrency: analysisWorkers,
+    maxQueued: maxQueuedJobs,
+    history: jobHistory,
+    statePath: jobQueuePath
+});
+jobQueue.load();
+let latestJobId = null; // 예전 /get-analysis-* 엔드포인트용
+
+function jobSummary(job) {
+    return {
+        jobId: job.id,
+        status: job.status,
+        priority: job.priority,
+        position: jobQueue.position(job),
+        progress: job.progress,
+        // 단계, 디코딩/추론한 프레임 수, fps, ETA (tennis_teacher/progress.py)
+        progressDetail: job.progressDetail || null,
+        error: job.error,
+        statusUrl: `/jobs/${job.id}`,
+        eventsUrl: `/jobs/${job.id}/events`,
+        mode: job.mode,
+        resultUrl: job.status === 'done' && job.mode !== 'stream' ? `/jobs/${job.id}/result.html` : null,
+        createdAt: job.createdAt,
+        startedAt: job.startedAt,
+        finishedAt: job.finishedAt
+    };
+}
+
+function findJob(req, res) {
+    const job = jobQueue.get(req.params.jobId);
+    if (!job) {
+        res.status(404).json({ error: '작업을 찾을 수 없습니다.', jobId: req.params.jobId });
+    }
+    return job;
+}
 
 // 업로드 스토리지 설정
 const storage = multer.diskStorage({
@@ -29,7 +95,18 @@ const upload = multer({ storage: storage });
 app.use(cors());
 app.use(express.json());
 app.use(express.static(uploadsDir));
-app.use(express.static('/app/public'));
+// 보고서 이미지/차트/데이터: 내용 해시 이름이라 immutable 캐시 + 미리 압축한 br/gzip
+app.use(reportAssetsUrl, serveReportAssets(reportAssetsDir));
+// result.html 은 분석할 때마다 바뀌므로 매번 ETag 로 재검증합니다.
+app.use(express.static(publicDir, {
+    // /jobs/<jobId> 는 아래의 작업 조회 엔드포인트이므로 디렉토리 리다이렉트를 하지 않습니다.
+    redirect: false,
+    setHeaders: (res, filePath) => {
+        if (filePath.endsWith('.html')) {
+            res.set('Cache-Control', 'no-cache');
+        }
+    }
+}));
 
 // 업로드 처리
 app.post('/upload', upload.single('video'), (req, res) => {
@@ -61,67 +138,267 @@ app.get('/videos', (req, res) => {
     });
 });
 
-// 분석 진행률 가져오기
+// 분석 진행률 가져오기 (가장 최근 작업)
 app.get('/get-analysis-progress', (req, res) => {
-    res.json({ progress: analysisProgress });
+    const job = jobQueue.get(latestJobId);
+    res.json({ progress: job ? job.progress : 0, jobId: latestJobId });
 });
 
-// 비디오 분석
-app.post('/analyze', (req, res) => {
-    console.log('POST /analyze 요청 수신:', req.body.filePath);
+// 작업별 분석 옵션: 본문의 키 → 워커 요청의 키(tennis_teacher/worker.py)와 허용 값.
+// tennis_teacher/config.py 의 FRAME_SOURCES, RESOLUTION_PRESETS 와 같아야 합니다. modes 가 있으면 그 모드에서만 받습니다.
+const JOB_OPTIONS = {
+    frameSource: { key: 'frame_source', values: ['opencv', 'ffmpeg'] },
+    resolution: { key: 'resolution', values: ['fast', 'balanced', 'accurate'] },
+    tracking: { key: 'tracking', values: [true, false] },
+    playerRoi: { key: 'player_roi', values: [true, false] },
+    saveKeypoints: { key: 'save_keypoints', values: [true, false], modes: ['analyze'] }
+};
+
+// 본문에서 JOB_OPTIONS 만 골라 워커 옵션으로 바꿉니다. 잘못된 값이 있으면 { error }.
+function jobOptions(body, mode) {
+    const options = {};
+    for (const [name, spec] of Object.entries(JOB_OPTIONS)) {
+        if (body[name] === undefined) {
+            continue;
+        }
+        if (spec.modes && !spec.modes.includes(mode)) {
+            return { error: `${name} 는 ${spec.modes.join(', ')} 요청에서만 쓸 수 있습니다.` };
+        }
+        if (!spec.values.includes(body[name])) {
+            return { error: `${name} 는 ${spec.values.join(', ')} 중 하나여야 합니다.` };
+        }
+        options[spec.key] = body[name];
+    }
+    return { options };
+}
+
+// /analyze, /analyze/stream 공통: 본문을 검사해 작업을 대기열에 넣습니다. 실패하면 응답을 보내고 null.
+// 본문: { filePath, jobId?, priority?: 'high' | 'normal' | 'low',
+//         frameSource?, resolution?, tracking?, playerRoi?, saveKeypoints? (analyze 만) }
+function submitJob(req, res, mode) {
+    if (!req.body.filePath) {
+        res.status(400).json({ error: 'filePath 가 필요합니다.' });
+        return null;
+    }
+    const jobId = req.body.jobId || crypto.randomUUID();
+    if (!JOB_ID_PATTERN.test(jobId)) {
+        res.status(400).json({ error: '잘못된 작업 id 입니다.', jobId });
+        return null;
+    }
+    if (jobQueue.has(jobId)) {
+        res.status(409).json({ error: '이미 있는 작업 id 입니다.', jobId });
+        return null;
+    }
+    if (req.body.priority !== undefined && PRIORITIES[req.body.priority] === undefined) {
+        res.status(400).json({ error: `priority 는 ${Object.keys(PRIORITIES).join(', ')} 중 하나여야 합니다.` });
+        return null;
+    }
+    const { options, error } = jobOptions(req.body, mode);
+    if (error) {
+        res.status(400).json({ error });
+        return null;
+    }
     const filePath = path.join(uploadsDir, path.basename(req.body.filePath));
-    console.log(`Analyzing file: ${filePath}`);
+    let stat;
+    try {
+        stat = fs.statSync(filePath);
+    } catch (err) {
+        res.status(404).json({ error: '영상을 찾을 수 없습니다.', filePath: req.body.filePath });
+        return null;
+    }
+    const priority = req.body.priority || (stat.size <= shortClipBytes ? 'high' : 'normal');
 
-    analysisResult = {};
-    analysisProgress = 0; // 분석 진행률 초기화
+    let job;
+    try {
+        job = jobQueue.submit({ id: jobId, filePath, priority, mode, options });
+    } catch (err) {
+        if (err instanceof QueueFullError) {
+            res.set('Retry-After', String(err.retryAfter));
+            res.status(429).json({ error: err.message, retryAfter: err.retryAfter });
+            return null;
+        }
+        throw err;
+    }
+    console.log(`Queued file: ${filePath} (job ${jobId}, ${mode}, ${priority}, position ${jobQueue.position(job)})`);
+    return job;
+}
 
-    const analyzeScript = path.join(openposeDir, 'analyze_video.py');
-    const analyzeProcess = exec(`python3 ${analyzeScript} ${filePath}`);
+// 비디오 분석 요청: 대기열에 넣고 바로 202 와 작업 id 를 돌려줍니다.
+// 진행 상황과 결과는 /jobs/<jobId>, /jobs/<jobId>/progress, /jobs/<jobId>/result 로 조회하거나
+// /jobs/<jobId>/events (SSE) 로 받습니다.
+app.post('/analyze', (req, res) => {
+    console.log('POST /analyze 요청 수신:', req.body.filePath);
+    const job = submitJob(req, res, 'analyze');
+    if (!job) {
+        return;
+    }
+    latestJobId = job.id;
+    res.status(202).location(`/jobs/${job.id}`).json({ message: '분석 대기열에 추가되었습니다.', ...jobSummary(job) });
+});
 
-    // 진행률을 주기적으로 업데이트하는 함수
-    const updateProgress = setInterval(() => {
-        analysisProgress += 10;
-        if (analysisProgress >= 100) {
-            clearInterval(updateProgress);
+// 프레임별 스트리밍 분석: 영상 전체를 분석하며 결과를 한 줄에 JSON 하나씩(NDJSON) 바로 보냅니다.
+// 본문은 /analyze 와 같습니다. 줄의 type:
+//   job    작업 상태 (처음, 그리고 대기 순서/상태가 바뀔 때 jobSummary)
+//   meta   fps, 프레임 수, 키포인트 좌표계 크기 등 (한 번)
+//   frame  { frame, timestamp_ms, keypoints: [[x, y, 신뢰도] x 15], angles: [{ From, To, Angle, IsCorrect, ... }], score }
+//   end    { frames } 정상 종료 / error { error } 실패
+// 응답 버퍼가 차면(res.write 가 false) 'drain' 까지 워커의 다음 결과를 받지 않습니다 (jobQueue.hold).
+// 연결이 끊기면 작업을 취소합니다. 실행 중이면 워커가 다음 프레임에서 멈추고 워커는 다음 작업으로 넘어갑니다.
+app.post('/analyze/stream', (req, res) => {
+    console.log('POST /analyze/stream 요청 수신:', req.body.filePath);
+    const job = submitJob(req, res, 'stream');
+    if (!job) {
+        return;
+    }
+    res.status(200).location(`/jobs/${job.id}`).set({
+        'Content-Type': 'application/x-ndjson; charset=utf-8',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    });
+    res.flushHeaders();
+
+    const writeLine = (record) => res.write(`${JSON.stringify(record)}\n`);
+    let lastStatus = null;
+    const onUpdate = (updated) => {
+        if (updated !== job && job.status !== 'queued') {
+            return;
+        }
+        if (job.status === 'error') {
+            writeLine({ type: 'error', error: job.error });
+            close();
+            res.end();
+            return;
+        }
+        if (job.status === 'done') {
+            close();
+            res.end();
+            return;
+        }
+        const status = `${job.status}:${jobQueue.position(job)}`;
+        if (status !== lastStatus) {
+            lastStatus = status;
+            writeLine({ type: 'job', ...jobSummary(job) });
+        }
+    };
+    const onRecord = (recordJob, record) => {
+        if (recordJob === job && !writeLine(record)) {
+            jobQueue.hold(job.id, new Promise((resolve) => {
+                const done = () => {
+                    res.off('drain', done);
+                    res.off('close', done);
+                    resolve();
+                };
+                res.on('drain', done);
+                res.on('close', done);
+            }));
         }
-    }, 1000);
-
-    analyzeProcess.stdout.on('data', (data) => {
-        console.log(`stdout: ${data}`);
-        // 데이터에서 진행률을 추출하여 업데이트 (예: "Progress: 50%")
-        const progressMatch = data.match(/Progress: (\d+)%/);
-        if (progressMatch) {
-            analysisProgress = parseInt(progressMatch[1]);
+    };
+    const close = () => {
+        jobQueue.off('update', onUpdate);
+        jobQueue.off('record', onRecord);
+    };
+    jobQueue.on('update', onUpdate);
+    jobQueue.on('record', onRecord);
+    res.on('close', () => {
+        close();
+        if (jobQueue.cancel(job.id, '클라이언트 연결이 끊겨 취소되었습니다.')) {
+            console.log(`Cancelled stream job ${job.id}`);
         }
     });
+    onUpdate(job);
+});
 
-    analyzeProcess.stderr.on('data', (data) => {
-        console.error(`stderr: ${data}`);
-    });
+// 분석 결과 가져오기 (가장 최근 작업)
+app.get('/get-analysis-result', (req, res) => {
+    const job = jobQueue.get(latestJobId);
+    res.json(job && job.result ? job.result : {});
+});
 
-    analyzeProcess.on('close', (code) => {
-        clearInterval(updateProgress);
-        if (code !== 0) {
-            console.error(`analyze process exited with code ${code}`);
-            return res.status(500).json({ error: '분석 중 오류 발생' });
-        }
+// 대기열 상태
+app.get('/jobs', (req, res) => {
+    res.json(jobQueue.stats());
+});
+
+// 작업별 상태 / 진행률 / 결과. 보고서는 /jobs/<jobId>/result.html (정적 파일)
+app.get('/jobs/:jobId', (req, res) => {
+    const job = findJob(req, res);
+    if (job) {
+        res.json(jobSummary(job));
+    }
+});
 
-        const resultPath = path.join(openposeDir, 'result.json');
-        fs.readFile(resultPath, 'utf8', (err, data) => {
-            if (err) {
-                console.error(`Error reading result file: ${err}`);
-                return res.status(500).json({ error: '결과 파일 읽기 오류', details: err.message });
-            }
-            analysisResult = JSON.parse(data);
-            res.json({ message: '분석 완료', result: analysisResult });
-            analysisProgress = 100; // 분석 완료 시 진행률 100%로 설정
+app.get('/jobs/:jobId/progress', (req, res) => {
+    const job = findJob(req, res);
+    if (job) {
+        res.json({
+            jobId: job.id,
+            status: job.status,
+            position: jobQueue.position(job),
+            progress: job.progress,
+            progressDetail: job.progressDetail || null
         });
+    }
+});
+
+// 작업 상태를 Server-Sent Events 로 보냅니다. 바뀔 때마다 jobSummary 를 data 로 담아
+//   event: progress (대기/실행 중) → event: done 또는 event: failed 를 보내고 연결을 닫습니다.
+// 실행 중인 작업의 진행 상황은 워커가 보내는 대로(PROGRESS_INTERVAL 마다) 전달되므로 조회할 필요가 없습니다.
+app.get('/jobs/:jobId/events', (req, res) => {
+    const job = findJob(req, res);
+    if (!job) {
+        return;
+    }
+    res.set({
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'Connection': 'keep-alive',
+        'X-Accel-Buffering': 'no'
     });
+    res.flushHeaders();
+    res.write('retry: 2000\n\n');
+
+    let last = null;
+    const send = () => {
+        const summary = jobSummary(job);
+        const event = job.status === 'done' ? 'done' : job.status === 'error' ? 'failed' : 'progress';
+        const data = JSON.stringify(summary);
+        if (data !== last) {
+            last = data;
+            res.write(`event: ${event}\ndata: ${data}\n\n`);
+        }
+        if (event !== 'progress') {
+            close();
+            res.end();
+        }
+    };
+    // 대기 중인 작업은 다른 작업이 시작/종료될 때 순서가 바뀌므로 모든 작업의 변경에 반응합니다.
+    const onUpdate = (updated) => {
+        if (updated === job || job.status === 'queued') {
+            send();
+        }
+    };
+    const heartbeat = setInterval(() => res.write(': ping\n\n'), sseHeartbeatMs);
+    const close = () => {
+        clearInterval(heartbeat);
+        jobQueue.off('update', onUpdate);
+    };
+    jobQueue.on('update', onUpdate);
+    res.on('close', close);
+    send();
 });
 
-// 분석 결과 가져오기
-app.get('/get-analysis-result', (req, res) => {
-    res.json(analysisResult);
+app.get('/jobs/:jobId/result', (req, res) => {
+    const job = findJob(req, res);
+    if (!job) {
+        return;
+    }
+    if (job.status === 'queued' || job.status === 'running') {
+        return res.status(202).json(jobSummary(job));
+    }
+    if (job.status === 'error') {
+        return res.status(500).json({ error: '분석 중 오류 발생', details: job.error, jobId: job.id });
+    }
+    res.json(job.result);
 });
 
 // 서버 시작
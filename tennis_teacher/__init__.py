@@ -0,0 +1,18 @@
+# 테니스 자세 분석 패키지
+#
+# import 만으로는 디렉토리 생성, 모델 결합/로드, sys.argv 읽기 같은 부수 효과가 없습니다.
+# 모델 핸들은 tennis_teacher.models 에서 처음 사용할 때 로드되고,
+# cv2/pandas 같은 무거운 의존성도 그것이 필요한 단계에서만 import 됩니다.
+
+from .body import BODY_PARTS, POSE_PAIRS
+
+_PIPELINE_EXPORTS = ("analyze_frame", "process_video", "run_analysis")
+
+__all__ = ["BODY_PARTS", "POSE_PAIRS", *_PIPELINE_EXPORTS]
+
+
+def __getattr__(name):
+    if name in _PIPELINE_EXPORTS:
+        from . import pipeline
+        return getattr(pipeline, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,32 @@
+# MPII에서 각 파트 번호, 선으로 연결될 POSE_PAIRS
+BODY_PARTS = {"Head": 0, "Neck": 1, "RShoulder": 2, "RElbow": 3, "RWrist": 4,
+              "LShoulder": 5, "LElbow": 6, "LWrist": 7, "RHip": 8, "RKnee": 9,
+              "RAnkle": 10, "LHip": 11, "LKnee": 12, "LAnkle": 13, "Chest": 14,
+              "Background": 15}
+
+POSE_PAIRS = [["Head", "Neck"], ["Neck", "RShoulder"], ["RShoulder", "RElbow"],
+              ["RElbow", "RWrist"], ["Neck", "LShoulder"], ["LShoulder", "LElbow"],
+              ["LElbow", "LWrist"], ["Neck", "Chest"], ["Chest", "RHip"], ["RHip", "RKnee"],
+              ["RKnee", "RAnkle"], ["Chest", "LHip"], ["LHip", "LKnee"], ["LKnee", "LAnkle"]]
+
+# 배경 채널을 제외한 키포인트 개수
+NUM_KEYPOINTS = len(BODY_PARTS) - 1
+
+part_names_korean = {
+    "Head": "머리",
+    "Neck": "목",
+    "RShoulder": "오른쪽 어깨",
+    "RElbow": "오른쪽 팔꿈치",
+    "RWrist": "오른쪽 손목",
+    "LShoulder": "왼쪽 어깨",
+    "LElbow": "왼쪽 팔꿈치",
+    "LWrist": "왼쪽 손목",
+    "RHip": "오른쪽 엉덩이",
+    "RKnee": "오른쪽 무릎",
+    "RAnkle": "오른쪽 발목",
+    "LHip": "왼쪽 엉덩이",
+    "LKnee": "왼쪽 무릎",
+    "LAnkle": "왼쪽 발목",
+    "Chest": "가슴",
+    "Background": "배경"
+}
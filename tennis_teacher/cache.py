@@ -0,0 +1,370 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import tempfile
+
+from . import config
+from .jobs import JobPaths
+from .model_assets import FileLock, atomic_write_json, file_sha256, list_segments, load_manifest
+from .profiling import lazy_import
+
+# 분석 결과 캐시
+#
+# 같은 영상을 다시 분석하면 파이프라인 전체(임팩트 탐색, DNN, 분류, 보고서)를 건너뛰고 저장해 둔 결과를 내놓습니다.
+# - 키: 영상 바이트의 sha256 + 모델 버전(prototxt, caffemodel, pkl 들, 규칙 표의 sha256) + 결과에 영향을 주는 옵션/설정.
+#   경로나 파일 이름은 키에 들어가지 않으므로 같은 영상을 다른 이름으로 올려도 재사용됩니다.
+# - 항목: CACHE_DIR/<키>/ 에 result.json(분류 결과), result.html(보고서), impact_keypoints.npy(분석한 프레임의
+#   키포인트), save_keypoints 였다면 영상 전체의 키포인트 시계열, 보고서가 참조하는 이미지/차트/데이터 파일(assets/),
+#   그리고 entry.json(메타데이터). 적중하면 보고서 파일들이 REPORT_ASSETS_DIR 에서 지워졌더라도 다시 내보냅니다.
+# - 파일 해시는 (경로, 크기, mtime) 별로 기억하므로 바뀐 파일만 다시 읽습니다. 모델 파일의 해시는 CACHE_DIR/.model_hashes.json
+#   에도 남겨 새 프로세스에서도 다시 읽지 않습니다.
+# - entry.json 의 mtime 을 마지막 사용 시각으로 삼아, 전체 크기가 CACHE_MAX_BYTES 를 넘으면 오래된 항목부터 지웁니다.
+# - 모델 파일(tennis_pose_model.pkl 등)이 바뀌면 모델 버전이 달라져 기존 항목은 더 이상 적중하지 않습니다.
+#   check_model_version 이 이를 감지해 예전 버전의 항목을 지우고, 메모리의 모델 핸들도 다시 로드하게 합니다.
+#
+# `python -m tennis_teacher.cache {stats,prune,clear}` 로 캐시를 확인하거나 정리합니다.
+
+FORMAT_VERSION = 1
+ENTRY_NAME = "entry.json"
+RESULT_NAME = "result.json"
+REPORT_NAME = "result.html"
+IMPACT_KEYPOINTS_NAME = "impact_keypoints.npy"
+SERIES_NAME = "keypoints.npy"
+SERIES_META_NAME = "keypoints.json"
+ASSETS_NAME = "assets"
+
+HASH_MEMO_NAME = ".model_hashes.json"
+
+_file_hashes = {}
+_model_version = None
+
+
+def _read_hash_memo(memo_path):
+    try:
+        with open(memo_path, "r", encoding="utf-8") as f:
+            return {path: (tuple(signature), digest) for path, (signature, digest) in json.load(f).items()}
+    except (OSError, ValueError, TypeError):
+        return {}
+
+
+def _persist_hash(path, signature, digest):
+    # 모델 파일의 해시를 CACHE_DIR/.model_hashes.json 에 남겨, CLI 를 새로 띄울 때마다 ~200MB 모델을 다시 해시하지 않게 합니다.
+    # 여러 워커가 함께 쓰므로 lock 을 잡고 읽은 뒤 합쳐서 씁니다. 없어진 파일의 항목은 이때 버립니다.
+    memo_path = os.path.join(config.CACHE_DIR, HASH_MEMO_NAME)
+    try:
+        os.makedirs(config.CACHE_DIR, exist_ok=True)
+        with FileLock(memo_path + ".lock"):
+            hashes = {p: entry for p, entry in _read_hash_memo(memo_path).items() if os.path.exists(p)}
+            hashes[path] = (signature, digest)
+            atomic_write_json(memo_path, {p: [list(sig), value] for p, (sig, value) in hashes.items()})
+    except OSError:
+        pass  # 기록하지 못하면 다음 프로세스에서 다시 해시할 뿐입니다.
+
+
+def cached_file_sha256(path, persist=False):
+    # 해시를 (크기, mtime) 별로 프로세스 안에서 기억합니다. persist 는 모델 파일용으로, 디스크에도 남기고 읽어 옵니다.
+    # 영상처럼 계속 새로 들어오는 파일은 디스크에 남기지 않습니다.
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    cached = _file_hashes.get(path)
+    if cached is None and persist:
+        cached = _read_hash_memo(os.path.join(config.CACHE_DIR, HASH_MEMO_NAME)).get(path)
+    if cached is not None and cached[0] == signature:
+        _file_hashes[path] = cached
+        return cached[1]
+    digest = file_sha256(path)
+    _file_hashes[path] = (signature, digest)
+    if persist:
+        _persist_hash(path, signature, digest)
+    return digest
+
+
+def _caffemodel_sha256():
+    # 결합 전후로 값이 바뀌지 않도록 항상 같은 원본에서 구합니다: manifest 가 있으면 거기 기록된 결합 결과의 sha256,
+    # 없으면 segment 들의 (이름, sha256) 목록의 해시. segment 없이 결합된 모델만 배포된 경우에만 그 파일을 해시합니다.
+    manifest = load_manifest(config.POSE_LIB_DIR)
+    if manifest is not None:
+        return manifest["sha256"]
+    segments = list_segments(config.POSE_LIB_DIR)
+    if segments:
+        listing = [[os.path.basename(p), cached_file_sha256(p, persist=True)] for p in segments]
+        return hashlib.sha256(json.dumps(listing).encode("utf-8")).hexdigest()
+    path = os.path.join(config.POSE_LIB_DIR, config.CAFFEMODEL_NAME)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"neither {config.CAFFEMODEL_NAME} nor segments found in {config.POSE_LIB_DIR}")
+    return cached_file_sha256(path, persist=True)
+
+
+def model_version():
+    hashes = {
+        "prototxt": cached_file_sha256(config.PROTOTXT_PATH, persist=True),
+        "caffemodel": _caffemodel_sha256(),
+        "model": cached_file_sha256(config.MODEL_PATH, persist=True),
+        "label_encoder_from": cached_file_sha256(config.LABEL_ENCODER_FROM_PATH, persist=True),
+        "label_encoder_to": cached_file_sha256(config.LABEL_ENCODER_TO_PATH, persist=True),
+        # 보고서의 피드백 문구와 점수도 캐시하므로 규칙 표도 모델의 일부로 봅니다.
+        "rules": cached_file_sha256(config.RULES_PATH, persist=True),
+    }
+    return hashlib.sha256(json.dumps(hashes, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def check_model_version(cache_dir=config.CACHE_DIR):
+    # 현재 모델 버전을 반환합니다. 이 프로세스가 마지막으로 본 버전과 다르면 다른 버전의 항목을 지우고,
+    # 이미 로드한 모델이 있었다면 다음 분석에서 새 파일을 읽도록 핸들을 버립니다.
+    global _model_version
+    version = model_version()
+    if version != _model_version:
+        if _model_version is not None:
+            from . import models
+            print("Model files changed; reloading models and dropping stale cache entries")
+            models.reset()
+        removed = invalidate(version, cache_dir)
+        if removed:
+            print(f"Removed {removed} cache entries built with other model files")
+        _model_version = version
+    return version
+
+
+def analysis_options(impact_mode, scan_options):
+    # 결과에 영향을 주는 옵션과 설정만 담습니다. pose_workers 처럼 속도에만 관계된 값은 빼서 적중률을 높입니다.
+    from .pose import preset_sizes
+
+    max_side, scan_size, scan_coarse_size = preset_sizes(scan_options.get("resolution", config.RESOLUTION))
+    options = {
+        "impact_mode": impact_mode,
+        "max_input_side": max_side,
+        "keypoint_threshold": config.KEYPOINT_THRESHOLD,
+        "keypoint_subpixel": config.KEYPOINT_SUBPIXEL,
+    }
+    if impact_mode == "perpendicular":
+        options.update({
+            "scan_stride": scan_options.get("scan_stride", config.SCAN_STRIDE),
+            "scan_coarse_size": list(scan_options.get("scan_coarse_size", scan_coarse_size)),
+            "scan_input_size": list(scan_options.get("scan_size", scan_size)),
+            "scan_coarse_angle_margin": config.SCAN_COARSE_ANGLE_MARGIN,
+            "frame_source": scan_options.get("frame_source", config.FRAME_SOURCE),
+            # 시계열을 저장하면 임팩트 프레임을 모든 프레임에서 고르므로 결과가 달라질 수 있습니다.
+            "save_keypoints": bool(scan_options.get("save_keypoints", config.SAVE_KEYPOINTS)),
+            "tracking": bool(scan_options.get("tracking", config.TRACKING)),
+            "player_roi": bool(scan_options.get("player_roi", config.PLAYER_ROI)),
+        })
+        if options["player_roi"]:
+            options.update({
+                "roi_input_scale": config.ROI_INPUT_SCALE,
+                "roi_padding": config.ROI_PADDING,
+                "roi_min_keypoints": config.ROI_MIN_KEYPOINTS,
+                "roi_max_area": config.ROI_MAX_AREA,
+            })
+        if options["tracking"]:
+            options.update({
+                "track_max_interval": config.TRACK_MAX_INTERVAL,
+                "track_fb_max_error": config.TRACK_FB_MAX_ERROR,
+                "track_max_motion": config.TRACK_MAX_MOTION,
+                "track_drift_tolerance": config.TRACK_DRIFT_TOLERANCE,
+            })
+    return options
+
+
+def analysis_key(video_path, impact_mode, scan_options, cache_dir=config.CACHE_DIR):
+    # 영상이나 모델 파일을 읽을 수 없으면 None (캐시 없이 분석하고, 오류는 파이프라인이 알립니다).
+    try:
+        payload = {
+            "format_version": FORMAT_VERSION,
+            "video_sha256": cached_file_sha256(video_path),
+            "model_version": check_model_version(cache_dir),
+            "options": analysis_options(impact_mode, scan_options),
+        }
+    except (OSError, ValueError, KeyError):
+        return None
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def entry_dir(key, cache_dir=config.CACHE_DIR):
+    return os.path.join(cache_dir, key)
+
+
+def restore(key, video_path, want_series=False, paths=None, cache_dir=config.CACHE_DIR):
+    # 적중하면 저장해 둔 파일들을 result.json / result.html (와 키포인트 시계열) 자리에 놓고 레코드를 반환합니다.
+    # paths: jobs.JobPaths (없으면 작업 id 없는 고정 경로)
+    paths = paths or JobPaths()
+    directory = entry_dir(key, cache_dir)
+    entry_path = os.path.join(directory, ENTRY_NAME)
+    try:
+        with open(entry_path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        if want_series and not entry.get("has_series"):
+            return None
+        with open(os.path.join(directory, RESULT_NAME), "r", encoding="utf-8") as f:
+            records = json.load(f)
+        shutil.copyfile(os.path.join(directory, RESULT_NAME), paths.result_json)
+        if entry.get("report_id"):
+            from .report import restore_report_assets
+            restore_report_assets(os.path.join(directory, ASSETS_NAME), entry["report_id"])
+            paths.record_report(entry["report_id"])
+        shutil.copyfile(os.path.join(directory, REPORT_NAME), paths.result_html)
+        if want_series:
+            _restore_series(directory, video_path, paths)
+        # 마지막 사용 시각 (LRU)
+        os.utime(entry_path)
+    except (OSError, ValueError):
+        return None
+    return records
+
+
+def _restore_series(directory, video_path, paths):
+    from .timeseries import save_keypoint_series, series_settings, shared_series_location, video_fingerprint
+
+    np = lazy_import("numpy")
+    with open(os.path.join(directory, SERIES_META_NAME), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    # 같은 내용의 다른 파일일 수 있으므로 지금 분석한 영상의 것으로 바꿔 timeseries.is_current 를 통과하게 합니다.
+    meta["video"] = video_fingerprint(video_path)
+    if paths.job_id is not None:
+        # 작업은 공유 위치의 시계열을 씁니다 (tennis_teacher.jobs). 위치는 저장해 둔 메타데이터의 설정으로 정합니다.
+        settings = series_settings(meta["input_size"], meta["frame_source"], meta.get("tracking", False),
+                                   meta.get("player_roi", False), meta.get("max_side"))
+        location = shared_series_location(video_path, settings)
+        meta["video_sha256"] = location["video_sha256"]
+        paths.link_series(location["path"], location["meta_path"])
+    save_keypoint_series(np.load(os.path.join(directory, SERIES_NAME)), meta, paths.keypoints, paths.keypoints_meta)
+
+
+def store(key, keypoints=None, series=False, report_id=None, paths=None, cache_dir=config.CACHE_DIR,
+          max_bytes=config.CACHE_MAX_BYTES):
+    # 방금 만든 result.json / result.html (과 키포인트, 보고서 파일들) 을 항목으로 저장하고 크기 상한에 맞춰 정리합니다.
+    np = lazy_import("numpy")
+    paths = paths or JobPaths()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=cache_dir, prefix=".tmp-")
+    except OSError as e:
+        print(f"Could not cache analysis in {cache_dir}: {e}")
+        return
+    try:
+        shutil.copyfile(paths.result_json, os.path.join(staging, RESULT_NAME))
+        shutil.copyfile(paths.result_html, os.path.join(staging, REPORT_NAME))
+        if keypoints is not None:
+            np.save(os.path.join(staging, IMPACT_KEYPOINTS_NAME), keypoints)
+        if report_id is not None:
+            from .report import copy_report_assets
+            copy_report_assets(report_id, os.path.join(staging, ASSETS_NAME))
+        if series:
+            shutil.copyfile(paths.keypoints, os.path.join(staging, SERIES_NAME))
+            shutil.copyfile(paths.keypoints_meta, os.path.join(staging, SERIES_META_NAME))
+        with open(os.path.join(staging, ENTRY_NAME), "w", encoding="utf-8") as f:
+            json.dump({"format_version": FORMAT_VERSION, "key": key, "model_version": _model_version,
+                       "has_series": bool(series), "report_id": report_id}, f, indent=2)
+
+        target = entry_dir(key, cache_dir)
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        os.replace(staging, target)
+    except OSError as e:
+        print(f"Could not cache analysis in {cache_dir}: {e}")
+    finally:
+        if os.path.exists(staging):
+            shutil.rmtree(staging, ignore_errors=True)
+    evict(max_bytes, cache_dir)
+
+
+def list_entries(cache_dir=config.CACHE_DIR):
+    # 모든 항목의 {key, path, size, last_used, model_version}. 읽을 수 없는 항목은 model_version 이 None.
+    # 저장 중인 임시 디렉토리(.tmp-*)는 건드리지 않습니다.
+    try:
+        names = os.listdir(cache_dir)
+    except FileNotFoundError:
+        return []
+    entries = []
+    for name in names:
+        path = os.path.join(cache_dir, name)
+        if name.startswith(".") or not os.path.isdir(path):
+            continue
+        entry_path = os.path.join(path, ENTRY_NAME)
+        try:
+            size = _directory_size(path)
+        except OSError:
+            continue
+        try:
+            last_used = os.stat(entry_path).st_mtime
+            with open(entry_path, "r", encoding="utf-8") as f:
+                version = json.load(f).get("model_version")
+        except (OSError, ValueError):
+            last_used, version = 0.0, None
+        entries.append({"key": name, "path": path, "size": size, "last_used": last_used, "model_version": version})
+    return entries
+
+
+def _directory_size(path):
+    size = 0
+    for item in os.scandir(path):
+        size += _directory_size(item.path) if item.is_dir() else item.stat().st_size
+    return size
+
+
+def _remove(entry):
+    shutil.rmtree(entry["path"], ignore_errors=True)
+
+
+def evict(max_bytes=config.CACHE_MAX_BYTES, cache_dir=config.CACHE_DIR):
+    # 전체 크기가 max_bytes 이하가 될 때까지 가장 오래 쓰지 않은 항목부터 지웁니다. 지운 개수를 반환.
+    entries = sorted(list_entries(cache_dir), key=lambda entry: entry["last_used"])
+    total = sum(entry["size"] for entry in entries)
+    removed = 0
+    for entry in entries:
+        if total <= max_bytes:
+            break
+        _remove(entry)
+        total -= entry["size"]
+        removed += 1
+    return removed
+
+
+def invalidate(version, cache_dir=config.CACHE_DIR):
+    # 모델 버전이 version 과 다른(또는 읽을 수 없는) 항목을 지웁니다. 지운 개수를 반환.
+    removed = 0
+    for entry in list_entries(cache_dir):
+        if entry["model_version"] != version:
+            _remove(entry)
+            removed += 1
+    return removed
+
+
+def clear(cache_dir=config.CACHE_DIR):
+    entries = list_entries(cache_dir)
+    for entry in entries:
+        _remove(entry)
+    return len(entries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or clean the analysis result cache.")
+    parser.add_argument("command", choices=("stats", "prune", "clear"), nargs="?", default="stats",
+                        help="prune drops entries from other model files and evicts down to the size limit")
+    parser.add_argument("--cache-dir", default=config.CACHE_DIR)
+    parser.add_argument("--max-mb", type=int, default=config.CACHE_MAX_BYTES // (1024 * 1024))
+    args = parser.parse_args(argv)
+
+    if args.command == "clear":
+        print(f"Removed {clear(args.cache_dir)} entries")
+        return 0
+
+    version = model_version()
+    if args.command == "prune":
+        stale = invalidate(version, args.cache_dir)
+        evicted = evict(args.max_mb * 1024 * 1024, args.cache_dir)
+        print(f"Removed {stale} stale and {evicted} least recently used entries")
+
+    entries = list_entries(args.cache_dir)
+    current = sum(1 for entry in entries if entry["model_version"] == version)
+    total = sum(entry["size"] for entry in entries)
+    print(f"{args.cache_dir}: {len(entries)} entries ({current} for the current model), "
+          f"{total / (1024 * 1024):.1f} / {args.max_mb} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
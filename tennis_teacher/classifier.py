@@ -0,0 +1,17 @@
+from .models import get_predictor
+
+# 분류 단계: 각 각도가 올바른 자세인지 판정합니다.
+# tennis_pose_model.pkl 을 컴파일한 NumPy 예측기를 사용하므로 프레임마다 sklearn 을 호출하지 않습니다.
+
+
+def classify(features):
+    # features: features.PoseAngles. 분류 결과와 라벨 인코딩을 채워서 돌려줍니다.
+    predictor = get_predictor()
+    features.pair_codes = predictor.pair_codes
+    features.is_correct = predictor.predict_angles(features.angles, features.valid)[0]
+    return features
+
+
+def classify_angles(angles, valid=None):
+    # (n_frames, n_pairs) 각도 배열을 한 번에 분류합니다. 무효한 칸은 -1.
+    return get_predictor().predict_angles(angles, valid)
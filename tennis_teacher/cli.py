@@ -0,0 +1,94 @@
+import sys
+import json
+import argparse
+from contextlib import nullcontext
+
+from . import config, profiling
+
+# analyze_video.py 및 `python -m tennis_teacher` 의 명령행 진입점
+
+
+def main(argv=None, default_impact_mode="middle"):
+    parser = argparse.ArgumentParser(description="Analyze a tennis swing video.")
+    parser.add_argument("video_path")
+    parser.add_argument("--impact", choices=config.IMPACT_MODES, default=default_impact_mode,
+                        help="how to pick the frame that is analyzed")
+    parser.add_argument("--scan-stride", type=int, default=config.SCAN_STRIDE,
+                        help="perpendicular mode: run the coarse pose pass on every N-th frame (1 = scan every frame)")
+    parser.add_argument("--resolution", choices=list(config.RESOLUTION_PRESETS), default=config.RESOLUTION,
+                        help="pose net input resolution preset (analyzed frame, scan and coarse pass sizes)")
+    parser.add_argument("--scan-coarse-size", type=int,
+                        help="perpendicular mode: input side length of the coarse pose pass (default: from --resolution)")
+    parser.add_argument("--pose-workers", type=int, default=config.POSE_WORKERS,
+                        help="perpendicular mode: number of pose worker processes (1 = run in this process)")
+    parser.add_argument("--frame-source", choices=config.FRAME_SOURCES, default=config.FRAME_SOURCE,
+                        help="perpendicular mode: decode with cv2.VideoCapture or an ffmpeg pipe that scales at decode time")
+    parser.add_argument("--track", action="store_true", default=config.TRACKING,
+                        help="perpendicular mode: run the pose net on adaptive keyframes and track keypoints "
+                             "with optical flow in between")
+    parser.add_argument("--player-roi", action="store_true", default=config.PLAYER_ROI,
+                        help="perpendicular mode: after the first batch, run the pose net on a padded crop "
+                             "around the player at a smaller input size")
+    parser.add_argument("--save-keypoints", action="store_true", default=config.SAVE_KEYPOINTS,
+                        help="store the whole-video keypoint series next to result.json (reused on re-analysis)")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false", default=config.CACHE_ENABLED,
+                        help="always run the full analysis instead of reusing a cached result for the same video")
+    parser.add_argument("--stream", action="store_true",
+                        help="analyze every frame and write one JSON record per line (NDJSON) to stdout as frames "
+                             "are processed, instead of writing the impact frame report")
+    parser.add_argument("--progress", action="store_true",
+                        help="print progress records (stage, frames, fps, ETA) on stderr while analyzing")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="report time spent in each import and init step on stderr")
+    args = parser.parse_args(argv)
+
+    if args.profile_startup:
+        profiling.enable()
+    try:
+        from .pipeline import run_analysis
+        from . import progress
+        scan_options = {}
+        if args.scan_coarse_size is not None:
+            scan_options["scan_coarse_size"] = (args.scan_coarse_size, args.scan_coarse_size)
+        reporting = nullcontext()
+        if args.progress:
+            reporting = progress.reporting(lambda record: print(progress.format_record(record), file=sys.stderr))
+        with reporting:
+            if args.stream:
+                return stream_frames(args)
+            try:
+                run_analysis(args.video_path, args.impact, resolution=args.resolution, scan_stride=args.scan_stride,
+                             pose_workers=args.pose_workers, frame_source=args.frame_source,
+                             save_keypoints=args.save_keypoints, tracking=args.track,
+                             player_roi=args.player_roi, use_cache=args.use_cache, **scan_options)
+            except ValueError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                return 1
+    finally:
+        if profiling.is_enabled():
+            profiling.report()
+    return 0
+
+
+def stream_frames(args):
+    from .pipeline import iter_frame_results
+
+    # stdout 은 NDJSON 전용으로 쓰고, 분석 코드의 print 출력은 stderr 로 보냅니다.
+    out = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        for record in iter_frame_results(args.video_path, args.resolution, pose_workers=args.pose_workers,
+                                         frame_source=args.frame_source, tracking=args.track,
+                                         player_roi=args.player_roi):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        sys.stdout = out
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
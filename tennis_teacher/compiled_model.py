@@ -0,0 +1,268 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+import tempfile
+
+from . import config
+from .body import POSE_PAIRS
+from .profiling import lazy_import, timed
+
+# tennis_pose_model.pkl 을 NumPy 배열로 "컴파일"한 예측기
+#
+# - 학습된 sklearn 추정기(RandomForest/DecisionTree, 또는 선형 모델)를 평평한 노드 테이블/가중치 배열로 바꿉니다.
+# - 라벨 인코더는 POSE_PAIRS 위치로 인덱싱하는 정수 테이블(pair_codes)이 됩니다.
+# - 예측은 (n_frames, n_pairs) 각도 배열에 대한 벡터화 함수입니다. DataFrame 도, sklearn 호출도 없습니다.
+# - 컴파일 결과는 pkl 의 sha256 과 함께 .npz 로 저장해 두어, 다음 실행부터는 sklearn 을 import 하지 않습니다.
+#
+# `python -m tennis_teacher.compiled_model --verify` 는 기록된 입력(result.json)과 전 범위 각도 격자에서
+# model.predict 와 결과가 같은지 확인하고, 다르면 0 이 아닌 코드로 종료합니다.
+
+COMPILED_SUFFIX = ".compiled.npz"
+FORMAT_VERSION = 1
+
+
+def file_sha256(path):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _compile_trees(estimators, n_classes):
+    np = lazy_import("numpy")
+
+    features, thresholds, lefts, rights, leaf_proba, roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in estimators:
+        tree = estimator.tree_
+        value = tree.value[:, 0, :n_classes].astype(np.float64)
+        normalizer = value.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+
+        is_leaf = tree.children_left == -1
+        # 잎 노드는 자기 자신을 가리키게 해서, 깊이가 다른 트리도 같은 반복 횟수로 순회할 수 있게 합니다.
+        node_ids = np.arange(tree.node_count)
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+        rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(tree.threshold)
+        leaf_proba.append(value / normalizer)
+        roots.append(offset)
+        offset += tree.node_count
+
+    max_depth = max(estimator.tree_.max_depth for estimator in estimators)
+    return {
+        "kind": np.array("forest"),
+        "feature": np.concatenate(features).astype(np.intp),
+        "threshold": np.concatenate(thresholds).astype(np.float64),
+        "left": np.concatenate(lefts).astype(np.intp),
+        "right": np.concatenate(rights).astype(np.intp),
+        "leaf_proba": np.concatenate(leaf_proba),
+        "roots": np.array(roots, dtype=np.intp),
+        "max_depth": np.array(max_depth),
+    }
+
+
+def compile_estimator(model, label_encoder_from, label_encoder_to):
+    np = lazy_import("numpy")
+
+    classes = np.asarray(model.classes_)
+    if hasattr(model, "estimators_") and hasattr(model.estimators_[0], "tree_"):
+        arrays = _compile_trees(model.estimators_, len(classes))
+    elif hasattr(model, "tree_"):
+        arrays = _compile_trees([model], len(classes))
+    elif hasattr(model, "coef_") and hasattr(model, "intercept_"):
+        arrays = {
+            "kind": np.array("linear"),
+            "coef": np.asarray(model.coef_, dtype=np.float64),
+            "intercept": np.asarray(model.intercept_, dtype=np.float64),
+        }
+    else:
+        raise TypeError(f"cannot compile estimator of type {type(model).__name__}")
+
+    pair_codes = np.column_stack([
+        label_encoder_from.transform([pair[0] for pair in POSE_PAIRS]),
+        label_encoder_to.transform([pair[1] for pair in POSE_PAIRS]),
+    ]).astype(np.int64)
+
+    arrays["classes"] = classes
+    arrays["pair_codes"] = pair_codes
+    arrays["format_version"] = np.array(FORMAT_VERSION)
+    return CompiledPredictor(arrays)
+
+
+class CompiledPredictor:
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.kind = str(arrays["kind"])
+        self.classes = arrays["classes"]
+        self.pair_codes = arrays["pair_codes"]
+
+    def predict_features(self, X):
+        # X: (n, 3) = [From_encoded, To_encoded, Angle] → 클래스 라벨 (n,)
+        np = lazy_import("numpy")
+
+        X = np.asarray(X, dtype=np.float64)
+        if len(X) == 0:
+            return self.classes[:0]
+        if self.kind == "linear":
+            scores = X @ self.arrays["coef"].T + self.arrays["intercept"]
+            if scores.shape[1] == 1:
+                return self.classes[(scores[:, 0] > 0).astype(np.intp)]
+            return self.classes[np.argmax(scores, axis=1)]
+
+        a = self.arrays
+        # sklearn 트리는 입력을 float32 로 바꾼 뒤 float64 임계값과 비교합니다.
+        Xf = X.astype(np.float32).astype(np.float64)
+        rows = np.arange(len(Xf))[:, None]
+        nodes = np.broadcast_to(a["roots"], (len(Xf), len(a["roots"]))).copy()
+        for _ in range(int(a["max_depth"])):
+            go_left = Xf[rows, a["feature"][nodes]] <= a["threshold"][nodes]
+            nodes = np.where(go_left, a["left"][nodes], a["right"][nodes])
+
+        # 트리 순서대로 누적한 뒤 평균 (RandomForestClassifier.predict_proba 와 같은 방식)
+        proba = np.zeros((len(Xf), a["leaf_proba"].shape[1]))
+        for t in range(nodes.shape[1]):
+            proba += a["leaf_proba"][nodes[:, t]]
+        proba /= nodes.shape[1]
+        return self.classes[np.argmax(proba, axis=1)]
+
+    def predict_angles(self, angles, valid=None):
+        # angles: (n_frames, n_pairs) 각도 배열 (POSE_PAIRS 순서). valid 가 False 인 칸은 -1 로 채웁니다.
+        np = lazy_import("numpy")
+
+        angles = np.asarray(angles, dtype=np.float64)
+        if angles.ndim == 1:
+            angles = angles[None, :]
+        n_frames, n_pairs = angles.shape
+        if valid is None:
+            valid = ~np.isnan(angles)
+        codes = np.broadcast_to(self.pair_codes[:n_pairs], (n_frames, n_pairs, 2))
+        X = np.concatenate([codes, angles[..., None]], axis=2).reshape(-1, 3)
+        mask = np.asarray(valid).reshape(-1)
+
+        out = np.full(n_frames * n_pairs, -1, dtype=self.classes.dtype)
+        out[mask] = self.predict_features(X[mask])
+        return out.reshape(n_frames, n_pairs)
+
+    def save(self, path, source_sha256):
+        np = lazy_import("numpy")
+
+        directory = os.path.dirname(path) or "."
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, source_sha256=np.array(source_sha256), **self.arrays)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    @classmethod
+    def load(cls, path, source_sha256=None):
+        np = lazy_import("numpy")
+
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format_version"]) != FORMAT_VERSION:
+                return None
+            if source_sha256 is not None and str(data["source_sha256"]) != source_sha256:
+                return None
+            return cls({key: data[key] for key in data.files if key != "source_sha256"})
+
+
+def load_predictor(model_path=config.MODEL_PATH,
+                   label_encoder_from_path=config.LABEL_ENCODER_FROM_PATH,
+                   label_encoder_to_path=config.LABEL_ENCODER_TO_PATH):
+    # 컴파일된 .npz 가 pkl 들과 일치하면 그대로 쓰고, 아니면 sklearn 모델을 로드해 컴파일합니다.
+    source_sha256 = hashlib.sha256("".join(
+        file_sha256(p) for p in (model_path, label_encoder_from_path, label_encoder_to_path)
+    ).encode("utf-8")).hexdigest()
+    compiled_path = model_path + COMPILED_SUFFIX
+
+    if os.path.exists(compiled_path):
+        try:
+            with timed("init: load compiled predictor"):
+                predictor = CompiledPredictor.load(compiled_path, source_sha256)
+            if predictor is not None:
+                return predictor
+        except (OSError, ValueError, KeyError):
+            pass
+
+    from .models import get_classifier, get_label_encoders
+    label_encoder_from, label_encoder_to = get_label_encoders()
+    with timed("init: compile tennis_pose_model.pkl"):
+        predictor = compile_estimator(get_classifier(), label_encoder_from, label_encoder_to)
+    try:
+        predictor.save(compiled_path, source_sha256)
+    except OSError as e:
+        print(f"Could not cache compiled model at {compiled_path}: {e}")
+    return predictor
+
+
+# 실제 분석에서 기록해 둔 분류기 입력 (result.json 과 같은 형식, tests/test_compiled_model.py 도 씁니다)
+RECORDED_INPUTS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                    "tests", "fixtures", "recorded_inputs.json")
+
+
+def recorded_inputs(*result_json_paths):
+    # result.json 형식의 파일들에 기록된 (From_encoded, To_encoded, Angle) 행들. 없는 파일은 건너뜁니다.
+    np = lazy_import("numpy")
+
+    rows = []
+    for path in result_json_paths or (RECORDED_INPUTS_PATH, config.RESULT_JSON_PATH):
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            rows.extend(json.load(f))
+    if not rows:
+        return np.empty((0, 3))
+    return np.array([[row["From_encoded"], row["To_encoded"], row["Angle"]] for row in rows], dtype=np.float64)
+
+
+def verify(model, predictor, recorded):
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+    # 모든 POSE_PAIRS 에 대해 -180° ~ 180° 를 0.1° 간격으로 훑는 격자 + 기록된 입력
+    grid = np.linspace(-180.0, 180.0, 3601)
+    codes = np.repeat(predictor.pair_codes, len(grid), axis=0)
+    sweep = np.column_stack([codes, np.tile(grid, len(predictor.pair_codes))])
+    X = np.concatenate([recorded, sweep]) if len(recorded) else sweep
+
+    frame = pd.DataFrame(X, columns=["From_encoded", "To_encoded", "Angle"])
+    frame[["From_encoded", "To_encoded"]] = frame[["From_encoded", "To_encoded"]].astype(np.int64)
+    expected = model.predict(frame)
+    actual = predictor.predict_features(X)
+    mismatches = np.flatnonzero(expected != actual)
+    return len(X), mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile tennis_pose_model.pkl into NumPy arrays.")
+    parser.add_argument("--verify", action="store_true",
+                        help="compare against model.predict on recorded and swept inputs")
+    parser.add_argument("--recorded", action="append",
+                        help="result.json with recorded classifier inputs (repeatable; default: the checked-in "
+                             "tests/fixtures/recorded_inputs.json and the last result.json)")
+    args = parser.parse_args(argv)
+
+    predictor = load_predictor()
+    print(f"compiled {predictor.kind} predictor for {len(predictor.pair_codes)} pose pairs")
+    if not args.verify:
+        return 0
+
+    from .models import get_classifier
+    total, mismatches = verify(get_classifier(), predictor, recorded_inputs(*(args.recorded or ())))
+    if len(mismatches):
+        print(f"{len(mismatches)} of {total} predictions differ from model.predict (first rows: {mismatches[:10]})")
+        return 1
+    print(f"all {total} predictions match model.predict")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+import os
+
+# 경로 설정 (Linux 경로 사용, 환경 변수로 변경 가능)
+OPENPOSE_DIR = os.environ.get("OPENPOSE_DIR", "/app/openpose")
+PUBLIC_DIR = os.environ.get("PUBLIC_DIR", "/app/public")
+POSE_LIB_DIR = os.environ.get("POSE_LIB_DIR", os.path.join(OPENPOSE_DIR, "pose_lib"))
+
+PROTOTXT_PATH = os.path.join(POSE_LIB_DIR, "pose_deploy_linevec.prototxt")
+CAFFEMODEL_NAME = "pose_iter_160000.caffemodel"
+LABEL_ENCODER_FROM_PATH = os.path.join(POSE_LIB_DIR, "label_encoder_from.pkl")
+LABEL_ENCODER_TO_PATH = os.path.join(POSE_LIB_DIR, "label_encoder_to.pkl")
+MODEL_PATH = os.path.join(POSE_LIB_DIR, "tennis_pose_model.pkl")
+# 관절 쌍별 기준 각도/피드백 문구/점수 상수 표 (tennis_teacher.rules)
+RULES_PATH = os.environ.get("TENNIS_TEACHER_RULES",
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), "feedback_rules.json"))
+
+RESULT_JSON_PATH = os.path.join(OPENPOSE_DIR, "result.json")
+RESULT_HTML_PATH = os.path.join(OPENPOSE_DIR, "result.html")
+TEMP_RESULT_HTML_PATH = os.path.join(OPENPOSE_DIR, "temp_result.html")
+PUBLIC_RESULT_HTML_PATH = os.path.join(PUBLIC_DIR, "result.html")
+# 작업(job) id 가 주어진 분석의 출력 위치 (tennis_teacher.jobs): JOBS_DIR/<id>/, PUBLIC_JOBS_DIR/<id>/result.html
+JOBS_DIR = os.environ.get("TENNIS_TEACHER_JOBS_DIR", os.path.join(OPENPOSE_DIR, "jobs"))
+PUBLIC_JOBS_DIR = os.environ.get("TENNIS_TEACHER_PUBLIC_JOBS_DIR", os.path.join(PUBLIC_DIR, "jobs"))
+# 남겨 둘 작업 디렉토리 수 (오래된 것부터 지웁니다)
+JOBS_KEEP = int(os.environ.get("TENNIS_TEACHER_JOBS_KEEP", "200"))
+# 보고서의 결과 이미지/점수 차트/결과 데이터를 내용 해시 이름의 파일로 두는 곳 (tennis_teacher.report).
+# 분석마다 REPORT_ASSETS_DIR/<보고서 id>/ 에 쓰고 HTML 은 REPORT_ASSETS_URL/<보고서 id>/... 로 참조합니다.
+# server.js 가 이 경로를 immutable 캐시 헤더와 미리 압축한 gzip/brotli 로 내보냅니다.
+REPORT_ASSETS_DIR = os.environ.get("TENNIS_TEACHER_REPORT_ASSETS_DIR", os.path.join(PUBLIC_DIR, "reports"))
+REPORT_ASSETS_URL = os.environ.get("TENNIS_TEACHER_REPORT_ASSETS_URL", "/reports")
+# 남겨 둘 보고서 디렉토리 수 (가장 오래 쓰지 않은 것부터 지웁니다). 남아 있는 작업(JOBS_KEEP)이 참조하는 보고서는
+# 이 수와 관계없이 그 작업이 지워질 때까지 남깁니다.
+REPORT_ASSETS_KEEP = int(os.environ.get("TENNIS_TEACHER_REPORT_ASSETS_KEEP", "100"))
+# 1 이면 예전처럼 이미지와 차트를 HTML 안에 넣어 파일 하나로 볼 수 있게 합니다.
+REPORT_INLINE_ASSETS = os.environ.get("TENNIS_TEACHER_REPORT_INLINE") == "1"
+# 영상 전체의 키포인트 시계열 (T, 15, 3) float32 와 메타데이터 (tennis_teacher.timeseries)
+KEYPOINTS_PATH = os.path.join(OPENPOSE_DIR, "keypoints.npy")
+KEYPOINTS_META_PATH = os.path.join(OPENPOSE_DIR, "keypoints.json")
+# 분석할 때마다 키포인트 시계열을 저장(또는 재사용)할지
+SAVE_KEYPOINTS = os.environ.get("TENNIS_TEACHER_SAVE_KEYPOINTS") == "1"
+# 같은 영상(바이트 해시) + 같은 모델 + 같은 옵션의 분석 결과를 재사용하는 캐시 (tennis_teacher.cache)
+CACHE_ENABLED = os.environ.get("TENNIS_TEACHER_CACHE", "1") != "0"
+CACHE_DIR = os.environ.get("TENNIS_TEACHER_CACHE_DIR", os.path.join(OPENPOSE_DIR, "cache"))
+# 캐시 전체 크기 상한. 넘으면 가장 오래 쓰지 않은 항목부터 지웁니다.
+CACHE_MAX_BYTES = int(os.environ.get("TENNIS_TEACHER_CACHE_MAX_MB", "256")) * 1024 * 1024
+# 작업(job) id 가 있는 분석의 시계열은 작업끼리 함께 쓰는 이곳에 둡니다: SERIES_DIR/<영상 sha256 + 시계열 설정의 키>/.
+# 캐시 항목이 아니므로(점으로 시작하는 이름) 캐시의 정리/비우기와 관계없이 남습니다.
+SERIES_DIR = os.environ.get("TENNIS_TEACHER_SERIES_DIR", os.path.join(CACHE_DIR, ".series"))
+# 남겨 둘 공유 시계열 수 (가장 오래 쓰지 않은 것부터 지우되, 남아 있는 작업이 참조하는 것은 남깁니다)
+SERIES_KEEP = int(os.environ.get("TENNIS_TEACHER_SERIES_KEEP", "200"))
+
+# 포즈 네트워크 입력 해상도 프리셋. forward 비용은 대략 픽셀 수에 비례합니다 (python -m benchmarks.resolution 참고).
+#   max_input_side: analyze_frame 입력 이미지의 최대 변 길이 (스캔 프레임을 ffmpeg 로 줄일 때도 이 크기)
+#   scan_input_size: 임팩트 프레임 탐색(수직 판정)에 쓰는 입력 크기
+#   scan_coarse_size: coarse-to-fine 1차(저해상도) 패스의 입력 크기
+RESOLUTION_PRESETS = {
+    "fast": {"max_input_side": 320, "scan_input_size": 256, "scan_coarse_size": 128},
+    "balanced": {"max_input_side": 500, "scan_input_size": 368, "scan_coarse_size": 184},
+    "accurate": {"max_input_side": 656, "scan_input_size": 496, "scan_coarse_size": 248},
+}
+RESOLUTION = os.environ.get("TENNIS_TEACHER_RESOLUTION", "balanced")
+if RESOLUTION not in RESOLUTION_PRESETS:
+    raise ValueError(f"TENNIS_TEACHER_RESOLUTION must be one of {', '.join(RESOLUTION_PRESETS)}: {RESOLUTION}")
+_preset = RESOLUTION_PRESETS[RESOLUTION]
+# 아래 값들은 고른 프리셋의 값이며, 개별 환경 변수가 있으면 그 값이 우선합니다.
+MAX_INPUT_SIDE = int(os.environ.get("TENNIS_TEACHER_MAX_INPUT_SIDE", _preset["max_input_side"]))
+# 임팩트 프레임 선택 방식 (tennis_teacher.impact 참고)
+IMPACT_MODES = ("middle", "perpendicular")
+_scan_side = int(os.environ.get("TENNIS_TEACHER_SCAN_INPUT_SIZE", _preset["scan_input_size"]))
+SCAN_INPUT_SIZE = (_scan_side, _scan_side)
+# 수직 판정 탐색의 1차(저해상도) 패스: 몇 프레임마다 한 번 볼지와 입력 크기.
+# SCAN_STRIDE 가 1(기본)이면 예전처럼 모든 프레임을 SCAN_INPUT_SIZE 로 검사합니다. 1차 패스가 놓친 수직 순간은
+# 건너뛰므로 고르는 임팩트 프레임이 달라질 수 있어, coarse-to-fine 탐색은 TENNIS_TEACHER_SCAN_STRIDE=N
+# (또는 CLI 의 --scan-stride N) 으로 직접 켭니다. SCAN_COARSE_STRIDE 는 켤 때 권장하는 간격입니다.
+SCAN_STRIDE = int(os.environ.get("TENNIS_TEACHER_SCAN_STRIDE", "1"))
+SCAN_COARSE_STRIDE = 5
+_coarse_side = int(os.environ.get("TENNIS_TEACHER_SCAN_COARSE_SIZE", _preset["scan_coarse_size"]))
+SCAN_COARSE_INPUT_SIZE = (_coarse_side, _coarse_side)
+# 1차 패스에서 후보로 볼 각도 범위 (90° ± 이 값). 2차 패스는 원래 기준(80°~100°)을 그대로 씁니다.
+SCAN_COARSE_ANGLE_MARGIN = 25
+# 여러 프레임을 한 번의 forward 로 처리할 때의 배치 크기
+POSE_BATCH_SIZE = int(os.environ.get("TENNIS_TEACHER_POSE_BATCH_SIZE", "4"))
+# 프레임 단위 포즈 추출에 쓸 프로세스 수 (1 이면 현재 프로세스에서 처리, tennis_teacher.parallel 참고)
+POSE_WORKERS = int(os.environ.get("TENNIS_TEACHER_POSE_WORKERS", "1"))
+# 진행 상황(tennis_teacher.progress)을 프레임 루프에서 내보내는 최소 간격(초)
+PROGRESS_INTERVAL = float(os.environ.get("TENNIS_TEACHER_PROGRESS_INTERVAL", "0.5"))
+# 상주 워커가 OpenCV(cv2.dnn 등)에 쓸 스레드 수 (0 이면 OpenCV 기본값). server.js 는 워커를 여러 개 띄울 때
+# 코어를 워커 수로 나눈 값을 넘깁니다.
+CV_THREADS = int(os.environ.get("TENNIS_TEACHER_CV_THREADS", "0"))
+# 추론 루프보다 몇 프레임 앞서 디코딩해 둘지 (FramePrefetcher, 0 이면 추론과 번갈아 디코딩)
+PREFETCH_DEPTH = int(os.environ.get("TENNIS_TEACHER_PREFETCH_DEPTH", "4"))
+# 스캔할 때 프레임을 읽어 올 곳: cv2.VideoCapture 또는 ffmpeg 서브프로세스 파이프 (video.open_frame_reader)
+FRAME_SOURCES = ("opencv", "ffmpeg")
+FRAME_SOURCE = os.environ.get("TENNIS_TEACHER_FRAME_SOURCE", "opencv")
+FFMPEG_BINARY = os.environ.get("TENNIS_TEACHER_FFMPEG", "ffmpeg")
+# 선수 영역(ROI) 자르기 (tennis_teacher.roi): 앞 배치의 키포인트를 감싼 정사각형만 더 작은 입력으로 추론합니다.
+PLAYER_ROI = os.environ.get("TENNIS_TEACHER_PLAYER_ROI") == "1"
+# ROI 입력 크기 = 원래 입력 크기 × 이 비율
+ROI_INPUT_SCALE = float(os.environ.get("TENNIS_TEACHER_ROI_INPUT_SCALE", "0.5"))
+# 키포인트 경계 상자의 긴 변 대비 사방에 덧붙일 여백
+ROI_PADDING = 0.35
+# ROI 에서 이보다 적은 키포인트가 검출되면 그 프레임은 전체 프레임으로 다시 추론하고 ROI 를 버립니다.
+ROI_MIN_KEYPOINTS = 8
+# ROI 가 프레임 면적의 이 비율보다 크면 자르는 이득이 없으므로 전체 프레임을 씁니다.
+ROI_MAX_AREA = 0.6
+# 포즈 추적 모드 (tennis_teacher.tracking): 키프레임에서만 DNN 을 돌리고 사이 프레임은 광학 흐름으로 키포인트를 옮깁니다.
+TRACKING = os.environ.get("TENNIS_TEACHER_TRACKING") == "1"
+# 키프레임 간격 k 의 범위. 추적이 잘 맞으면 늘리고, 어긋나거나 실패하면 줄입니다.
+TRACK_MIN_INTERVAL = 2
+TRACK_MAX_INTERVAL = int(os.environ.get("TENNIS_TEACHER_TRACK_MAX_INTERVAL", "8"))
+# 광학 흐름을 계산할 흑백 이미지의 최대 변 길이. 아래 픽셀 기준은 이 크기에서의 값입니다.
+TRACK_SIDE = 320
+# 정방향으로 옮긴 점을 역방향으로 되돌렸을 때 허용하는 오차(px). 넘으면 그 점은 추적 실패.
+TRACK_FB_MAX_ERROR = 1.0
+# 보이던 키포인트 중 이 비율 이상을 추적하지 못하면 바로 키프레임을 다시 만듭니다.
+TRACK_MIN_TRACKED_RATIO = 0.8
+# 한 프레임 사이 움직임(중앙값)이 긴 변의 이 비율을 넘으면 바로 키프레임을 다시 만듭니다.
+TRACK_MAX_MOTION = 0.05
+# 예정된 키프레임에서 추적 위치와 DNN 위치의 차이(중앙값)가 긴 변의 이 비율 이하이면 간격을 늘립니다.
+TRACK_DRIFT_TOLERANCE = 0.01
+# 히트맵 최댓값이 이 값보다 커야 키포인트로 인정
+KEYPOINT_THRESHOLD = 0.1
+# 히트맵 최댓값 주변 값으로 키포인트 위치를 격자 칸보다 세밀하게 보정할지 (pose.extract_keypoint_arrays)
+KEYPOINT_SUBPIXEL = os.environ.get("TENNIS_TEACHER_KEYPOINT_SUBPIXEL") == "1"
@@ -0,0 +1,89 @@
+from functools import lru_cache
+
+from . import config
+from .body import BODY_PARTS, POSE_PAIRS
+from .profiling import lazy_import
+
+# 각도 특징 단계: 연결된 두 파트가 이루는 각도를 계산합니다.
+#
+# POSE_PAIRS 의 from/to 인덱스 배열을 한 번 만들어 두고, (..., 15, 3) 키포인트 배열에서
+# 모든 프레임 × 모든 쌍의 각도를 np.arctan2 한 번으로 구합니다. 검출되지 않은 파트가 낀 쌍은
+# valid 마스크로 표시합니다. 분류/점수/피드백은 이 배열을 그대로 쓰고, pandas 는 내보낼 때만 씁니다.
+
+
+@lru_cache(maxsize=None)
+def pair_index_arrays():
+    np = lazy_import("numpy")
+    from_indices = np.array([BODY_PARTS[partFrom] for partFrom, _ in POSE_PAIRS], dtype=np.intp)
+    to_indices = np.array([BODY_PARTS[partTo] for _, partTo in POSE_PAIRS], dtype=np.intp)
+    return from_indices, to_indices
+
+
+def compute_angle_array(keypoints, threshold=config.KEYPOINT_THRESHOLD):
+    # keypoints: (..., 15, 3) [x, y, 신뢰도] → (..., 14) float64 각도(도, 무효한 쌍은 nan) 와 bool 유효 마스크
+    np = lazy_import("numpy")
+    from .pose import keypoint_mask
+
+    from_indices, to_indices = pair_index_arrays()
+    # 예전처럼 정수 픽셀 좌표의 차이로 각도를 잽니다.
+    xy = keypoints[..., :2].astype(np.int32)
+    delta = (xy[..., to_indices, :] - xy[..., from_indices, :]).astype(np.float64)
+    # 각도는 float64 로 둡니다. float32 로 줄이면 분류기 임계값이나 피드백 기준 각도 근처에서 판정이 달라질 수 있습니다.
+    angles = np.degrees(np.arctan2(delta[..., 1], delta[..., 0]))
+
+    visible = keypoint_mask(keypoints, threshold)
+    valid = visible[..., from_indices] & visible[..., to_indices]
+    angles[~valid] = np.nan
+    return angles, valid
+
+
+class PoseAngles:
+    # 한 프레임의 POSE_PAIRS 각도와 단계별 결과 (모두 POSE_PAIRS 순서의 길이 14 배열)
+    #   angles: float64 각도 (무효한 쌍은 nan), valid: bool
+    #   is_correct: 분류 결과 (무효한 쌍은 -1), pair_codes: (14, 2) 라벨 인코딩  ← classifier.classify
+    #   scores: 부위별 점수 (무효한 쌍은 nan)                                   ← scoring.calculate_scores
+    #   keypoints: 각도를 구한 (15, 3) 키포인트 (from_keypoints 로 만든 경우)
+    def __init__(self, angles, valid, keypoints=None):
+        self.angles = angles
+        self.valid = valid
+        self.keypoints = keypoints
+        self.is_correct = None
+        self.pair_codes = None
+        self.scores = None
+
+    @classmethod
+    def from_keypoints(cls, keypoints, threshold=config.KEYPOINT_THRESHOLD):
+        return cls(*compute_angle_array(keypoints, threshold), keypoints=keypoints)
+
+    @property
+    def empty(self):
+        return not self.valid.any()
+
+    def to_records(self):
+        # 예전 DataFrame.to_dict(orient='records') 와 같은 형식의 목록 (유효한 쌍만)
+        records = []
+        for i in self.valid.nonzero()[0].tolist():
+            partFrom, partTo = POSE_PAIRS[i]
+            record = {"From": partFrom, "To": partTo, "Angle": float(self.angles[i])}
+            if self.pair_codes is not None:
+                record["From_encoded"] = int(self.pair_codes[i, 0])
+                record["To_encoded"] = int(self.pair_codes[i, 1])
+            if self.is_correct is not None:
+                record["IsCorrect"] = self.is_correct[i].item()
+            if self.scores is not None:
+                record["Score"] = float(self.scores[i])
+            records.append(record)
+        return records
+
+    def to_frame(self):
+        pd = lazy_import("pandas")
+        return pd.DataFrame(self.to_records())
+
+    def head(self, n=5):
+        lines = []
+        for record in self.to_records()[:n]:
+            line = f"{record['From']:>10} {record['To']:>10} {record['Angle']:10.4f}"
+            if "IsCorrect" in record:
+                line += f" {record['IsCorrect']:>3}"
+            lines.append(line)
+        return "\n".join(lines)
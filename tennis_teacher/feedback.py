@@ -0,0 +1,35 @@
+from .profiling import lazy_import
+from .rules import get_rules
+
+# 피드백 단계: 틀린 각도마다 교정 문구를 만듭니다.
+#
+# 쌍별 기준 각도와 문구는 규칙 표(rules.py, feedback_rules.json)에 있습니다. feedback_codes 가
+# (..., 14) 배열 전체에 대해 쌍별 문구 인덱스를 한 번에 구하므로, 한 프레임이든 스윙 전체든 같은 비용 구조입니다.
+
+
+def feedback_codes(angles, is_correct, valid, rules=None):
+    # 쌍별 문구 인덱스 (..., 14). 피드백이 없는 쌍(맞았거나, 무효하거나, 규칙이 없는 쌍)은 -1.
+    np = lazy_import("numpy")
+    rules = rules or get_rules()
+    incorrect = valid & (is_correct == 0) & rules.has_rule
+    codes = np.where(angles < rules.mean_angle, rules.below, rules.above)
+    return np.where(incorrect, codes, -1)
+
+
+def build_feedback(features):
+    # features: 분류까지 끝난 features.PoseAngles. 문구는 POSE_PAIRS 순서입니다.
+    rules = get_rules()
+    if not (features.valid & (features.is_correct == 0)).any():
+        return [rules.perfect_message]
+    codes = feedback_codes(features.angles, features.is_correct, features.valid, rules)
+    return [rules.messages[code] for code in codes[codes >= 0].tolist()]
+
+
+def summarize_feedback(codes, rules=None):
+    # 여러 프레임의 문구 인덱스 (T, 14) → [(문구, 그 문구가 나온 프레임 수)], 많이 나온 순서
+    np = lazy_import("numpy")
+    rules = rules or get_rules()
+    hits = (codes[..., None] == np.arange(len(rules.messages))).any(axis=-2)
+    counts = hits.reshape(-1, len(rules.messages)).sum(axis=0)
+    order = np.argsort(-counts, kind="stable")
+    return [(rules.messages[i], int(counts[i])) for i in order.tolist() if counts[i] > 0]
@@ -0,0 +1,161 @@
+import os
+import tempfile
+import subprocess
+from functools import lru_cache
+
+from . import config
+from .profiling import lazy_import
+
+# ffmpeg 서브프로세스 프레임 소스
+#
+# cv2.VideoCapture 로 원본 해상도 프레임을 받은 뒤 cv2.resize 하는 대신, ffmpeg 가
+#  - 멀티스레드 디코딩 (-threads 0),
+#  - 프레임 골라내기 (select 필터로 stride 번째 프레임만),
+#  - 축소 (scale 필터, flags=area → cv2.INTER_AREA 에 해당)
+# 까지 끝낸 raw BGR 프레임을 파이프로 보냅니다. 파이썬 쪽은 미리 만든 버퍼에 readinto 만 합니다.
+# 축소된 프레임의 좌표는 원본과 비율만 다르므로 임팩트 판정(각도, 좌우 비교)에는 영향이 없습니다.
+# ffmpeg 의 stderr 는 임시 파일로 받습니다. 파이프로 받으면 경고가 많은 긴 영상에서 파이프가 가득 차
+# ffmpeg 가 멈추고, stdout 을 기다리는 리더와 서로 기다리게 됩니다.
+
+# Linux 의 fcntl F_SETPIPE_SZ. 파이프 버퍼를 키워 ffmpeg 가 프레임 단위로 멈추지 않게 합니다.
+_F_SETPIPE_SZ = 1031
+_PIPE_SIZE = 1 << 20
+
+
+def probe(video_path):
+    # ffmpeg 가 내보낼 (회전 메타데이터를 적용한) 프레임 크기와 컨테이너의 프레임 수 (모르면 None).
+    # OpenCV 의 FRAME_WIDTH/HEIGHT 는 이미 회전을 적용한 크기이고 ffmpeg 도 자동으로 회전하므로 그대로 씁니다.
+    cv2 = lazy_import("cv2")
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return None
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        return width, height, frame_count if frame_count > 0 else None
+    finally:
+        cap.release()
+
+
+def probe_size(video_path):
+    info = probe(video_path)
+    return None if info is None else info[:2]
+
+
+@lru_cache(maxsize=None)
+def passthrough_options(binary=None):
+    # select 로 버린 프레임을 복제해 채우지 않도록 타임스탬프를 그대로 둡니다.
+    # -vsync 는 ffmpeg 5.1 부터 -fps_mode 로 바뀌었으므로(이후 deprecated) 지원하는 쪽을 씁니다.
+    binary = binary or config.FFMPEG_BINARY
+    try:
+        result = subprocess.run([binary, "-hide_banner", "-h", "long"], stdin=subprocess.DEVNULL,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=10)
+        help_text = result.stdout.decode("utf-8", "replace")
+    except (OSError, subprocess.SubprocessError):
+        help_text = ""
+    if "-fps_mode" in help_text:
+        return ["-fps_mode", "passthrough"]
+    return ["-vsync", "0"]
+
+
+def scaled_size(width, height, max_side):
+    # 긴 변이 max_side 가 되도록 줄입니다 (pose.resize_for_inference 와 같은 계산). 더 작은 영상은 그대로 둡니다.
+    if max_side is None or max(width, height) <= max_side:
+        return width, height
+    scale = max_side / max(width, height)
+    return int(width * scale), int(height * scale)
+
+
+def build_command(video_path, width, height, stride=1, threads=0):
+    # 출력 크기를 항상 scale 로 못박아 두어, 파이프에서 읽는 프레임 크기가 (width, height) 와 어긋나지 않게 합니다.
+    filters = []
+    if stride > 1:
+        filters.append(f"select=not(mod(n\\,{stride}))")
+    filters.append(f"scale={width}:{height}:flags=area")
+    command = [config.FFMPEG_BINARY, "-nostdin", "-hide_banner", "-loglevel", "error",
+               "-threads", str(threads), "-i", video_path]
+    command += ["-vf", ",".join(filters)]
+    command += passthrough_options()
+    command += ["-an", "-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"]
+    return command
+
+
+class FFmpegReader:
+    # video.CaptureReader 와 같은 프레임 리더: read(buffer) -> (index, frame) 또는 None(끝)
+    # frames: CaptureReader 와 같이 디코더가 지나간 프레임 수. ffmpeg 는 골라낸 프레임만 보내므로, 끝에 닿으면
+    #         마지막으로 골라낸 프레임 뒤의 (버려진) 프레임까지 컨테이너의 프레임 수로 채웁니다.
+    def __init__(self, process, width, height, stride=1, stderr=None, frame_count=None):
+        self.process = process
+        self.width = width
+        self.height = height
+        self.stride = stride
+        self.stderr = stderr
+        self.frame_count = frame_count
+        self.frame_bytes = width * height * 3
+        self.count = 0
+        self.frames = 0
+
+    @classmethod
+    def open(cls, video_path, stride=1, max_side=None, threads=0):
+        if not os.path.exists(video_path):
+            print(f"Error: video file does not exist: {video_path}")
+            return None
+        info = probe(video_path)
+        if info is None:
+            print(f"Error opening video file: {video_path}")
+            return None
+        source_width, source_height, frame_count = info
+        width, height = scaled_size(source_width, source_height, max_side)
+        command = build_command(video_path, width, height, stride, threads)
+        stderr = tempfile.TemporaryFile()
+        try:
+            process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=stderr)
+        except OSError as e:
+            stderr.close()
+            print(f"Error starting ffmpeg ({config.FFMPEG_BINARY}): {e}")
+            return None
+        try:
+            import fcntl
+            fcntl.fcntl(process.stdout.fileno(), _F_SETPIPE_SZ, _PIPE_SIZE)
+        except (ImportError, OSError):
+            pass
+        return cls(process, width, height, stride, stderr, frame_count)
+
+    def read(self, buffer=None):
+        np = lazy_import("numpy")
+        if buffer is None:
+            buffer = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        view = memoryview(buffer).cast("B")
+        filled = 0
+        while filled < self.frame_bytes:
+            n = self.process.stdout.readinto(view[filled:])
+            if not n:
+                break
+            filled += n
+        if filled < self.frame_bytes:
+            self._check_exit()
+            if self.frame_count:
+                self.frames = max(self.frames, min(self.frame_count, self.count * self.stride))
+            return None
+        index = self.count * self.stride
+        self.count += 1
+        self.frames = index + 1
+        return index, buffer
+
+    def _check_exit(self):
+        returncode = self.process.wait()
+        if returncode != 0:
+            message = ""
+            if self.stderr is not None:
+                self.stderr.seek(0)
+                message = self.stderr.read().decode("utf-8", "replace").strip()
+            raise RuntimeError(f"ffmpeg exited with code {returncode}: {message}")
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.stdout.close()
+        self.process.wait()
+        if self.stderr is not None:
+            self.stderr.close()
@@ -0,0 +1,204 @@
+from . import config, progress
+from .pose import iter_keypoints, keypoint_mask, keypoints_to_points
+from .profiling import lazy_import
+from .video import FramePrefetcher, open_video, open_frame_reader, iter_frame_range, read_frame, probe_frame_count
+
+# 임팩트 프레임 선택
+#  - "middle": 영상 정중앙 프레임
+#  - "perpendicular": 어깨-팔꿈치 선과 목-가슴 선이 수직이 되는 첫 프레임 (openpose 변형에서 쓰던 방식)
+#
+# "perpendicular" 는 coarse-to-fine 으로 찾습니다.
+#  1차: stride 프레임마다 한 번, 작은 입력(SCAN_COARSE_INPUT_SIZE)으로 포즈를 구해
+#       각도가 90° 근처(± SCAN_COARSE_ANGLE_MARGIN)인 표본 주변을 후보 구간으로 잡습니다.
+#  2차: 후보 구간 안의 프레임만 원래 크기(SCAN_INPUT_SIZE)와 원래 기준으로 검사합니다.
+#
+# workers > 1 이면 두 패스 모두 워커 프로세스들이 포즈를 구합니다 (parallel.py). 이때 찾은 프레임은
+# 인덱스로 다시 읽어 옵니다.
+#
+# 두 스캔 모두 디코딩은 FramePrefetcher 스레드가 추론과 겹쳐서 진행합니다. 끝나면 어느 쪽이 병목이었는지 출력합니다.
+# frame_source="ffmpeg" 이면 전체/1차 패스의 프레임을 ffmpeg 가 max_side(해상도 프리셋의 분석 크기)로 줄여서 보냅니다.
+# 찾은 프레임은 그대로 analyze_frame 에 들어가므로 프리셋보다 작게 줄이면 안 됩니다.
+# 2차 패스의 짧은 구간은 seek 가 되는 cv2 로 원본 해상도에서 읽습니다.
+#
+# tracking=True 이면 전체 스캔이 모든 프레임을 보되 DNN 은 키프레임에서만 돌립니다 (tracking.py).
+# player_roi=True 이면 (workers == 1 일 때) 각 패스가 첫 배치 뒤로는 선수 영역만 잘라 추론합니다 (roi.py).
+
+IMPACT_MODES = config.IMPACT_MODES
+
+
+def line_angle(p1, p2, p3, p4):
+    np = lazy_import("numpy")
+    vec_p1p2 = np.array(p1) - np.array(p2)
+    vec_p3p4 = np.array(p3) - np.array(p4)
+
+    angle = np.arccos(np.dot(vec_p1p2, vec_p3p4) / (np.linalg.norm(vec_p1p2) * np.linalg.norm(vec_p3p4)))
+    return np.degrees(angle)
+
+
+def is_perpendicular(p1, p2, p3, p4):
+    angle_deg = line_angle(p1, p2, p3, p4)
+    return 80 <= angle_deg <= 100 or 260 <= angle_deg <= 280
+
+
+def is_impact_candidate(points, margin=config.SCAN_COARSE_ANGLE_MARGIN):
+    if points[2] and points[3] and points[1] and points[14]:
+        return abs(line_angle(points[2], points[3], points[1], points[14]) - 90) <= 10 + margin
+    return False
+
+
+def is_impact_pose(points):
+    if points[2] and points[3] and points[1] and points[14]:
+        if is_perpendicular(points[2], points[3], points[1], points[14]):
+            return points[3][0] > points[1][0]
+    return False
+
+
+def impact_pose_mask(keypoints, threshold=config.KEYPOINT_THRESHOLD):
+    # is_impact_pose 를 (..., 15, 3) 키포인트 배열 전체에 한 번에 적용한 bool 배열
+    np = lazy_import("numpy")
+    xy = keypoints[..., :2].astype(np.int32).astype(np.float64)
+    visible = keypoint_mask(keypoints, threshold)
+    detected = visible[..., 2] & visible[..., 3] & visible[..., 1] & visible[..., 14]
+
+    vec_p1p2 = xy[..., 2, :] - xy[..., 3, :]
+    vec_p3p4 = xy[..., 1, :] - xy[..., 14, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cosine = (vec_p1p2 * vec_p3p4).sum(axis=-1) / (np.linalg.norm(vec_p1p2, axis=-1) *
+                                                       np.linalg.norm(vec_p3p4, axis=-1))
+        angle_deg = np.degrees(np.arccos(cosine))
+    perpendicular = ((80 <= angle_deg) & (angle_deg <= 100)) | ((260 <= angle_deg) & (angle_deg <= 280))
+    return detected & perpendicular & (xy[..., 3, 0] > xy[..., 1, 0])
+
+
+def find_impact_index(keypoints):
+    # (T, 15, 3) 키포인트 시계열에서 첫 임팩트 프레임 인덱스. 없으면 None.
+    np = lazy_import("numpy")
+    hits = np.flatnonzero(impact_pose_mask(keypoints))
+    return int(hits[0]) if len(hits) else None
+
+
+def _player_roi(size, player_roi):
+    if not player_roi:
+        return None
+    from .roi import PlayerRoi
+    return PlayerRoi(size)
+
+
+def _first_impact(indexed_frames, video_path, size, batch_size, workers, stats=None, tracker=None, roi=None):
+    # (index, frame) 들 중 시간 순서로 첫 임팩트 프레임을 찾습니다.
+    if tracker is not None:
+        results = ((index, frame, keypoints_to_points(keypoints))
+                   for index, frame, keypoints in tracker.track(indexed_frames))
+    else:
+        results = iter_keypoints(indexed_frames, size, batch_size, workers, roi)
+    for current_frame_index, frame, points in results:
+        progress.current().frame_inferred()
+        if stats is not None:
+            stats["fine_passes"] += 1
+        if is_impact_pose(points):
+            if frame is None:
+                frame = _reread_frame(video_path, current_frame_index)
+            return current_frame_index, frame
+    return None, None
+
+
+def _reread_frame(video_path, frame_index):
+    cap = open_video(video_path)
+    if cap is None:
+        return None
+    try:
+        return read_frame(cap, video_path, frame_index)
+    finally:
+        cap.release()
+
+
+def find_perpendicular_frame(video_path, size=config.SCAN_INPUT_SIZE, batch_size=config.POSE_BATCH_SIZE,
+                             workers=config.POSE_WORKERS, frame_source=config.FRAME_SOURCE,
+                             tracking=config.TRACKING, player_roi=config.PLAYER_ROI,
+                             max_side=config.MAX_INPUT_SIDE):
+    reader = open_frame_reader(video_path, frame_source, max_side=max_side)
+    if reader is None:
+        return None
+    tracker = None
+    if tracking:
+        from .tracking import KeypointTracker
+        tracker = KeypointTracker(size)
+    roi = _player_roi(size, player_roi and tracker is None)
+    progress.current().stage("scan", probe_frame_count(video_path))
+    try:
+        with FramePrefetcher(reader, hold=batch_size) as frames:
+            current_frame_index, frame = _first_impact(frames, video_path, size, batch_size, workers,
+                                                       tracker=tracker, roi=roi)
+        print(frames.summary())
+        if tracker is not None:
+            print(tracker.summary())
+        if roi is not None:
+            print(roi.summary())
+    finally:
+        reader.close()
+    if frame is not None:
+        # 링 버퍼는 재사용되므로 복사해 둡니다.
+        frame = frame.copy()
+        print(f"Captured impact frame at {current_frame_index}")
+    return frame
+
+
+def _coarse_to_fine(samples, video_path, stride, coarse_size, fine_size, batch_size, workers, stats,
+                    player_roi=False):
+    refined_until = 0
+    coarse_roi = _player_roi(coarse_size, player_roi)
+    for sample_index, _, points in iter_keypoints(samples, coarse_size, batch_size, workers, coarse_roi):
+        progress.current().frame_inferred()
+        stats["coarse_passes"] += 1
+        if not is_impact_candidate(points):
+            continue
+        start = max(refined_until, sample_index - stride + 1)
+        stop = sample_index + stride
+        # 2차 패스는 원본 해상도에서 읽으므로(1차는 ffmpeg 로 줄였을 수 있음) 1차의 ROI 를 이어 쓰지 않습니다.
+        found_index, found_frame = _first_impact(iter_frame_range(video_path, start, stop), video_path,
+                                                 fine_size, batch_size, workers, stats,
+                                                 roi=_player_roi(fine_size, player_roi))
+        refined_until = stop
+        if found_frame is not None:
+            stats["impact_frame"] = found_index
+            print(f"Captured impact frame at {found_index}")
+            return found_frame
+    return None
+
+
+def find_perpendicular_frame_coarse_to_fine(video_path, stride=config.SCAN_COARSE_STRIDE,
+                                            coarse_size=config.SCAN_COARSE_INPUT_SIZE,
+                                            fine_size=config.SCAN_INPUT_SIZE,
+                                            batch_size=config.POSE_BATCH_SIZE,
+                                            workers=config.POSE_WORKERS,
+                                            frame_source=config.FRAME_SOURCE,
+                                            player_roi=config.PLAYER_ROI,
+                                            max_side=config.MAX_INPUT_SIDE):
+    stats = {"frames": 0, "coarse_passes": 0, "fine_passes": 0, "impact_frame": None}
+
+    reader = open_frame_reader(video_path, frame_source, stride, max_side=max_side)
+    if reader is None:
+        return None, stats
+
+    # 1차 패스는 표본 프레임만 retrieve 하고 나머지는 grab 으로 넘깁니다.
+    # 후보 표본 i 가 나오면 바로 이웃 표본 사이 구간 [i - stride + 1, i + stride) 을 2차 패스로 검사하므로
+    # 가장 이른 임팩트 프레임을 찾으면 나머지 영상은 보지 않습니다.
+    progress.current().stage("scan", probe_frame_count(video_path))
+    try:
+        with FramePrefetcher(reader, hold=batch_size) as frames:
+            impact_frame = _coarse_to_fine(frames, video_path, stride, coarse_size, fine_size, batch_size,
+                                           workers, stats, player_roi)
+        stats["frames"] = frames.stats["frames"]
+        stats["prefetch"] = frames.stats
+        print(frames.summary())
+    finally:
+        reader.close()
+
+    # 모든 프레임을 원래 크기로 검사했다면 impact 프레임까지(못 찾으면 끝까지) forward 했을 것
+    dense_passes = stats["frames"] if impact_frame is None else stats["impact_frame"] + 1
+    used = stats["coarse_passes"] + stats["fine_passes"]
+    stats["dense_passes"] = dense_passes
+    stats["saved_passes"] = dense_passes - used
+    print(f"Forward passes: {used} (coarse {stats['coarse_passes']} at {coarse_size[0]}x{coarse_size[1]}, "
+          f"fine {stats['fine_passes']}) vs {dense_passes} dense, saved {stats['saved_passes']}")
+    return impact_frame, stats
@@ -0,0 +1,127 @@
+import os
+import re
+import shutil
+
+from . import config
+
+# 작업(job)별 출력 경로
+#
+# server.js 는 /analyze 요청마다 작업 id 를 정해 워커 요청의 job_id 로 넘깁니다. 작업 id 가 있으면
+# 결과 파일(result.json, result.html, 임시 HTML)은 JOBS_DIR/<id>/ 에, 공개 보고서는
+# PUBLIC_JOBS_DIR/<id>/result.html 에 쓰이므로 여러 워커가 동시에 분석해도 서로의 파일을 덮어쓰지 않습니다.
+# 키포인트 시계열은 작업 디렉토리가 아니라 영상 내용과 시계열 설정으로 정한 공유 위치(config.SERIES_DIR,
+# timeseries.shared_series_location)에 두어 다음 작업이 재사용하고, 작업 디렉토리의 keypoints_ref 파일에 그 키를 적어 둡니다.
+# timeseries.prune_series 는 보고서처럼 남아 있는 작업이 참조하는 시계열을 지우지 않습니다.
+# 작업 id 가 없으면(CLI) 예전처럼 config 의 고정 경로를 씁니다.
+# 보고서 이미지 등은 내용 해시 이름이라(report.write_report_assets) 작업끼리 공유해도 안전합니다.
+# 작업 디렉토리의 report_id 파일에 그 작업의 보고서 id 를 적어 두고, report.prune_report_assets 는 남아 있는 작업이
+# 참조하는 보고서 디렉토리를 지우지 않습니다. 보고서 파일은 그 작업이 prune_jobs 로 지워진 뒤에야 정리됩니다.
+
+REPORT_REF_NAME = "report_id"
+SERIES_REF_NAME = "keypoints_ref"
+
+JOB_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def validate_job_id(job_id):
+    if not isinstance(job_id, str) or not JOB_ID_PATTERN.fullmatch(job_id):
+        raise ValueError(f"invalid job id: {job_id!r}")
+    return job_id
+
+
+class JobPaths:
+    def __init__(self, job_id=None):
+        self.job_id = job_id
+        if job_id is None:
+            self.output_dir = config.OPENPOSE_DIR
+            self.public_dir = config.PUBLIC_DIR
+            self.result_json = config.RESULT_JSON_PATH
+            self.result_html = config.RESULT_HTML_PATH
+            self.temp_result_html = config.TEMP_RESULT_HTML_PATH
+            self.keypoints = config.KEYPOINTS_PATH
+            self.keypoints_meta = config.KEYPOINTS_META_PATH
+            self.public_result_html = config.PUBLIC_RESULT_HTML_PATH
+            # 고정 경로의 보고서는 늘 가장 최근 것이므로 따로 기록하지 않습니다.
+            self.report_ref = None
+            self.series_ref = None
+            return
+
+        validate_job_id(job_id)
+        self.output_dir = os.path.join(config.JOBS_DIR, job_id)
+        self.public_dir = os.path.join(config.PUBLIC_JOBS_DIR, job_id)
+        self.result_json = os.path.join(self.output_dir, "result.json")
+        self.result_html = os.path.join(self.output_dir, "result.html")
+        self.temp_result_html = os.path.join(self.output_dir, "temp_result.html")
+        # 시계열을 쓰면 link_series 가 공유 위치로 채웁니다.
+        self.keypoints = None
+        self.keypoints_meta = None
+        self.public_result_html = os.path.join(self.public_dir, "result.html")
+        self.report_ref = os.path.join(self.output_dir, REPORT_REF_NAME)
+        self.series_ref = os.path.join(self.output_dir, SERIES_REF_NAME)
+
+    def makedirs(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        os.makedirs(self.public_dir, exist_ok=True)
+
+    def remove(self):
+        # 실패한 작업의 디렉토리를 지웁니다. 작업 id 가 없으면(고정 경로) 아무것도 지우지 않습니다.
+        if self.job_id is None:
+            return
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+        shutil.rmtree(self.public_dir, ignore_errors=True)
+
+    def record_report(self, report_id):
+        # 이 작업의 result.html 이 참조하는 보고서 id (인라인 보고서면 None 이라 기록하지 않음)
+        if self.report_ref is None or report_id is None:
+            return
+        with open(self.report_ref, "w", encoding="utf-8") as f:
+            f.write(report_id)
+
+    def link_series(self, path, meta_path):
+        # 이 작업이 쓰는 공유 시계열 (작업 id 가 없으면 고정 경로를 그대로 씁니다)
+        if self.series_ref is None:
+            return
+        self.keypoints = path
+        self.keypoints_meta = meta_path
+        with open(self.series_ref, "w", encoding="utf-8") as f:
+            f.write(os.path.basename(os.path.dirname(path)))
+
+
+def _read_refs(name, jobs_dir):
+    refs = set()
+    try:
+        entries = [entry for entry in os.scandir(jobs_dir) if entry.is_dir()]
+    except FileNotFoundError:
+        return refs
+    for entry in entries:
+        try:
+            with open(os.path.join(entry.path, name), "r", encoding="utf-8") as f:
+                refs.add(f.read().strip())
+        except OSError:
+            continue
+    return refs
+
+
+def referenced_reports(jobs_dir=config.JOBS_DIR):
+    # 남아 있는 작업들이 참조하는 보고서 id 의 집합
+    return _read_refs(REPORT_REF_NAME, jobs_dir)
+
+
+def referenced_series(jobs_dir=config.JOBS_DIR):
+    # 남아 있는 작업들이 참조하는 공유 시계열 키(SERIES_DIR 아래 디렉토리 이름)의 집합
+    return _read_refs(SERIES_REF_NAME, jobs_dir)
+
+
+def prune_jobs(keep=config.JOBS_KEEP, jobs_dirs=(config.JOBS_DIR, config.PUBLIC_JOBS_DIR)):
+    # 각 디렉토리에서 가장 최근에 만든 keep 개의 작업만 남깁니다. 지운 개수를 반환.
+    removed = 0
+    for jobs_dir in jobs_dirs:
+        try:
+            entries = [entry for entry in os.scandir(jobs_dir) if entry.is_dir()]
+        except FileNotFoundError:
+            continue
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in entries[keep:]:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed += 1
+    return removed
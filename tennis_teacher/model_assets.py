@@ -0,0 +1,290 @@
+import os
+import sys
+import glob
+import json
+import hashlib
+import tempfile
+import argparse
+
+try:
+    import fcntl
+except ImportError:  # Windows 등 fcntl 이 없는 환경
+    fcntl = None
+
+from . import config
+
+# 분할 저장된 caffemodel(segment_*)을 한 번만, 안전하게 결합하는 모듈
+#
+# - manifest(caffemodel.manifest.json)에 각 segment 의 크기와 sha256, 결합 결과의 크기와 sha256 을 기록합니다.
+# - 결합은 같은 디렉토리의 임시 파일에 큰 버퍼(또는 copy_file_range)로 스트리밍한 뒤 os.replace 로 원자적으로 교체합니다.
+# - 결합된 파일 옆에 stamp 파일을 남겨, 이미 최신이면 아무 작업도 하지 않습니다.
+# - 여러 프로세스가 동시에 호출해도 lock 파일로 한 프로세스만 결합합니다.
+
+DEFAULT_OUTPUT_NAME = "pose_iter_160000.caffemodel"
+SEGMENT_PATTERN = "segment_*"
+MANIFEST_NAME = "caffemodel.manifest.json"
+STAMP_SUFFIX = ".stamp"
+LOCK_SUFFIX = ".lock"
+BUFFER_SIZE = 8 * 1024 * 1024
+
+_ensured = {}
+
+
+def list_segments(segment_dir, pattern=SEGMENT_PATTERN):
+    return sorted(glob.glob(os.path.join(segment_dir, pattern)))
+
+
+def file_sha256(path, buffer_size=BUFFER_SIZE):
+    hasher = hashlib.sha256()
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            hasher.update(view[:n])
+    return hasher.hexdigest()
+
+
+def build_manifest(segment_dir, pattern=SEGMENT_PATTERN, output_name=DEFAULT_OUTPUT_NAME):
+    segments = []
+    combined = hashlib.sha256()
+    total_size = 0
+    buffer = bytearray(BUFFER_SIZE)
+    view = memoryview(buffer)
+    for path in list_segments(segment_dir, pattern):
+        hasher = hashlib.sha256()
+        size = 0
+        with open(path, "rb", buffering=0) as f:
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                hasher.update(view[:n])
+                combined.update(view[:n])
+                size += n
+        segments.append({"name": os.path.basename(path), "size": size, "sha256": hasher.hexdigest()})
+        total_size += size
+    if not segments:
+        raise FileNotFoundError(f"no segments matching {pattern} in {segment_dir}")
+    return {
+        "output": output_name,
+        "size": total_size,
+        "sha256": combined.hexdigest(),
+        "segments": segments,
+    }
+
+
+def load_manifest(segment_dir):
+    path = os.path.join(segment_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_manifest(segment_dir, pattern=SEGMENT_PATTERN, output_name=DEFAULT_OUTPUT_NAME):
+    manifest = build_manifest(segment_dir, pattern, output_name)
+    atomic_write_json(os.path.join(segment_dir, MANIFEST_NAME), manifest)
+    return manifest
+
+
+def atomic_write_json(path, data):
+    directory = os.path.dirname(path) or "."
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _source_key(manifest, segment_paths):
+    # 결합 결과가 어떤 입력으로부터 만들어졌는지 나타내는 키
+    if manifest is not None:
+        return "manifest:" + manifest["sha256"]
+    entries = []
+    for path in segment_paths:
+        st = os.stat(path)
+        entries.append([os.path.basename(path), st.st_size, st.st_mtime_ns])
+    return "segments:" + hashlib.sha256(json.dumps(entries).encode("utf-8")).hexdigest()
+
+
+def _read_stamp(output_path):
+    try:
+        with open(output_path + STAMP_SUFFIX, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_stamp(output_path, source_key):
+    st = os.stat(output_path)
+    atomic_write_json(output_path + STAMP_SUFFIX, {
+        "source": source_key,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+    })
+
+
+def is_current(output_path, manifest, segment_paths, verify=False):
+    if not os.path.exists(output_path):
+        return False
+    st = os.stat(output_path)
+    if manifest is not None and st.st_size != manifest["size"]:
+        return False
+
+    stamp = _read_stamp(output_path)
+    stamp_ok = (stamp is not None
+                and stamp.get("source") == _source_key(manifest, segment_paths)
+                and stamp.get("size") == st.st_size
+                and stamp.get("mtime_ns") == st.st_mtime_ns)
+
+    if manifest is None:
+        return stamp_ok
+    if stamp_ok and not verify:
+        return True
+    # stamp 가 없거나(예: 예전 방식으로 결합된 파일) 검증을 요청한 경우 해시로 확인
+    if file_sha256(output_path) != manifest["sha256"]:
+        return False
+    if not stamp_ok:
+        _write_stamp(output_path, _source_key(manifest, segment_paths))
+    return True
+
+
+def _check_segments(manifest, segment_paths):
+    names = [os.path.basename(p) for p in segment_paths]
+    expected = [s["name"] for s in manifest["segments"]]
+    if names != expected:
+        raise RuntimeError(f"segment files do not match manifest: found {names}, expected {expected}")
+    for path, entry in zip(segment_paths, manifest["segments"]):
+        size = os.path.getsize(path)
+        if size != entry["size"]:
+            raise RuntimeError(f"segment {entry['name']} has size {size}, manifest says {entry['size']}")
+
+
+def _copy_segment(src, dst, hasher, buffer):
+    if hasher is None and hasattr(os, "copy_file_range"):
+        # 해시 검증이 필요 없으면 커널 내 복사 사용
+        remaining = os.fstat(src.fileno()).st_size
+        try:
+            while remaining > 0:
+                copied = os.copy_file_range(src.fileno(), dst.fileno(), min(remaining, 1 << 30))
+                if copied == 0:
+                    break
+                remaining -= copied
+            if remaining == 0:
+                return
+        except OSError:
+            pass
+        # 지원하지 않는 파일시스템이면 남은 부분을 버퍼 복사로 처리
+    view = memoryview(buffer)
+    while True:
+        n = src.readinto(buffer)
+        if not n:
+            break
+        if hasher is not None:
+            hasher.update(view[:n])
+        written = 0
+        while written < n:
+            written += dst.write(view[written:n])
+
+
+def assemble(segment_dir, output_path, manifest=None, pattern=SEGMENT_PATTERN):
+    segment_paths = list_segments(segment_dir, pattern)
+    if not segment_paths:
+        raise FileNotFoundError(f"no segments matching {pattern} in {segment_dir}")
+    if manifest is not None:
+        _check_segments(manifest, segment_paths)
+
+    directory = os.path.dirname(output_path) or "."
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".caffemodel")
+    buffer = bytearray(BUFFER_SIZE)
+    try:
+        with os.fdopen(fd, "wb", buffering=0) as dst:
+            for index, path in enumerate(segment_paths):
+                hasher = hashlib.sha256() if manifest is not None else None
+                with open(path, "rb", buffering=0) as src:
+                    _copy_segment(src, dst, hasher, buffer)
+                if hasher is not None and hasher.hexdigest() != manifest["segments"][index]["sha256"]:
+                    raise RuntimeError(f"checksum mismatch for segment {os.path.basename(path)}")
+            os.fsync(dst.fileno())
+        os.chmod(temp_path, 0o777)  # 파일 권한 설정
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    _write_stamp(output_path, _source_key(manifest, segment_paths))
+    return output_path
+
+
+class FileLock:
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+
+    def __enter__(self):
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+        os.close(self.fd)
+
+
+def ensure_caffemodel(segment_dir, output_name=DEFAULT_OUTPUT_NAME, pattern=SEGMENT_PATTERN, verify=False):
+    # 결합된 caffemodel 경로를 반환합니다. 최신이면 디스크 쓰기 없이 바로 반환합니다.
+    output_path = os.path.join(segment_dir, output_name)
+    if output_path in _ensured and not verify:
+        return output_path
+
+    manifest = load_manifest(segment_dir)
+    segment_paths = list_segments(segment_dir, pattern)
+
+    if not segment_paths:
+        # segment 없이 결합된 모델만 배포된 경우
+        if not os.path.exists(output_path):
+            raise FileNotFoundError(f"neither {output_name} nor segments found in {segment_dir}")
+        if verify and manifest is not None and file_sha256(output_path) != manifest["sha256"]:
+            raise RuntimeError(f"{output_name} does not match manifest")
+        _ensured[output_path] = True
+        return output_path
+
+    if not is_current(output_path, manifest, segment_paths, verify=verify):
+        with FileLock(output_path + LOCK_SUFFIX):
+            # lock 을 기다리는 동안 다른 프로세스가 결합했을 수 있음
+            if not is_current(output_path, manifest, segment_paths):
+                print(f"Assembling {output_name} from {len(segment_paths)} segments")
+                assemble(segment_dir, output_path, manifest, pattern)
+
+    _ensured[output_path] = True
+    return output_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Assemble the split caffemodel from segment_* files.")
+    parser.add_argument("segment_dir", nargs="?", default=config.POSE_LIB_DIR)
+    parser.add_argument("--output-name", default=DEFAULT_OUTPUT_NAME)
+    parser.add_argument("--write-manifest", action="store_true",
+                        help=f"record segment sizes and hashes in {MANIFEST_NAME}")
+    parser.add_argument("--verify", action="store_true", help="re-hash the assembled file against the manifest")
+    args = parser.parse_args(argv)
+
+    if args.write_manifest:
+        manifest = write_manifest(args.segment_dir, output_name=args.output_name)
+        print(f"Wrote manifest for {len(manifest['segments'])} segments ({manifest['size']} bytes)")
+    path = ensure_caffemodel(args.segment_dir, args.output_name, verify=args.verify)
+    print(f"{path} is up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
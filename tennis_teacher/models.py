@@ -0,0 +1,63 @@
+import functools
+import warnings
+
+from . import config
+from .profiling import lazy_import, timed
+
+# 모델 핸들은 처음 사용할 때 한 번만 만들고 프로세스 안에서 재사용합니다.
+# 보고서 재생성처럼 DNN 이 필요 없는 작업은 이 함수들을 호출하지 않으므로 모델을 로드하지 않습니다.
+
+
+@functools.lru_cache(maxsize=None)
+def get_net():
+    cv2 = lazy_import("cv2")
+    from .model_assets import ensure_caffemodel
+
+    # 분할된 파일 결합 (이미 최신이면 건너뜀)
+    with timed("init: assemble caffemodel"):
+        caffemodel_path = ensure_caffemodel(config.POSE_LIB_DIR, config.CAFFEMODEL_NAME)
+    with timed("init: readNetFromCaffe"):
+        return cv2.dnn.readNetFromCaffe(config.PROTOTXT_PATH, caffemodel_path)
+
+
+@functools.lru_cache(maxsize=None)
+def get_label_encoders():
+    joblib = lazy_import("joblib")
+
+    with timed("init: load label encoders"):
+        label_encoder_from = joblib.load(config.LABEL_ENCODER_FROM_PATH)
+        label_encoder_to = joblib.load(config.LABEL_ENCODER_TO_PATH)
+    return label_encoder_from, label_encoder_to
+
+
+@functools.lru_cache(maxsize=None)
+def get_classifier():
+    joblib = lazy_import("joblib")
+
+    warnings.filterwarnings("ignore", category=UserWarning, module="sklearn")
+    with timed("init: load tennis_pose_model.pkl"):
+        return joblib.load(config.MODEL_PATH)
+
+
+@functools.lru_cache(maxsize=None)
+def get_predictor():
+    # 분류 단계에서 쓰는 NumPy 예측기 (tennis_teacher.compiled_model 참고)
+    from .compiled_model import load_predictor
+    return load_predictor(config.MODEL_PATH, config.LABEL_ENCODER_FROM_PATH, config.LABEL_ENCODER_TO_PATH)
+
+
+def init():
+    # 상주 워커가 첫 작업 전에 모든 모델을 미리 로드할 때 사용
+    get_net()
+    get_predictor()
+
+
+def reset():
+    # 모델 파일이 바뀌었을 때(cache.check_model_version) 다음 사용 시 새로 로드하도록 핸들을 버립니다.
+    # 포즈 워커 프로세스도 각자 네트워크를 들고 있으므로 함께 내립니다.
+    from .rules import get_rules
+
+    for loader in (get_net, get_label_encoders, get_classifier, get_predictor, get_rules):
+        loader.cache_clear()
+    from .parallel import close_extractors
+    close_extractors()
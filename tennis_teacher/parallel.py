@@ -0,0 +1,213 @@
+import os
+import sys
+import atexit
+
+from . import config
+from .profiling import lazy_import
+
+# 여러 프로세스로 프레임 단위 포즈 추출
+#
+# - 각 워커 프로세스는 자기 cv2.dnn 네트워크를 가집니다 (models.get_net 을 프로세스마다 한 번).
+# - 디코더(부모 프로세스)는 프레임을 multiprocessing.shared_memory 링의 슬롯에 복사하고
+#   (슬롯 이름, 오프셋, shape) 만 큐로 보냅니다. 프레임 자체는 pickle 하지 않습니다.
+# - 워커는 (15, 3) float32 키포인트 배열과 프레임 인덱스만 돌려줍니다.
+# - 결과는 워커 수와 관계없이 제출 순서(= 프레임 순서)대로 내보냅니다. 각 프레임의 결과는 그 프레임에만
+#   의존하므로 결과도 워커 수와 무관하게 같습니다.
+# - 결과를 기다리는 동안 RESULT_POLL_INTERVAL 초마다 워커가 살아 있는지 확인합니다. 워커가 죽으면(OOM, readNet 의
+#   크래시 등) 그 워커의 작업은 영영 돌아오지 않으므로, 남은 워커를 정리하고 공유 메모리를 해제한 뒤
+#   PoseWorkerDied 를 던집니다. get_extractor 는 다음 작업에서 새 워커들을 띄웁니다.
+
+RESULT_POLL_INTERVAL = 1.0
+
+
+class PoseWorkerDied(RuntimeError):
+    pass
+
+
+def _worker_main(tasks, results, threads):
+    # 자식 프로세스는 부모의 fd 1 을 물려받습니다 (CLI 의 --stream 에서는 NDJSON 출력). 네트워크를 읽기 전에
+    # print 와 네이티브 코드(Caffe/OpenCV 로그)의 stdout 출력을 모두 stderr 로 돌려 프로토콜이 깨지지 않게 합니다.
+    sys.stdout.flush()
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    cv2 = lazy_import("cv2")
+    np = lazy_import("numpy")
+    from multiprocessing import shared_memory
+    from .pose import detect_keypoint_array
+
+    cv2.setNumThreads(threads)
+    attached = {}
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        name, offset, shape, size, seq, frame_index = task
+        try:
+            shm = attached.get(name)
+            if shm is None:
+                for old in attached.values():
+                    old.close()
+                attached = {name: shared_memory.SharedMemory(name=name)}
+                shm = attached[name]
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+            keypoints = detect_keypoint_array(frame, size)
+            del frame
+            results.put((seq, frame_index, keypoints, None))
+        except Exception as e:
+            results.put((seq, frame_index, None, f"{type(e).__name__}: {e}"))
+    for shm in attached.values():
+        shm.close()
+
+
+class ParallelPoseExtractor:
+    def __init__(self, workers, slots=None, threads_per_worker=1):
+        import multiprocessing
+
+        ctx = multiprocessing.get_context("spawn")
+        self.workers = workers
+        self.slots = slots or 2 * workers
+        self.tasks = ctx.Queue()
+        self.results = ctx.Queue()
+        self.processes = [
+            ctx.Process(target=_worker_main, args=(self.tasks, self.results, threads_per_worker), daemon=True)
+            for _ in range(workers)
+        ]
+        for process in self.processes:
+            process.start()
+        self.shm = None
+        self.slot_bytes = 0
+        self.free = list(range(self.slots))
+        self.in_flight = {}
+        # imap 을 중첩해서 써도(1차 패스 도중 2차 패스) 결과가 섞이지 않도록 스트림별로 받아 둡니다.
+        self.mailbox = {}
+        self.next_stream = 0
+        self.broken = False
+
+    def _ensure_ring(self, nbytes):
+        if nbytes <= self.slot_bytes:
+            return
+        from multiprocessing import shared_memory
+
+        # 진행 중인 작업을 모두 받은 뒤 링을 다시 만듭니다.
+        while self.in_flight:
+            self._collect()
+        self._release_ring()
+        self.shm = shared_memory.SharedMemory(create=True, size=nbytes * self.slots)
+        self.slot_bytes = nbytes
+
+    def _release_ring(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+            self.slot_bytes = 0
+
+    def _submit(self, stream, seq, frame_index, frame, size):
+        np = lazy_import("numpy")
+
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        self._ensure_ring(frame.nbytes)
+        while not self.free:
+            self._collect()
+        slot = self.free.pop()
+        offset = slot * self.slot_bytes
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf, offset=offset)
+        view[...] = frame
+        del view
+        self.tasks.put((self.shm.name, offset, frame.shape, size, (stream, seq), frame_index))
+        self.in_flight[(stream, seq)] = slot
+
+    def _collect(self):
+        import queue
+
+        while True:
+            try:
+                key, frame_index, keypoints, error = self.results.get(timeout=RESULT_POLL_INTERVAL)
+                break
+            except queue.Empty:
+                dead = [process for process in self.processes if not process.is_alive()]
+                if dead:
+                    exitcodes = ", ".join(str(process.exitcode) for process in dead)
+                    self.terminate()
+                    raise PoseWorkerDied(f"{len(dead)} pose worker(s) exited unexpectedly (exit code {exitcodes})")
+        self.free.append(self.in_flight.pop(key))
+        stream, seq = key
+        if stream in self.mailbox:
+            self.mailbox[stream][seq] = (frame_index, keypoints, error)
+
+    def imap(self, indexed_frames, size):
+        # (frame_index, frame) 를 받아 (frame_index, keypoints) 를 입력 순서대로 내보냅니다.
+        # 소비자가 중간에 멈추면(임팩트 프레임을 찾은 경우 등) 남은 결과는 버립니다.
+        stream = self.next_stream
+        self.next_stream += 1
+        done = self.mailbox[stream] = {}
+
+        frames = iter(indexed_frames)
+        next_seq = 0
+        next_yield = 0
+        exhausted = False
+        try:
+            while True:
+                # 이 스트림이 슬롯을 다 차지하지 않도록 작업자 수의 두 배까지만 앞서 제출합니다.
+                while not exhausted and next_seq - next_yield < self.slots:
+                    try:
+                        frame_index, frame = next(frames)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    self._submit(stream, next_seq, frame_index, frame, size)
+                    next_seq += 1
+
+                if exhausted and next_yield == next_seq:
+                    break
+                if next_yield not in done:
+                    self._collect()
+                    continue
+                frame_index, keypoints, error = done.pop(next_yield)
+                if error is not None:
+                    raise RuntimeError(f"pose worker failed on frame {frame_index}: {error}")
+                yield frame_index, keypoints
+                next_yield += 1
+        finally:
+            del self.mailbox[stream]
+
+    def terminate(self):
+        # 워커가 죽은 뒤의 정리: 남은 워커를 바로 멈추고 공유 메모리를 해제합니다. 이 추출기는 다시 쓰지 않습니다.
+        self.broken = True
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            process.join(timeout=10)
+        self.in_flight.clear()
+        self._release_ring()
+
+    def close(self):
+        if self.broken:
+            return
+        for _ in self.processes:
+            self.tasks.put(None)
+        for process in self.processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self._release_ring()
+
+
+_extractors = {}
+
+
+def get_extractor(workers=config.POSE_WORKERS):
+    # 상주 워커에서는 작업 사이에 프로세스와 네트워크를 재사용합니다.
+    extractor = _extractors.get(workers)
+    if extractor is None or extractor.broken:
+        extractor = ParallelPoseExtractor(workers)
+        _extractors[workers] = extractor
+    return extractor
+
+
+@atexit.register
+def close_extractors():
+    for extractor in _extractors.values():
+        extractor.close()
+    _extractors.clear()
@@ -0,0 +1,223 @@
+from .classifier import classify
+from .features import PoseAngles
+from .feedback import build_feedback
+from . import cache, config, progress
+from .jobs import JobPaths, prune_jobs
+from .impact import find_impact_index, find_perpendicular_frame, find_perpendicular_frame_coarse_to_fine
+from .pose import preset_sizes, resize_for_inference, detect_keypoint_array, keypoints_to_points, draw_skeleton
+from .report import save_results_to_json, save_results_to_html, publish_report
+from .scoring import calculate_scores
+from .timeseries import (get_keypoint_series, iter_keypoint_series, probe_fps, prune_series, series_meta,
+                         series_settings, shared_series_location, timestamp_ms)
+from .video import open_video, open_frame_reader, get_frame_count, probe_frame_count, read_frame
+
+# 단계들을 묶은 전체 분석 파이프라인
+
+
+def analyze_frame(image, max_side=config.MAX_INPUT_SIDE):
+    image = resize_for_inference(image, max_side)
+    keypoints = detect_keypoint_array(image)
+    draw_skeleton(image, keypoints_to_points(keypoints))
+
+    features = PoseAngles.from_keypoints(keypoints)
+    if features.empty:
+        return image, None
+
+    return image, classify(features)
+
+
+def extract_impact_frame(video_path, impact_mode="middle", seek_method="seek",
+                         scan_stride=config.SCAN_STRIDE, scan_coarse_size=config.SCAN_COARSE_INPUT_SIZE,
+                         scan_size=config.SCAN_INPUT_SIZE,
+                         pose_workers=config.POSE_WORKERS, frame_source=config.FRAME_SOURCE,
+                         save_keypoints=config.SAVE_KEYPOINTS, tracking=config.TRACKING,
+                         player_roi=config.PLAYER_ROI, max_side=config.MAX_INPUT_SIDE, paths=None):
+    if save_keypoints:
+        # 영상 전체의 키포인트 시계열을 저장(또는 재사용)하고, 임팩트 프레임도 시계열에서 찾습니다.
+        # 작업 id 가 있으면 작업끼리 함께 쓰는 공유 위치의 시계열을 씁니다.
+        paths = paths or JobPaths()
+        location = {"path": paths.keypoints, "meta_path": paths.keypoints_meta}
+        if paths.job_id is not None:
+            settings = series_settings(scan_size, frame_source, tracking, player_roi, max_side)
+            location = shared_series_location(video_path, settings)
+            paths.link_series(location["path"], location["meta_path"])
+        keypoints, _ = get_keypoint_series(video_path, scan_size, workers=pose_workers, frame_source=frame_source,
+                                           tracking=tracking, player_roi=player_roi, max_side=max_side, **location)
+        if keypoints is None:
+            return None
+        if impact_mode == "perpendicular":
+            impact_frame_index = find_impact_index(keypoints)
+            if impact_frame_index is None:
+                return None
+            print(f"Captured impact frame at {impact_frame_index}")
+            cap = open_video(video_path)
+            if cap is None:
+                return None
+            try:
+                return read_frame(cap, video_path, impact_frame_index, seek_method)
+            finally:
+                cap.release()
+
+    if impact_mode == "perpendicular":
+        if tracking:
+            # 추적은 모든 프레임을 순서대로 봐야 하므로 coarse-to-fine 대신 전체 스캔으로 찾습니다.
+            return find_perpendicular_frame(video_path, scan_size, workers=pose_workers,
+                                            frame_source=frame_source, tracking=True, max_side=max_side)
+        if scan_stride > 1:
+            impact_frame, _ = find_perpendicular_frame_coarse_to_fine(video_path, scan_stride, scan_coarse_size,
+                                                                      scan_size,
+                                                                      workers=pose_workers,
+                                                                      frame_source=frame_source,
+                                                                      player_roi=player_roi,
+                                                                      max_side=max_side)
+            return impact_frame
+        return find_perpendicular_frame(video_path, scan_size, workers=pose_workers, frame_source=frame_source,
+                                        player_roi=player_roi, max_side=max_side)
+
+    progress.current().stage("decode")
+    cap = open_video(video_path)
+    if cap is None:
+        return None
+
+    try:
+        impact_frame_index = get_frame_count(cap) // 2
+        return read_frame(cap, video_path, impact_frame_index, seek_method)
+    finally:
+        cap.release()
+
+
+def process_video(video_path, impact_mode="middle", resolution=config.RESOLUTION, **scan_options):
+    # resolution 프리셋(config.RESOLUTION_PRESETS)이 입력 크기들을 정합니다. scan_size 등을 직접 주면 그 값이 우선합니다.
+    # ffmpeg 소스가 스캔 중에 줄인 프레임이 그대로 analyze_frame 에 들어가므로 같은 max_side 로 줄이게 합니다.
+    max_side, scan_size, scan_coarse_size = preset_sizes(resolution)
+    scan_options.setdefault("scan_size", scan_size)
+    scan_options.setdefault("scan_coarse_size", scan_coarse_size)
+    impact_frame = extract_impact_frame(video_path, impact_mode, max_side=max_side, **scan_options)
+
+    if impact_frame is not None:
+        progress.current().stage("pose")
+        result_image, result = analyze_frame(impact_frame, max_side)
+        if result is not None:
+            print(result.head())  # 분석 결과 앞부분 출력
+            return result_image, result
+        else:
+            print("검출된 관절 쌍이 없어 자세를 분류하지 못했습니다.")
+            return None, None
+    else:
+        print("임팩트 지점 프레임을 추출하지 못했습니다.")
+        return None, None
+
+
+def run_analysis(video_path, impact_mode="middle", use_cache=config.CACHE_ENABLED, job_id=None, **scan_options):
+    # 한 영상을 분석해 result.json / result.html 을 만들고 JSON 레코드를 반환합니다.
+    # CLI와 상주 워커가 함께 사용합니다. 같은 영상/모델/옵션의 결과가 캐시에 있으면 분석을 건너뜁니다.
+    # job_id 가 있으면 모든 출력을 그 작업의 디렉토리에 씁니다 (tennis_teacher.jobs).
+    # 영상을 열 수 없으면 디렉토리를 만들기 전에 ValueError. 분석에 실패하면(None 또는 예외) 작업 디렉토리를 지웁니다.
+    cap = open_video(video_path)
+    if cap is None:
+        raise ValueError(f"could not open video: {video_path}")
+    cap.release()
+
+    paths = JobPaths(job_id)
+    paths.makedirs()
+    if job_id is not None:
+        prune_jobs()
+        prune_series()
+    try:
+        records = _run_analysis(paths, video_path, impact_mode, use_cache, scan_options)
+    except BaseException:
+        paths.remove()
+        raise
+    if records is None:
+        paths.remove()
+    return records
+
+
+def _run_analysis(paths, video_path, impact_mode, use_cache, scan_options):
+    save_keypoints = scan_options.get("save_keypoints", config.SAVE_KEYPOINTS)
+    cache_key = cache.analysis_key(video_path, impact_mode, scan_options) if use_cache else None
+    if cache_key is not None:
+        progress.current().stage("cache")
+        records = cache.restore(cache_key, video_path, want_series=save_keypoints, paths=paths)
+        if records is not None:
+            print(f"같은 영상의 분석 결과를 캐시에서 불러왔습니다 ({cache_key[:12]}).")
+            publish_report(paths.result_html, paths.public_result_html)
+            progress.current().stage("done")
+            return records
+
+    result_image, result = process_video(video_path, impact_mode, paths=paths, **scan_options)
+
+    if result_image is None or result is None:
+        print("임팩트 지점 프레임을 추출하지 못했습니다.")
+        return None
+
+    progress.current().stage("report")
+    save_results_to_json(result, paths.result_json)
+    records = result.to_records()
+    feedback_list = build_feedback(result)
+
+    report_id = save_results_to_html(result_image, result, feedback_list, paths.result_html,
+                                     temp_path=paths.temp_result_html)
+    paths.record_report(report_id)
+    print(f"분석 결과가 {paths.output_dir} 의 result.json 및 result.html 파일에 저장되었습니다.")
+    publish_report(paths.result_html, paths.public_result_html)
+    if cache_key is not None:
+        cache.store(cache_key, result.keypoints, series=save_keypoints, report_id=report_id, paths=paths)
+    progress.current().stage("done")
+    return records
+
+
+def frame_record(frame_index, keypoints, fps=None):
+    # 한 프레임의 키포인트, 각도별 분류 결과(PoseAngles.to_records, 유효한 쌍만)와 평균 점수
+    features = PoseAngles.from_keypoints(keypoints)
+    score = None
+    if not features.empty:
+        classify(features)
+        score = round(float(calculate_scores(features)), 2)
+    return {
+        "type": "frame",
+        "frame": frame_index,
+        "timestamp_ms": timestamp_ms(frame_index, fps),
+        "keypoints": [[round(x, 1), round(y, 1), round(conf, 3)] for x, y, conf in keypoints.tolist()],
+        "angles": features.to_records(),
+        "score": score,
+    }
+
+
+def iter_frame_results(video_path, resolution=config.RESOLUTION, pose_workers=config.POSE_WORKERS,
+                       frame_source=config.FRAME_SOURCE, tracking=config.TRACKING, player_roi=config.PLAYER_ROI):
+    # 영상 전체를 프레임 순서대로 분석하며 결과를 계산되는 대로 내보냅니다 (제너레이터, JSON 으로 바로 직렬화 가능).
+    #   {"type": "meta", ...}    첫 프레임을 추론한 뒤 한 번: fps, 프레임 수(추정), 키포인트 좌표계 크기 등
+    #   {"type": "frame", ...}   프레임마다 (frame_record)
+    #   {"type": "end", "frames": n}
+    # 임팩트 프레임 하나만 보는 run_analysis 와 달리 보고서/캐시는 만들지 않습니다. 영상을 열 수 없으면 ValueError.
+    max_side, scan_size, _ = preset_sizes(resolution)
+    reader = open_frame_reader(video_path, frame_source, max_side=max_side)
+    if reader is None:
+        raise ValueError(f"could not open video: {video_path}")
+    fps = probe_fps(video_path)
+    total_frames = probe_frame_count(video_path)
+    frame_size = []
+
+    def meta_record():
+        meta = series_meta(video_path, fps, frame_size, scan_size, frame_source, tracking, player_roi, max_side)
+        return {"type": "meta", "total_frames": total_frames, **meta}
+
+    count = 0
+    progress.current().stage("stream", total_frames)
+    series = iter_keypoint_series(reader, scan_size, workers=pose_workers, tracking=tracking,
+                                  player_roi=player_roi, frame_size=frame_size)
+    try:
+        for frame_index, keypoints in series:
+            if not count:
+                yield meta_record()
+            count += 1
+            yield frame_record(frame_index, keypoints, fps)
+    finally:
+        # 소비자가 중간에 멈춰도 디코더 스레드를 먼저 멈춘 뒤 리더를 닫습니다.
+        series.close()
+        reader.close()
+    if not count:
+        yield meta_record()
+    progress.current().stage("done")
+    yield {"type": "end", "frames": count}
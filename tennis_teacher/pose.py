@@ -0,0 +1,218 @@
+from . import config
+from .body import BODY_PARTS, POSE_PAIRS, NUM_KEYPOINTS
+from .models import get_net
+from .profiling import lazy_import
+
+# 포즈 추론 단계: 입력 크기 조정, DNN forward, 히트맵에서 키포인트 추출
+#
+# 여러 프레임은 detect_keypoints_batch 로 하나의 NCHW blob(blobFromImages) 을 만들어 한 번에 forward 합니다.
+# 키포인트는 (N, 15, H*W) 로 펼친 히트맵의 argmax 로 한꺼번에 구하고, 신뢰도 기준은 마스크로 적용합니다.
+
+
+def preset_sizes(resolution=config.RESOLUTION):
+    # 해상도 프리셋 → (analyze_frame 최대 변, 스캔 입력 크기, 1차 패스 입력 크기).
+    # 설정된 프리셋이면 개별 환경 변수까지 반영된 config 값을 그대로 씁니다.
+    if resolution == config.RESOLUTION:
+        return config.MAX_INPUT_SIDE, config.SCAN_INPUT_SIZE, config.SCAN_COARSE_INPUT_SIZE
+    if resolution not in config.RESOLUTION_PRESETS:
+        raise ValueError(f"unknown resolution preset: {resolution} (choose from {', '.join(config.RESOLUTION_PRESETS)})")
+    preset = config.RESOLUTION_PRESETS[resolution]
+    scan_side = preset["scan_input_size"]
+    coarse_side = preset["scan_coarse_size"]
+    return preset["max_input_side"], (scan_side, scan_side), (coarse_side, coarse_side)
+
+
+def resize_for_inference(image, max_side=config.MAX_INPUT_SIDE):
+    cv2 = lazy_import("cv2")
+    height, width = image.shape[:2]
+
+    if width > height:
+        scale = max_side / width
+    else:
+        scale = max_side / height
+
+    new_width = int(width * scale)
+    new_height = int(height * scale)
+
+    return cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_AREA)
+
+
+def run_pose_net(image, size=None):
+    # size 를 주지 않으면 이미지 크기 그대로 네트워크에 넣습니다.
+    cv2 = lazy_import("cv2")
+    if size is None:
+        imageHeight, imageWidth = image.shape[:2]
+        size = (imageWidth, imageHeight)
+
+    inpBlob = cv2.dnn.blobFromImage(image, 1.0 / 255, size, (0, 0, 0), swapRB=False, crop=False)
+    net = get_net()
+    net.setInput(inpBlob)
+    return net.forward()
+
+
+def run_pose_net_batch(images, size):
+    # 모든 이미지를 size 로 맞춰 (N, 3, h, w) blob 하나로 forward 합니다.
+    cv2 = lazy_import("cv2")
+    inpBlob = cv2.dnn.blobFromImages(images, 1.0 / 255, size, (0, 0, 0), swapRB=False, crop=False)
+    net = get_net()
+    net.setInput(inpBlob)
+    return net.forward()
+
+
+def extract_keypoint_arrays(output, sizes, subpixel=config.KEYPOINT_SUBPIXEL):
+    # 네트워크 출력 (N, C, H, W) 에서 파트별 히트맵 최댓값을 한 번의 argmax 로 찾아
+    # 각 이미지의 (width, height) 좌표계로 변환한 (N, 15, 3) float32 배열 [x, y, 신뢰도] 을 반환합니다.
+    # 최댓값이 여러 개면 cv2.minMaxLoc 처럼 행 우선으로 첫 위치를 고릅니다.
+    np = lazy_import("numpy")
+    heatmaps = output[:, :NUM_KEYPOINTS]
+    N, K, H, W = heatmaps.shape
+    flat = heatmaps.reshape(N, K, H * W)
+    peak = flat.argmax(axis=2)
+    prob = np.take_along_axis(flat, peak[..., None], axis=2)[..., 0]
+    py, px = np.divmod(peak, W)
+
+    x = px.astype(np.float64)
+    y = py.astype(np.float64)
+    if subpixel:
+        dx, dy = _subpixel_offsets(heatmaps, py, px)
+        x += dx
+        y += dy
+
+    sizes = np.asarray(sizes, dtype=np.float64).reshape(N, 2)
+    keypoints = np.empty((N, K, 3), dtype=np.float32)
+    keypoints[..., 0] = sizes[:, :1] * x / W
+    keypoints[..., 1] = sizes[:, 1:] * y / H
+    keypoints[..., 2] = prob
+    return keypoints
+
+
+def _subpixel_offsets(heatmaps, py, px):
+    # 최댓값과 좌우/상하 이웃 값에 포물선을 맞춰 꼭짓점까지의 오프셋(-0.5 ~ 0.5)을 구합니다.
+    # 가장자리이거나 봉우리가 아니면(곡률이 음수가 아니면) 0.
+    np = lazy_import("numpy")
+    H, W = heatmaps.shape[2:]
+    n, k = np.indices(py.shape)
+    center = heatmaps[n, k, py, px].astype(np.float64)
+
+    def offset(before, after, inside):
+        before = before.astype(np.float64)
+        after = after.astype(np.float64)
+        curvature = before - 2.0 * center + after
+        valid = inside & (curvature < 0)
+        safe = np.where(valid, curvature, -1.0)
+        return np.where(valid, np.clip(0.5 * (before - after) / safe, -0.5, 0.5), 0.0)
+
+    dx = offset(heatmaps[n, k, py, np.maximum(px - 1, 0)], heatmaps[n, k, py, np.minimum(px + 1, W - 1)],
+                (px > 0) & (px < W - 1))
+    dy = offset(heatmaps[n, k, np.maximum(py - 1, 0), px], heatmaps[n, k, np.minimum(py + 1, H - 1), px],
+                (py > 0) & (py < H - 1))
+    return dx, dy
+
+
+def extract_keypoint_array(output, width, height, index=0):
+    # output 의 index 번째 이미지에 대한 (15, 3) float32 배열 [x, y, 신뢰도]
+    return extract_keypoint_arrays(output[index:index + 1], [(width, height)])[0]
+
+
+def keypoint_mask(keypoints, threshold=config.KEYPOINT_THRESHOLD):
+    # 신뢰도가 threshold 보다 큰 키포인트 (..., 15) bool 배열.
+    # cv2.minMaxLoc 처럼 double 로 비교합니다 (float32 로 비교하면 0.1 과 같은 값의 판정이 달라짐).
+    np = lazy_import("numpy")
+    return keypoints[..., 2] > np.float64(threshold)
+
+
+def keypoints_to_points(keypoints, threshold=config.KEYPOINT_THRESHOLD):
+    # (15, 3) 배열을 예전 형식의 목록으로: 신뢰도가 threshold 보다 크면 (int x, int y), 아니면 None
+    np = lazy_import("numpy")
+    coords = keypoints[:, :2].astype(np.int32)
+    return [tuple(xy) if visible else None
+            for xy, visible in zip(coords.tolist(), keypoint_mask(keypoints, threshold).tolist())]
+
+
+def extract_keypoints(output, width, height, threshold=config.KEYPOINT_THRESHOLD, index=0):
+    # 각 파트의 히트맵 최댓값 위치를 (width, height) 좌표계로 변환합니다. 신뢰도가 낮으면 None.
+    return keypoints_to_points(extract_keypoint_array(output, width, height, index), threshold)
+
+
+def detect_keypoint_array(image, size=None):
+    imageHeight, imageWidth = image.shape[:2]
+    output = run_pose_net(image, size)
+    return extract_keypoint_array(output, imageWidth, imageHeight)
+
+
+def detect_keypoints(image, size=None):
+    imageHeight, imageWidth = image.shape[:2]
+    output = run_pose_net(image, size)
+    return extract_keypoints(output, imageWidth, imageHeight)
+
+
+def detect_keypoint_arrays_batch(images, size, batch_size=config.POSE_BATCH_SIZE):
+    # 프레임별 키포인트를 입력 순서대로 (N, 15, 3) float32 배열로 반환합니다. 프레임 크기는 서로 달라도 됩니다.
+    np = lazy_import("numpy")
+    chunks = []
+    for start in range(0, len(images), batch_size):
+        chunk = images[start:start + batch_size]
+        output = run_pose_net_batch(chunk, size)
+        chunks.append(extract_keypoint_arrays(output, [image.shape[1::-1] for image in chunk]))
+    if not chunks:
+        return np.empty((0, NUM_KEYPOINTS, 3), dtype=np.float32)
+    return np.concatenate(chunks)
+
+
+def detect_keypoints_batch(images, size, batch_size=config.POSE_BATCH_SIZE):
+    # 프레임별 키포인트 목록을 입력 순서대로 반환합니다.
+    return [keypoints_to_points(keypoints) for keypoints in detect_keypoint_arrays_batch(images, size, batch_size)]
+
+
+def iter_keypoint_arrays(indexed_frames, size, batch_size=config.POSE_BATCH_SIZE, workers=config.POSE_WORKERS,
+                         roi=None):
+    # (index, frame) 들을 받아 (index, frame, (15, 3) 키포인트 배열) 을 입력 순서대로 내보냅니다.
+    # workers > 1 이면 워커 프로세스들이 추론하고, 프레임은 공유 메모리로만 넘기므로 frame 자리는 None 입니다.
+    # roi(roi.PlayerRoi) 를 주면 앞 배치의 선수 영역만 잘라 추론합니다. 배치 순서에 의존하므로 workers == 1 일 때만 씁니다.
+    if workers > 1:
+        from .parallel import get_extractor
+        for frame_index, keypoints in get_extractor(workers).imap(indexed_frames, size):
+            yield frame_index, None, keypoints
+        return
+
+    batch = []
+    for item in indexed_frames:
+        batch.append(item)
+        if len(batch) < batch_size:
+            continue
+        yield from _detect_batch(batch, size, roi)
+        batch = []
+    if batch:
+        yield from _detect_batch(batch, size, roi)
+
+
+def _detect_batch(batch, size, roi=None):
+    frames = [frame for _, frame in batch]
+    if roi is not None:
+        all_keypoints = roi.detect_batch(frames)
+    else:
+        all_keypoints = detect_keypoint_arrays_batch(frames, size, len(batch))
+    for (frame_index, frame), keypoints in zip(batch, all_keypoints):
+        yield frame_index, frame, keypoints
+
+
+def iter_keypoints(indexed_frames, size, batch_size=config.POSE_BATCH_SIZE, workers=config.POSE_WORKERS, roi=None):
+    # iter_keypoint_arrays 와 같지만 키포인트를 예전 형식의 목록으로 내보냅니다.
+    for frame_index, frame, keypoints in iter_keypoint_arrays(indexed_frames, size, batch_size, workers, roi):
+        yield frame_index, frame, keypoints_to_points(keypoints)
+
+
+def draw_skeleton(image, points):
+    cv2 = lazy_import("cv2")
+    for i, point in enumerate(points):
+        if point:
+            cv2.circle(image, point, 3, (0, 255, 255), thickness=-1, lineType=cv2.FILLED)
+            cv2.putText(image, "{}".format(i), point, cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1, lineType=cv2.LINE_AA)
+
+    for partFrom, partTo in POSE_PAIRS:
+        idFrom = BODY_PARTS[partFrom]
+        idTo = BODY_PARTS[partTo]
+        if points[idFrom] and points[idTo]:
+            cv2.line(image, points[idFrom], points[idTo], (0, 255, 0), 2)
+
+    return image
@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+import argparse
+import importlib
+from contextlib import contextmanager
+
+# 시작 시간 프로파일링
+#
+# 무거운 의존성(cv2, pandas, jinja2, joblib/sklearn)은 필요한 단계에서 lazy_import 로 가져옵니다.
+# TENNIS_TEACHER_PROFILE_STARTUP=1 (또는 CLI 의 --profile-startup) 이면 각 import 와 초기화 단계의
+# 소요 시간을 기록해 종료 시 stderr 로 출력합니다.
+#
+# `python -m tennis_teacher.profiling --budget 1.5` 는 CLI 의 콜드 스타트 시간을 재고
+# 예산을 넘으면 0 이 아닌 코드로 종료합니다. tests/test_startup.py 도 같은 예산(TENNIS_TEACHER_STARTUP_BUDGET)으로 검사합니다.
+
+PROFILE_ENV = "TENNIS_TEACHER_PROFILE_STARTUP"
+BUDGET_ENV = "TENNIS_TEACHER_STARTUP_BUDGET"
+DEFAULT_BUDGET = 1.0
+
+_process_start = time.perf_counter()
+_records = []
+
+
+def is_enabled():
+    return os.environ.get(PROFILE_ENV) == "1"
+
+
+def enable():
+    os.environ[PROFILE_ENV] = "1"
+
+
+@contextmanager
+def timed(name):
+    if not is_enabled():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _records.append((name, start - _process_start, time.perf_counter() - start))
+
+
+def lazy_import(name):
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with timed(f"import {name}"):
+        return importlib.import_module(name)
+
+
+def report(stream=None):
+    stream = stream or sys.stderr
+    total = time.perf_counter() - _process_start
+    print("startup profile (inclusive seconds):", file=stream)
+    for name, offset, duration in _records:
+        print(f"  {offset:8.3f}  {duration:8.3f}  {name}", file=stream)
+    print(f"  {'':8}  {total:8.3f}  total", file=stream)
+
+
+def measure_cold_start(argv, runs=3):
+    # 새 인터프리터로 CLI 를 실행해 (가장 짧은 실행 시간, 마지막 실행의 CompletedProcess) 를 반환합니다.
+    # 종료 코드와 출력도 돌려주므로, import 단계에서 죽어 빨리 끝난 실행을 예산 통과로 오인하지 않게 검사할 수 있습니다.
+    import subprocess
+
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH")]))
+    best = None
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-m", "tennis_teacher"] + list(argv), env=env,
+                                capture_output=True, text=True, check=False)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the analysis CLI cold-start time against a budget.")
+    parser.add_argument("--budget", type=float, default=float(os.environ.get(BUDGET_ENV, DEFAULT_BUDGET)),
+                        help=f"seconds (default: ${BUDGET_ENV} or {DEFAULT_BUDGET})")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("cli_args", nargs="*", default=["/nonexistent/video.mp4"],
+                        help="arguments passed to the CLI (default: a missing video, i.e. the error path)")
+    args = parser.parse_args(argv)
+
+    elapsed, result = measure_cold_start(args.cli_args, args.runs)
+    status = "OK" if elapsed <= args.budget else "OVER BUDGET"
+    print(f"cold start {elapsed:.3f}s (budget {args.budget:.3f}s, exit code {result.returncode}): {status}")
+    return 0 if elapsed <= args.budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
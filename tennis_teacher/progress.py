@@ -0,0 +1,126 @@
+import time
+from contextlib import contextmanager
+
+from . import config
+
+# 분석 진행 상황
+#
+# 파이프라인은 단계가 바뀔 때와 프레임 루프를 돌 때 current() 의 진행 상황을 갱신하고, 갱신된 내용은
+# 다음과 같은 레코드로 sink(함수)에 전달됩니다. sink 가 없으면(기본) 기록만 하고 아무것도 내보내지 않습니다.
+#   {"stage": "scan", "frames_decoded": 120, "frames_inferred": 24, "total_frames": 300,
+#    "fps": 11.8, "decode_fps": 59.0, "elapsed_s": 2.03, "eta_s": 3.05, "percent": 36.0}
+# - frames_decoded: 디코더가 지나간 프레임 수 (stride 로 건너뛴 프레임 포함), frames_inferred: 포즈를 구한 프레임 수
+# - fps 는 포즈 처리량, eta_s 는 남은 프레임을 지금까지의 디코딩 속도로 나눈 값입니다. 임팩트 프레임을 찾으면 스캔이
+#   일찍 끝나므로 상한에 가깝습니다.
+# - percent 는 전체 분석 기준으로, 프레임 루프 단계(FRAME_STAGES)가 자기 구간을 프레임 비율로 채웁니다. 단계 순서는 모드마다
+#   다르므로(키포인트 시계열을 저장하면 scan 뒤에 decode) 한 번의 분석 안에서는 줄어들지 않게 합니다.
+# 상주 워커는 요청마다 reporting(sink) 로 워커 프로토콜의 progress 메시지를 보내고, CLI 는 --progress 로 stderr 에 씁니다.
+# 프레임 루프에서 부르는 frame_decoded/frame_inferred 는 값만 바꾸고 PROGRESS_INTERVAL 초에 한 번만 내보냅니다.
+
+# 단계별 전체 진행률(%) 구간의 시작
+STAGE_PERCENT = {
+    "start": 0.0,
+    "cache": 0.0,
+    "decode": 0.0,
+    "scan": 0.0,
+    "stream": 0.0,
+    "pose": 90.0,
+    "report": 95.0,
+    "done": 100.0,
+}
+# 프레임 비율로 채우는 단계와 그 구간의 끝. stream 은 프레임별 결과를 내보내는 모드(pipeline.iter_frame_results)입니다.
+FRAME_STAGES = {"scan": STAGE_PERCENT["pose"], "stream": 100.0}
+
+
+class Progress:
+    def __init__(self, sink=None, interval=config.PROGRESS_INTERVAL):
+        self.sink = sink
+        self.interval = interval
+        self.stage_name = "start"
+        self.total_frames = None
+        self.frames_decoded = 0
+        self.frames_inferred = 0
+        self.started = time.perf_counter()
+        self.stage_started = self.started
+        self.last_emit = 0.0
+        self.percent = 0.0
+
+    def stage(self, name, total_frames=None):
+        # 새 단계를 시작하고 바로 내보냅니다. 프레임 수는 단계마다 새로 셉니다.
+        self.stage_name = name
+        self.total_frames = total_frames
+        self.frames_decoded = 0
+        self.frames_inferred = 0
+        self.stage_started = time.perf_counter()
+        self.emit()
+
+    def frame_decoded(self, count):
+        # 디코더가 지금까지 지나간 프레임 수 (누적 값)
+        self.frames_decoded = count
+
+    def frame_inferred(self, count=1):
+        self.frames_inferred += count
+        if time.perf_counter() - self.last_emit >= self.interval:
+            self.emit()
+
+    def record(self):
+        now = time.perf_counter()
+        elapsed = now - self.stage_started
+        fps = self.frames_inferred / elapsed if elapsed > 0 else None
+        decode_fps = self.frames_decoded / elapsed if elapsed > 0 else None
+        eta = None
+        percent = STAGE_PERCENT.get(self.stage_name, 0.0)
+        if self.total_frames:
+            done = min(1.0, self.frames_decoded / self.total_frames)
+            if decode_fps:
+                eta = max(0.0, (self.total_frames - self.frames_decoded) / decode_fps)
+            if self.stage_name in FRAME_STAGES:
+                percent += done * (FRAME_STAGES[self.stage_name] - percent)
+        self.percent = max(self.percent, percent)
+        return {
+            "stage": self.stage_name,
+            "frames_decoded": self.frames_decoded,
+            "frames_inferred": self.frames_inferred,
+            "total_frames": self.total_frames,
+            "fps": None if fps is None else round(fps, 2),
+            "decode_fps": None if decode_fps is None else round(decode_fps, 2),
+            "elapsed_s": round(now - self.started, 3),
+            "eta_s": None if eta is None else round(eta, 2),
+            "percent": round(self.percent, 1),
+        }
+
+    def emit(self):
+        self.last_emit = time.perf_counter()
+        if self.sink is not None:
+            self.sink(self.record())
+
+
+_current = Progress()
+
+
+def current():
+    return _current
+
+
+@contextmanager
+def reporting(sink, interval=config.PROGRESS_INTERVAL):
+    # with 블록 안에서 current() 의 갱신을 sink 로 보냅니다.
+    global _current
+    previous = _current
+    _current = Progress(sink, interval)
+    try:
+        yield _current
+    finally:
+        _current = previous
+
+
+def format_record(record):
+    # CLI 출력용 한 줄
+    text = f"Progress: {record['percent']:.0f}% ({record['stage']}"
+    if record["total_frames"]:
+        text += f" {record['frames_decoded']}/{record['total_frames']} frames"
+    if record["fps"]:
+        text += f", {record['fps']:.1f} fps"
+    if record["eta_s"] is not None and record["stage"] in FRAME_STAGES:
+        text += f", ETA {record['eta_s']:.0f}s"
+    return text + ")"
@@ -0,0 +1,314 @@
+import os
+import json
+import base64
+import shutil
+import hashlib
+import tempfile
+import functools
+from datetime import datetime
+
+from . import config
+from .profiling import lazy_import
+from .scoring import calculate_scores
+
+# 보고서 단계: result.json / result.html 저장. DNN 이나 분류 모델을 사용하지 않습니다.
+# 각도 배열(features.PoseAngles)은 여기서 처음으로 레코드(dict 목록)로 바뀝니다.
+# HTML 은 메모리에서만 만듭니다. 템플릿은 한 번만 컴파일하고, 점수 도넛 차트는 SVG 로 그리며,
+# 결과 이미지는 메모리에서 JPEG 로 인코딩합니다 (python -m benchmarks.report 참고).
+#
+# 결과 이미지, 점수 차트, 결과 데이터(JSON)는 HTML 에 base64 로 넣지 않고 REPORT_ASSETS_DIR/<보고서 id>/ 에
+# 내용 해시가 들어간 이름(frame.<해시>.jpg 등)으로 쓰고 URL 로 참조합니다. 같은 이름의 파일은 내용이 바뀌지 않으므로
+# server.js 가 immutable 캐시 헤더로 내보낼 수 있습니다. 보고서 id 도 파일 이름들의 해시라서 같은 결과는 같은 디렉토리를
+# 씁니다. REPORT_INLINE_ASSETS 이면 예전처럼 모두 HTML 안에 넣습니다.
+
+HTML_TEMPLATE = """
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <title>자세 분석 결과</title>
+        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
+        <style>
+            body { font-family: Arial, sans-serif; padding: 20px; font-weight: bold; }
+            .feedback { margin-top: 20px; font-size: 16px; font-weight: bold; }
+            .incorrect { color: red; }
+            .date { text-align: center; font-size: 20px; margin-top: 20px; }
+            h1 { font-size: 36px; font-weight: bold; text-align: center; margin-bottom: 20px; }
+            .score { font-size: 24px; font-weight: bold; text-align: center; margin-bottom: 20px; }
+            .row { display: flex; justify-content: space-around; align-items: center; }
+            .column { flex: 1; text-align: center; }
+            table { font-weight: bold; }
+            button, a.btn { margin-top: 20px; }
+            .btn-primary { background-color: #007bff; }
+            .btn-success { background-color: #007bff; }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <h1 class="my-4">자세 분석 결과</h1>
+            <div class="score">{{ current_date }}</div>
+            <div class="row">
+                <div class="column"><img src="{{ frame_src }}" alt="Analyzed Frame" class="img-fluid"/></div>
+                <div class="column">{% if score_chart_url %}<img src="{{ score_chart_url }}" alt="Score Chart" class="img-fluid"/>{% else %}{{ score_chart }}{% endif %}</div>
+            </div>
+            <table class="table table-bordered">
+                <thead>
+                    <tr>
+                        <th>From</th>
+                        <th>To</th>
+                        <th>Angle</th>
+                        <th>IsCorrect</th>
+                        <th>Score</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    {% for row in results %}
+                    <tr>
+                        <td>{{ row['From'] }}</td>
+                        <td>{{ row['To'] }}</td>
+                        <td>{{ row['Angle'] }}</td>
+                        <td class="{{ 'correct' if row['IsCorrect'] == 1 else 'incorrect' }}">{{ 'Correct' if row['IsCorrect'] == 1 else 'Incorrect' }}</td>
+                        <td>{{ row['Score'] }}</td>
+                    </tr>
+                    {% endfor %}
+                </tbody>
+            </table>
+
+            <div class="feedback">
+                <h2 class="my-4">피드백</h2>
+                {% for feedback in feedback_list %}
+                    <p class="incorrect">{{ feedback }}</p>
+                {% endfor %}
+            </div>
+
+            <button onclick="history.back()" class="btn btn-primary">뒤로가기</button>
+            <button onclick="saveResults()" class="btn btn-success">분석결과 저장하기</button>
+            {% if data_url %}<a href="{{ data_url }}" download="result.json" class="btn btn-secondary">결과 데이터(JSON)</a>{% endif %}
+        </div>
+
+        <script>
+            // 내려받은 파일은 서버 없이 열리도록 이미지/차트/결과 데이터를 data URI 로 바꿔 넣습니다.
+            function toDataUri(url) {
+                return fetch(url).then(function(response) {
+                    if (!response.ok) {
+                        throw new Error(`${url}: ${response.status}`);
+                    }
+                    return response.blob();
+                }).then(function(blob) {
+                    return new Promise(function(resolve, reject) {
+                        const reader = new FileReader();
+                        reader.onload = function() { resolve(reader.result); };
+                        reader.onerror = function() { reject(reader.error); };
+                        reader.readAsDataURL(blob);
+                    });
+                });
+            }
+
+            function saveResults() {
+                const copy = document.documentElement.cloneNode(true);
+                const targets = [];
+                copy.querySelectorAll('img[src]').forEach(function(element) { targets.push([element, 'src']); });
+                copy.querySelectorAll('a[download][href]').forEach(function(element) { targets.push([element, 'href']); });
+                Promise.all(targets.map(function([element, attribute]) {
+                    const url = element.getAttribute(attribute);
+                    if (url.startsWith('data:')) {
+                        return null;
+                    }
+                    return toDataUri(url).then(function(dataUri) { element.setAttribute(attribute, dataUri); });
+                })).then(function() {
+                    const blob = new Blob(['<!DOCTYPE html>' + copy.outerHTML], { type: 'text/html' });
+                    const link = document.createElement('a');
+                    link.href = URL.createObjectURL(blob);
+                    link.download = 'result.html';
+                    link.click();
+                    setTimeout(function() { URL.revokeObjectURL(link.href); }, 0);
+                }).catch(function(error) {
+                    alert('분석결과를 저장하지 못했습니다: ' + error.message);
+                });
+            }
+        </script>
+    </body>
+    </html>
+    """
+
+
+def save_results_to_json(features, output_path=config.RESULT_JSON_PATH):
+    results = features.to_records()
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=4)
+
+
+# 도넛 차트: 안쪽 반지름 0.7, 바깥 반지름 1.0 인 고리를 12시 방향부터 시계 방향으로 점수만큼 채웁니다.
+SCORE_CHART_TEMPLATE = (
+    '<svg xmlns="http://www.w3.org/2000/svg" viewBox="-1.1 -1.1 2.2 2.2" width="400" height="400" class="img-fluid" role="img" '
+    'aria-label="Score Chart">'
+    '<circle r="0.85" fill="none" stroke="#d3d3d3" stroke-width="0.3"/>'
+    '<circle r="0.85" fill="none" stroke="#007bff" stroke-width="0.3" pathLength="100" '
+    'stroke-dasharray="{filled:.3f} 100" transform="rotate(-90)"/>'
+    '<text x="0" y="0" text-anchor="middle" dominant-baseline="central" font-size="0.18" '
+    'font-family="Arial, sans-serif" fill="black">{score:.2f}/100</text>'
+    '</svg>'
+)
+
+
+@functools.lru_cache(maxsize=None)
+def get_template():
+    jinja2 = lazy_import("jinja2")
+    return jinja2.Template(HTML_TEMPLATE)
+
+
+def render_score_chart(total_score):
+    filled = min(max(total_score, 0.0), 100.0) if total_score == total_score else 0.0
+    return SCORE_CHART_TEMPLATE.format(filled=filled, score=total_score)
+
+
+def encode_image(image):
+    # 결과 이미지를 파일을 거치지 않고 JPEG 바이트로 만듭니다.
+    cv2 = lazy_import("cv2")
+    ok, buffer = cv2.imencode('.jpg', image)
+    if not ok:
+        raise ValueError("결과 이미지를 JPEG 로 인코딩하지 못했습니다.")
+    return buffer.tobytes()
+
+
+# server.js 가 같은 디렉토리에 만들어 두는 미리 압축한 파일
+COMPRESSED_SUFFIXES = (".br", ".gz")
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def write_report_assets(files, assets_dir=config.REPORT_ASSETS_DIR, keep=config.REPORT_ASSETS_KEEP):
+    # files: {"frame.jpg": bytes, ...} → assets_dir/<보고서 id>/frame.<해시>.jpg ... 로 쓰고
+    # (보고서 id, {"frame.jpg": "frame.<해시>.jpg", ...}) 를 반환합니다.
+    # 다른 디렉토리에서 쓴 뒤 이름을 바꾸므로 server.js 는 완성된 디렉토리만 봅니다.
+    names = {}
+    for name, data in files.items():
+        stem, ext = os.path.splitext(name)
+        names[name] = f"{stem}.{content_hash(data)}{ext}"
+    report_id = content_hash("\n".join(sorted(names.values())).encode("utf-8"))
+
+    target = os.path.join(assets_dir, report_id)
+    if os.path.isdir(target):
+        # 같은 결과가 이미 있으면 마지막 사용 시각만 갱신
+        os.utime(target)
+        return report_id, names
+
+    os.makedirs(assets_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=assets_dir, prefix=".tmp-")
+    try:
+        for name, data in files.items():
+            with open(os.path.join(staging, names[name]), "wb") as f:
+                f.write(data)
+        os.chmod(staging, 0o755)
+        try:
+            os.replace(staging, target)
+        except OSError:
+            # 동시에 같은 결과를 쓴 경우
+            if not os.path.isdir(target):
+                raise
+    finally:
+        if os.path.exists(staging):
+            shutil.rmtree(staging, ignore_errors=True)
+    prune_report_assets(keep, assets_dir)
+    return report_id, names
+
+
+def restore_report_assets(source_dir, report_id, assets_dir=config.REPORT_ASSETS_DIR,
+                          keep=config.REPORT_ASSETS_KEEP):
+    # 캐시에 복사해 둔 보고서 디렉토리를 다시 내보냅니다 (지워졌을 때만 복사).
+    files = {}
+    for name in os.listdir(source_dir):
+        if name.endswith(COMPRESSED_SUFFIXES):
+            continue
+        stem, ext = os.path.splitext(name)
+        with open(os.path.join(source_dir, name), "rb") as f:
+            files[os.path.splitext(stem)[0] + ext] = f.read()
+    restored_id, _ = write_report_assets(files, assets_dir, keep)
+    if restored_id != report_id:
+        raise ValueError(f"report assets in {source_dir} do not match report {report_id}")
+
+
+def prune_report_assets(keep=config.REPORT_ASSETS_KEEP, assets_dir=config.REPORT_ASSETS_DIR, in_use=None):
+    # 남아 있는 작업이 참조하는 보고서(jobs.referenced_reports)는 그대로 두고, 나머지 중 가장 최근에 쓴(또는 재사용한)
+    # keep 개만 남깁니다. 지운 개수를 반환.
+    if in_use is None:
+        from .jobs import referenced_reports
+        in_use = referenced_reports()
+    try:
+        entries = [entry for entry in os.scandir(assets_dir)
+                   if not entry.name.startswith(".") and entry.is_dir() and entry.name not in in_use]
+    except FileNotFoundError:
+        return 0
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in entries[keep:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+    return max(0, len(entries) - keep)
+
+
+def render_report(image, features, feedback_list, inline=config.REPORT_INLINE_ASSETS,
+                  assets_dir=config.REPORT_ASSETS_DIR, assets_url=config.REPORT_ASSETS_URL):
+    # (result.html 의 내용, 보고서 id) 를 반환합니다. inline 이면 보고서 id 는 None.
+    # 현재 날짜를 가져오기
+    current_date = datetime.now().strftime("%Y-%m-%d")
+
+    # 점수 계산 (features.scores 도 채워지므로 레코드보다 먼저)
+    total_score = calculate_scores(features)
+    results = features.to_records()
+    frame = encode_image(image)
+    score_chart = render_score_chart(total_score)
+
+    context = {"results": results, "feedback_list": feedback_list, "current_date": current_date,
+               "total_score": total_score}
+    if inline:
+        context.update(frame_src="data:image/jpeg;base64," + base64.b64encode(frame).decode("ascii"),
+                       score_chart=score_chart)
+        return get_template().render(**context), None
+
+    report_id, names = write_report_assets({
+        "frame.jpg": frame,
+        "score.svg": score_chart.encode("utf-8"),
+        "result.json": json.dumps(results, ensure_ascii=False, indent=4).encode("utf-8"),
+    }, assets_dir)
+    base_url = f"{assets_url.rstrip('/')}/{report_id}"
+    context.update(frame_src=f"{base_url}/{names['frame.jpg']}", score_chart_url=f"{base_url}/{names['score.svg']}",
+                   data_url=f"{base_url}/{names['result.json']}")
+    return get_template().render(**context), report_id
+
+
+def copy_report_assets(report_id, target_dir, assets_dir=config.REPORT_ASSETS_DIR):
+    # 보고서 디렉토리의 원본 파일들(압축본 제외)을 target_dir 로 복사합니다 (캐시 항목용).
+    source_dir = os.path.join(assets_dir, report_id)
+    os.makedirs(target_dir, exist_ok=True)
+    for name in os.listdir(source_dir):
+        if not name.endswith(COMPRESSED_SUFFIXES):
+            shutil.copyfile(os.path.join(source_dir, name), os.path.join(target_dir, name))
+
+
+def save_results_to_html(image, features, feedback_list, output_path=config.RESULT_HTML_PATH,
+                         inline=config.REPORT_INLINE_ASSETS, temp_path=config.TEMP_RESULT_HTML_PATH):
+    # 보고서 id 를 반환합니다 (inline 이면 None).
+    html_content, report_id = render_report(image, features, feedback_list, inline)
+
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(html_content)
+
+    os.replace(temp_path, output_path)
+    return report_id
+
+
+def publish_report(source_path=config.RESULT_HTML_PATH, output_path=config.PUBLIC_RESULT_HTML_PATH):
+    # Ensure the public directory exists
+    public_dir = os.path.dirname(output_path)
+    if not os.path.exists(public_dir):
+        os.makedirs(public_dir, mode=0o777)
+    # 같은 디렉토리의 임시 파일에 복사한 뒤 이름을 바꿔, 읽는 쪽이 쓰다 만 파일을 보지 않게 합니다.
+    fd, temp_path = tempfile.mkstemp(dir=public_dir, prefix=".tmp-", suffix=".html")
+    os.close(fd)
+    try:
+        shutil.copyfile(source_path, temp_path)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
@@ -0,0 +1,82 @@
+from . import config
+from .profiling import lazy_import
+
+# 선수 영역(ROI) 자르기
+#
+# 넓은 코트 화면에서는 선수가 입력의 작은 부분만 차지해, 대부분의 연산을 배경에 쓰고 키포인트도 거칠게 나옵니다.
+# 첫 배치는 전체 프레임으로 추론하고, 그 다음 배치부터는 앞 배치 키포인트의 경계 상자에 여백을 붙인 정사각형만
+# 잘라 더 작은 입력(원래 크기 × ROI_INPUT_SCALE)으로 추론합니다. 키포인트는 잘라낸 위치만큼 옮겨 전체 프레임 좌표로 돌려줍니다.
+#  - ROI 에서 키포인트가 ROI_MIN_KEYPOINTS 개보다 적게 나온 프레임은 전체 프레임으로 다시 추론하고,
+#    다음 배치는 전체 프레임에서 다시 시작합니다.
+#  - 상자가 프레임의 대부분(ROI_MAX_AREA 이상)을 덮으면 자르지 않습니다.
+# 한 배치 안의 프레임은 같은 상자로 자르므로 blobFromImages 배치 추론을 그대로 씁니다.
+#
+# `python -m benchmarks.roi` 가 전체 프레임 추론과의 처리량을 비교합니다.
+
+
+class PlayerRoi:
+    def __init__(self, size, input_scale=config.ROI_INPUT_SCALE, padding=config.ROI_PADDING,
+                 min_keypoints=config.ROI_MIN_KEYPOINTS, max_area=config.ROI_MAX_AREA):
+        self.size = tuple(size)
+        self.roi_size = tuple(max(1, int(round(side * input_scale))) for side in size)
+        self.padding = padding
+        self.min_keypoints = min_keypoints
+        self.max_area = max_area
+        self.box = None
+        self.stats = {"frames": 0, "cropped": 0, "fallbacks": 0}
+
+    def next_box(self, keypoints, frame_shape):
+        # (N, 15, 3) 키포인트를 모두 감싸는 정사각형 (x0, y0, x1, y1). 자를 수 없거나 자를 이득이 없으면 None.
+        from .pose import keypoint_mask
+
+        visible = keypoint_mask(keypoints)
+        if visible[-1].sum() < self.min_keypoints:
+            return None
+        xy = keypoints[..., :2][visible]
+        x0, y0 = xy.min(axis=0)
+        x1, y1 = xy.max(axis=0)
+        side = max(x1 - x0, y1 - y0) * (1.0 + 2.0 * self.padding)
+        center_x, center_y = (x0 + x1) / 2.0, (y0 + y1) / 2.0
+
+        height, width = frame_shape[:2]
+        left = int(max(0, center_x - side / 2.0))
+        top = int(max(0, center_y - side / 2.0))
+        right = int(min(width, center_x + side / 2.0 + 1))
+        bottom = int(min(height, center_y + side / 2.0 + 1))
+        if right - left < 2 or bottom - top < 2:
+            return None
+        if (right - left) * (bottom - top) > self.max_area * width * height:
+            return None
+        return left, top, right, bottom
+
+    def detect_batch(self, frames):
+        # 프레임 목록의 (N, 15, 3) float32 키포인트 (전체 프레임 좌표)
+        np = lazy_import("numpy")
+        from .pose import detect_keypoint_arrays_batch, keypoint_mask
+
+        self.stats["frames"] += len(frames)
+        box = self.box
+        if box is not None and any(frame.shape[:2] != frames[0].shape[:2] for frame in frames):
+            box = None
+        if box is None:
+            keypoints = detect_keypoint_arrays_batch(frames, self.size, len(frames))
+        else:
+            left, top, right, bottom = box
+            crops = [frame[top:bottom, left:right] for frame in frames]
+            keypoints = detect_keypoint_arrays_batch(crops, self.roi_size, len(crops))
+            keypoints[..., 0] += left
+            keypoints[..., 1] += top
+            self.stats["cropped"] += len(frames)
+
+            lost = np.flatnonzero(keypoint_mask(keypoints).sum(axis=1) < self.min_keypoints)
+            if len(lost):
+                keypoints[lost] = detect_keypoint_arrays_batch([frames[i] for i in lost], self.size, len(lost))
+                self.stats["fallbacks"] += len(lost)
+                self.box = None
+                return keypoints
+        self.box = self.next_box(keypoints, frames[-1].shape)
+        return keypoints
+
+    def summary(self):
+        return (f"Player ROI: {self.stats['cropped']} of {self.stats['frames']} frames cropped to "
+                f"{self.roi_size[0]}x{self.roi_size[1]}, {self.stats['fallbacks']} full-frame fallbacks")
@@ -0,0 +1,59 @@
+import json
+import functools
+
+from . import config
+from .body import POSE_PAIRS
+from .profiling import lazy_import
+
+# 점수/피드백 규칙 표 (feedback_rules.json)
+#
+# 관절 쌍마다 기준 평균 각도(mean_angle)와, 각도가 그보다 작을 때(below)/크거나 같을 때(above) 보여 줄 문구의 키를
+# 적어 둡니다. 점수 계산의 상수(맞았을 때 점수, 기준 각도, 감점 폭)도 같은 파일에 있습니다.
+# get_rules 가 처음 한 번만 읽어 POSE_PAIRS 순서의 배열로 만들어 두고, scoring/feedback 은 이 배열로
+# 모든 쌍(여러 프레임이면 모든 프레임)을 한 번에 계산합니다.
+
+FORMAT_VERSION = 1
+
+
+class RuleTable:
+    # POSE_PAIRS 순서의 길이 14 배열들
+    #   mean_angle: 기준 각도 (규칙이 없는 쌍은 nan)
+    #   below, above: messages 의 인덱스 (규칙이 없는 쌍은 -1)
+    def __init__(self, data):
+        np = lazy_import("numpy")
+        if data.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported rule table version: {data.get('format_version')}")
+
+        keys = list(data["messages"])
+        self.messages = tuple(data["messages"][key] for key in keys)
+        self.perfect_message = data["perfect_message"]
+        scoring = data["scoring"]
+        self.correct_score = float(scoring["correct_score"])
+        self.reference_angle = float(scoring["reference_angle"])
+        self.max_angle_deviation = float(scoring["max_angle_deviation"])
+
+        pair_index = {tuple(pair): i for i, pair in enumerate(POSE_PAIRS)}
+        self.mean_angle = np.full(len(POSE_PAIRS), np.nan)
+        self.below = np.full(len(POSE_PAIRS), -1, dtype=np.intp)
+        self.above = np.full(len(POSE_PAIRS), -1, dtype=np.intp)
+        for rule in data["pairs"]:
+            index = pair_index.get((rule["from"], rule["to"]))
+            if index is None:
+                raise ValueError(f"rule for unknown pose pair: {rule['from']} -> {rule['to']}")
+            for direction in ("below", "above"):
+                if rule[direction] not in data["messages"]:
+                    raise ValueError(f"unknown message key in rule {rule['from']} -> {rule['to']}: {rule[direction]}")
+            self.mean_angle[index] = float(rule["mean_angle"])
+            self.below[index] = keys.index(rule["below"])
+            self.above[index] = keys.index(rule["above"])
+        self.has_rule = self.below >= 0
+
+    @classmethod
+    def load(cls, path=config.RULES_PATH):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+
+@functools.lru_cache(maxsize=None)
+def get_rules():
+    return RuleTable.load(config.RULES_PATH)
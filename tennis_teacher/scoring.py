@@ -0,0 +1,32 @@
+from .profiling import lazy_import
+from .rules import get_rules
+
+# 점수 단계: 규칙 표(rules.py)의 상수로 모든 쌍(여러 프레임이면 모든 프레임)의 점수를 한 번에 계산합니다.
+
+
+def pair_scores(angles, is_correct, rules=None):
+    # 각 부위별 점수: 맞으면 correct_score, 틀리면 reference_angle 과의 편차가 max_angle_deviation 만큼 커질 때마다
+    # correct_score 를 모두 깎습니다 (기본값: 90도와 1도만 달라도 100점 감점).
+    # angles/is_correct 는 같은 모양의 배열 (한 프레임 (14,) 또는 여러 프레임 (T, 14))
+    np = lazy_import("numpy")
+    rules = rules or get_rules()
+    angle_deviation = np.abs(np.asarray(angles, dtype=np.float64) - rules.reference_angle)
+    penalized = rules.correct_score * (1 - angle_deviation / rules.max_angle_deviation)
+    return np.where(is_correct == 1, rules.correct_score, np.maximum(0, penalized))
+
+
+def score_frames(angles, is_correct, valid, rules=None):
+    # 여러 프레임 (T, 14) 의 프레임별 평균 점수 (T,). 유효한 쌍이 없는 프레임은 nan.
+    np = lazy_import("numpy")
+    scores = np.where(valid, pair_scores(angles, is_correct, rules), 0.0)
+    counts = valid.sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, scores.sum(axis=-1) / counts, np.nan)
+
+
+def calculate_scores(features):
+    # 각 부위별 점수를 features.scores 에 채우고 평균 점수를 반환합니다.
+    np = lazy_import("numpy")
+    scores = pair_scores(features.angles, features.is_correct)
+    features.scores = np.where(features.valid, scores, np.nan)
+    return float(scores[features.valid].mean())
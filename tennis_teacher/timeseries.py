@@ -0,0 +1,357 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+
+from . import config, progress
+from .profiling import lazy_import
+
+# 영상 전체의 키포인트 시계열
+#
+# 모든 프레임의 (15, 3) [x, y, 신뢰도] 를 쌓은 (T, 15, 3) float32 배열을 result.json 옆에
+# keypoints.npy 로, fps/타임스탬프/좌표계 크기 등을 keypoints.json 으로 저장합니다.
+# 이후 단계(임팩트 탐색, 여러 프레임 점수, 오버레이 렌더링)는 np.load(mmap_mode='r') 로 읽으므로
+# 같은 영상을 다시 분석할 때는 DNN 을 돌리지 않습니다.
+# 작업(job) id 가 있는 분석은 영상 내용(sha256)과 시계열 설정으로 정한 공유 위치(shared_series_location)를 쓰므로
+# 다른 작업이나 다른 이름으로 올린 같은 영상도 시계열을 재사용합니다.
+#
+# `python -m tennis_teacher.timeseries clip.mp4 [--overlay out.mp4]` 는 시계열을 만들거나(이미 있으면 재사용)
+# 임팩트 프레임과 프레임별 점수를 출력합니다.
+
+FORMAT_VERSION = 1
+NUM_FIELDS = 3
+
+
+def video_fingerprint(video_path):
+    stat = os.stat(video_path)
+    return {"path": os.path.abspath(video_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def probe_fps(video_path):
+    cv2 = lazy_import("cv2")
+    cap = cv2.VideoCapture(video_path)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) if cap.isOpened() else 0.0
+    finally:
+        cap.release()
+    return fps if fps > 0 else None
+
+
+def iter_keypoint_series(reader, size=config.SCAN_INPUT_SIZE, batch_size=config.POSE_BATCH_SIZE,
+                         workers=config.POSE_WORKERS, tracking=config.TRACKING, player_roi=config.PLAYER_ROI,
+                         frame_size=None):
+    # 프레임 리더(video.open_frame_reader)의 모든 프레임에 대해 (frame_index, (15, 3) 키포인트) 를 추론하는 대로
+    # 내보냅니다. frame_size 목록을 주면 첫 프레임의 (width, height) 를 채웁니다. 리더는 호출한 쪽에서 닫습니다.
+    from .pose import iter_keypoint_arrays
+    from .video import FramePrefetcher
+
+    def remember_size(frames):
+        for frame_index, frame in frames:
+            if frame_size is not None and not frame_size:
+                frame_size.extend(frame.shape[1::-1])
+            yield frame_index, frame
+
+    tracker = None
+    if tracking:
+        from .tracking import KeypointTracker
+        tracker = KeypointTracker(size)
+    roi = None
+    if player_roi and not tracking:
+        from .roi import PlayerRoi
+        roi = PlayerRoi(size)
+
+    tracker_progress = progress.current()
+    with FramePrefetcher(reader, hold=batch_size) as frames:
+        if tracker is not None:
+            results = tracker.track(remember_size(frames))
+        else:
+            results = iter_keypoint_arrays(remember_size(frames), size, batch_size, workers, roi)
+        for frame_index, _, keypoints in results:
+            tracker_progress.frame_inferred()
+            yield frame_index, keypoints
+    if tracker is not None:
+        print(tracker.summary())
+    if roi is not None:
+        print(roi.summary())
+
+
+def extract_keypoint_series(video_path, size=config.SCAN_INPUT_SIZE, batch_size=config.POSE_BATCH_SIZE,
+                            workers=config.POSE_WORKERS, frame_source=config.FRAME_SOURCE,
+                            tracking=config.TRACKING, player_roi=config.PLAYER_ROI, max_side=config.MAX_INPUT_SIDE):
+    # 모든 프레임에 대해 포즈를 구해 ((T, 15, 3) float32, 메타데이터) 를 반환합니다. 영상을 열 수 없으면 (None, None).
+    # tracking=True 이면 키프레임 사이의 키포인트는 광학 흐름으로 옮긴 값입니다 (tracking.py).
+    np = lazy_import("numpy")
+    from .body import NUM_KEYPOINTS
+    from .video import open_frame_reader, probe_frame_count
+
+    reader = open_frame_reader(video_path, frame_source, max_side=max_side)
+    if reader is None:
+        return None, None
+
+    frame_size = []
+    rows = []
+    indices = []
+    progress.current().stage("scan", probe_frame_count(video_path))
+    try:
+        for frame_index, keypoints in iter_keypoint_series(reader, size, batch_size, workers, tracking, player_roi,
+                                                           frame_size):
+            rows.append(keypoints)
+            indices.append(frame_index)
+    finally:
+        reader.close()
+
+    keypoints = np.stack(rows) if rows else np.empty((0, NUM_KEYPOINTS, NUM_FIELDS), dtype=np.float32)
+    fps = probe_fps(video_path)
+    meta = series_meta(video_path, fps, frame_size, size, frame_source, tracking, player_roi, max_side)
+    meta["timestamps_ms"] = [timestamp_ms(index, fps) for index in indices]
+    return keypoints, meta
+
+
+def timestamp_ms(frame_index, fps):
+    return round(frame_index * 1000.0 / fps, 3) if fps else None
+
+
+def series_meta(video_path, fps, frame_size, size=config.SCAN_INPUT_SIZE, frame_source=config.FRAME_SOURCE,
+                tracking=config.TRACKING, player_roi=config.PLAYER_ROI, max_side=config.MAX_INPUT_SIDE):
+    return {
+        "format_version": FORMAT_VERSION,
+        "video": video_fingerprint(video_path),
+        "fps": fps,
+        # 키포인트 좌표계(= 추론한 프레임)의 (width, height). ffmpeg 소스는 축소된 크기입니다.
+        "frame_size": frame_size,
+        **series_settings(size, frame_source, tracking, player_roi, max_side),
+    }
+
+
+def series_settings(size=config.SCAN_INPUT_SIZE, frame_source=config.FRAME_SOURCE, tracking=config.TRACKING,
+                    player_roi=config.PLAYER_ROI, max_side=config.MAX_INPUT_SIDE):
+    # 시계열의 값을 정하는 설정 (메타데이터에 그대로 들어가고, 공유 위치의 키가 됩니다)
+    return {
+        "input_size": list(size),
+        "frame_source": frame_source,
+        # ffmpeg 소스가 프레임을 줄인 최대 변 (opencv 는 원본 그대로이므로 None)
+        "max_side": max_side if frame_source == "ffmpeg" else None,
+        "tracking": bool(tracking),
+        "player_roi": bool(player_roi) and not tracking,
+    }
+
+
+def shared_series_location(video_path, settings, series_dir=config.SERIES_DIR):
+    # 작업들이 함께 쓰는 시계열 위치: SERIES_DIR/<영상 sha256 + settings 의 키>/.
+    # get_keypoint_series 에 그대로 넘길 {path, meta_path, video_sha256} 를 반환합니다.
+    from .cache import cached_file_sha256
+
+    video_sha256 = cached_file_sha256(video_path)
+    payload = {"format_version": FORMAT_VERSION, "video_sha256": video_sha256, **settings}
+    key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+    directory = os.path.join(series_dir, key)
+    return {"path": os.path.join(directory, "keypoints.npy"), "meta_path": os.path.join(directory, "keypoints.json"),
+            "video_sha256": video_sha256}
+
+
+def prune_series(keep=config.SERIES_KEEP, series_dir=config.SERIES_DIR, in_use=None):
+    # 남아 있는 작업이 참조하는 시계열(jobs.referenced_series)은 그대로 두고, 나머지 중 가장 최근에 쓴(또는 재사용한)
+    # keep 개만 남깁니다. 지운 개수를 반환.
+    if in_use is None:
+        from .jobs import referenced_series
+        in_use = referenced_series()
+    try:
+        entries = [entry for entry in os.scandir(series_dir)
+                   if not entry.name.startswith(".") and entry.is_dir() and entry.name not in in_use]
+    except FileNotFoundError:
+        return 0
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in entries[keep:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+    return max(0, len(entries) - keep)
+
+
+def _atomic_write(path, write):
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def save_keypoint_series(keypoints, meta, path=config.KEYPOINTS_PATH, meta_path=config.KEYPOINTS_META_PATH):
+    np = lazy_import("numpy")
+    _atomic_write(path, lambda f: np.save(f, np.ascontiguousarray(keypoints, dtype=np.float32)))
+    _atomic_write(meta_path, lambda f: f.write(json.dumps(meta, ensure_ascii=False, indent=2).encode("utf-8")))
+
+
+def load_keypoint_series(path=config.KEYPOINTS_PATH, meta_path=config.KEYPOINTS_META_PATH):
+    # (메모리 매핑된 (T, 15, 3) 배열, 메타데이터). 없거나 읽을 수 없으면 (None, None).
+    np = lazy_import("numpy")
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        keypoints = np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None, None
+    if meta.get("format_version") != FORMAT_VERSION or keypoints.ndim != 3 or keypoints.shape[2] != NUM_FIELDS:
+        return None, None
+    if len(keypoints) != len(meta.get("timestamps_ms", ())):
+        return None, None
+    return keypoints, meta
+
+
+def is_current(meta, video_path, size=config.SCAN_INPUT_SIZE, frame_source=config.FRAME_SOURCE,
+               tracking=config.TRACKING, player_roi=config.PLAYER_ROI, max_side=config.MAX_INPUT_SIDE,
+               video_sha256=None):
+    # video_sha256 을 주면 경로/mtime 이 달라도 내용이 같은 영상으로 만든 시계열을 받아들입니다 (공유 위치).
+    try:
+        fingerprint = video_fingerprint(video_path)
+    except OSError:
+        return False
+    same_video = meta.get("video") == fingerprint or (video_sha256 is not None
+                                                       and meta.get("video_sha256") == video_sha256)
+    return (same_video and meta.get("input_size") == list(size)
+            and meta.get("frame_source") == frame_source
+            and meta.get("max_side") == (max_side if frame_source == "ffmpeg" else None)
+            and meta.get("tracking", False) == bool(tracking)
+            and meta.get("player_roi", False) == (bool(player_roi) and not tracking))
+
+
+def get_keypoint_series(video_path, size=config.SCAN_INPUT_SIZE, batch_size=config.POSE_BATCH_SIZE,
+                        workers=config.POSE_WORKERS, frame_source=config.FRAME_SOURCE,
+                        tracking=config.TRACKING, player_roi=config.PLAYER_ROI,
+                        path=config.KEYPOINTS_PATH, meta_path=config.KEYPOINTS_META_PATH,
+                        max_side=config.MAX_INPUT_SIDE, video_sha256=None):
+    # 같은 영상/설정으로 만든 시계열이 있으면 그대로 읽고, 없으면 만들어 저장한 뒤 읽습니다.
+    # video_sha256 은 공유 위치(shared_series_location)용으로, 메타데이터에 남겨 내용이 같은 영상이면 재사용합니다.
+    keypoints, meta = load_keypoint_series(path, meta_path)
+    if keypoints is not None and is_current(meta, video_path, size, frame_source, tracking, player_roi, max_side,
+                                            video_sha256):
+        print(f"Reusing keypoint series {path} ({len(keypoints)} frames)")
+        if video_sha256 is not None:
+            # 공유 위치의 마지막 사용 시각 (prune_series)
+            os.utime(os.path.dirname(os.path.abspath(path)))
+        return keypoints, meta
+
+    keypoints, meta = extract_keypoint_series(video_path, size, batch_size, workers, frame_source, tracking,
+                                              player_roi, max_side)
+    if keypoints is None:
+        return None, None
+    if video_sha256 is not None:
+        meta["video_sha256"] = video_sha256
+    save_keypoint_series(keypoints, meta, path, meta_path)
+    print(f"Saved keypoint series {path} ({len(keypoints)} frames)")
+    return load_keypoint_series(path, meta_path)
+
+
+def classify_series(keypoints):
+    # 모든 프레임의 (T, 14) 각도, 분류 결과, 유효 마스크
+    np = lazy_import("numpy")
+    from .classifier import classify_angles
+    from .features import compute_angle_array
+
+    angles, valid = compute_angle_array(np.asarray(keypoints))
+    if not len(angles):
+        return angles, np.empty(angles.shape, dtype=np.int64), valid
+    return angles, classify_angles(angles, valid), valid
+
+
+def score_series(keypoints):
+    # 프레임별 평균 점수 (T,). 유효한 관절 쌍이 없는 프레임은 nan.
+    from .scoring import score_frames
+    return score_frames(*classify_series(keypoints))
+
+
+def feedback_series(keypoints):
+    # 스윙 전체의 피드백: [(문구, 그 문구가 나온 프레임 수)], 많이 나온 순서
+    from .feedback import feedback_codes, summarize_feedback
+    return summarize_feedback(feedback_codes(*classify_series(keypoints)))
+
+
+def render_overlay(video_path, keypoints, meta, output_path):
+    # 원본 영상의 각 프레임에 시계열의 스켈레톤을 그려 mp4 로 저장합니다. 저장한 프레임 수를 반환.
+    cv2 = lazy_import("cv2")
+    from .pose import draw_skeleton, keypoints_to_points
+    from .video import open_video, iter_frames
+
+    cap = open_video(video_path)
+    if cap is None:
+        return 0
+    writer = None
+    written = 0
+    try:
+        for frame_index, frame in iter_frames(cap):
+            if frame_index >= len(keypoints):
+                break
+            height, width = frame.shape[:2]
+            if writer is None:
+                fps = meta.get("fps") or 30.0
+                writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+            scaled = keypoints[frame_index].copy()
+            source_width, source_height = meta.get("frame_size") or (width, height)
+            scaled[:, 0] *= width / source_width
+            scaled[:, 1] *= height / source_height
+            writer.write(draw_skeleton(frame, keypoints_to_points(scaled)))
+            written += 1
+    finally:
+        cap.release()
+        if writer is not None:
+            writer.release()
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or reuse the per-video keypoint series and summarize it.")
+    parser.add_argument("video_path")
+    parser.add_argument("--frame-source", choices=config.FRAME_SOURCES, default=config.FRAME_SOURCE)
+    parser.add_argument("--pose-workers", type=int, default=config.POSE_WORKERS)
+    parser.add_argument("--track", action="store_true", default=config.TRACKING,
+                        help="run the pose net on keyframes only and track keypoints with optical flow in between")
+    parser.add_argument("--player-roi", action="store_true", default=config.PLAYER_ROI,
+                        help="after the first batch, run the pose net on a crop around the player only")
+    parser.add_argument("--overlay", help="write the video with the skeleton drawn on every frame")
+    args = parser.parse_args(argv)
+
+    from .feedback import feedback_codes, summarize_feedback
+    from .impact import find_impact_index
+    from .scoring import score_frames
+
+    keypoints, meta = get_keypoint_series(args.video_path, workers=args.pose_workers,
+                                          frame_source=args.frame_source, tracking=args.track,
+                                          player_roi=args.player_roi)
+    if keypoints is None:
+        return 1
+
+    start = time.perf_counter()
+    impact_index = find_impact_index(keypoints)
+    angles, is_correct, valid = classify_series(keypoints)
+    scores = score_frames(angles, is_correct, valid)
+    swing_feedback = summarize_feedback(feedback_codes(angles, is_correct, valid))
+    elapsed = time.perf_counter() - start
+    print(f"{len(keypoints)} frames at {meta['fps']} fps, analyzed in {elapsed * 1000:.1f} ms")
+    if impact_index is None:
+        print("impact frame: not found")
+    else:
+        print(f"impact frame: {impact_index} ({meta['timestamps_ms'][impact_index]} ms), "
+              f"score {scores[impact_index]:.2f}")
+    np = lazy_import("numpy")
+    if len(scores) and not np.isnan(scores).all():
+        best = int(np.nanargmax(scores))
+        print(f"best frame: {best} ({meta['timestamps_ms'][best]} ms), score {scores[best]:.2f}; "
+              f"mean {np.nanmean(scores):.2f}")
+    for message, frames in swing_feedback[:3]:
+        print(f"feedback in {frames} of {len(keypoints)} frames: {message}")
+    if args.overlay:
+        written = render_overlay(args.video_path, keypoints, meta, args.overlay)
+        print(f"wrote {written} frames to {args.overlay}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+from . import config
+from .profiling import lazy_import
+
+# 포즈 추적 모드: 희소한 DNN 키프레임 + 광학 흐름
+#
+# 모든 프레임에 MPI 네트워크를 돌리는 대신 k 프레임마다 한 번만 돌리고, 그 사이 프레임의 키포인트 15개는
+# cv2.calcOpticalFlowPyrLK 로 이전 프레임에서 옮겨 옵니다.
+#  - 옮긴 점을 다시 역방향으로 추적해(forward-backward) 제자리로 돌아오지 않는 점은 추적 실패로 보고
+#    "검출되지 않음"(신뢰도 0)으로 바꿉니다.
+#  - 보이던 점을 너무 많이 잃었거나 한 프레임 사이 움직임이 크면(스윙 중 라켓 팔 등) 그 프레임에서 바로 DNN 을 돌립니다.
+#  - 예정된 키프레임에서는 추적 결과와 DNN 결과의 차이를 재서, 작으면 k 를 늘리고 크면 줄입니다.
+# 광학 흐름은 긴 변이 TRACK_SIDE 인 흑백 이미지에서 계산하므로 4K 프레임이어도 비용이 작습니다.
+#
+# 추적은 프레임 순서대로만 진행할 수 있어 워커 프로세스(parallel.py)는 쓰지 않습니다.
+# DNN 호출 감소율과 촘촘한 기준(모든 프레임 DNN) 대비 키포인트 차이는 `python -m benchmarks.tracking` 으로 확인합니다.
+
+LK_PARAMS = {"winSize": (21, 21), "maxLevel": 3}
+LK_CRITERIA = (30, 0.01)
+
+
+class KeypointTracker:
+    def __init__(self, size=config.SCAN_INPUT_SIZE, min_interval=config.TRACK_MIN_INTERVAL,
+                 max_interval=config.TRACK_MAX_INTERVAL, fb_max_error=config.TRACK_FB_MAX_ERROR,
+                 min_tracked_ratio=config.TRACK_MIN_TRACKED_RATIO, max_motion=config.TRACK_MAX_MOTION,
+                 drift_tolerance=config.TRACK_DRIFT_TOLERANCE, track_side=config.TRACK_SIDE):
+        self.size = size
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.fb_max_error = fb_max_error
+        self.min_tracked_ratio = min_tracked_ratio
+        self.max_motion = max_motion
+        self.drift_tolerance = drift_tolerance
+        self.track_side = track_side
+
+        self.interval = min_interval
+        self.keypoints = None
+        self.prev_gray = None
+        self.since_keyframe = 0
+        self.stats = {"frames": 0, "dnn_calls": 0, "forced": 0, "lost_points": 0}
+
+    def _prepare(self, frame):
+        cv2 = lazy_import("cv2")
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape
+        long_side = max(height, width)
+        if long_side <= self.track_side:
+            return gray, 1.0
+        scale = self.track_side / long_side
+        gray = cv2.resize(gray, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+        return gray, scale
+
+    def _track(self, gray, scale):
+        # 이전 프레임의 키포인트를 gray 로 옮깁니다. (키포인트, 추적 성공 여부, 움직임(긴 변 비율)) 을 반환.
+        cv2 = lazy_import("cv2")
+        np = lazy_import("numpy")
+        from .pose import keypoint_mask
+
+        visible = np.flatnonzero(keypoint_mask(self.keypoints))
+        if not len(visible):
+            return None, False, 0.0
+        criteria = (cv2.TERM_CRITERIA_COUNT | cv2.TERM_CRITERIA_EPS,) + LK_CRITERIA
+        points = (self.keypoints[visible, :2] * scale).astype(np.float32).reshape(-1, 1, 2)
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, points, None,
+                                                    criteria=criteria, **LK_PARAMS)
+        back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self.prev_gray, moved, None,
+                                                        criteria=criteria, **LK_PARAMS)
+        fb_error = np.linalg.norm((back - points).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error <= self.fb_max_error)
+
+        tracked = self.keypoints.copy()
+        tracked[visible[good], :2] = moved.reshape(-1, 2)[good] / scale
+        tracked[visible[~good], 2] = 0.0
+        self.stats["lost_points"] += int((~good).sum())
+
+        if not good.any():
+            return tracked, False, 0.0
+        motion = float(np.median(np.linalg.norm((moved - points).reshape(-1, 2)[good], axis=1)))
+        return tracked, good.mean() >= self.min_tracked_ratio, motion / max(gray.shape)
+
+    def _drift(self, tracked, keypoints, scale, long_side):
+        # 양쪽 모두에서 보이는 키포인트의 위치 차이 중앙값 (긴 변 비율). 비교할 점이 없으면 None.
+        np = lazy_import("numpy")
+        from .pose import keypoint_mask
+
+        both = keypoint_mask(tracked) & keypoint_mask(keypoints)
+        if not both.any():
+            return None
+        distance = np.linalg.norm(tracked[both, :2] - keypoints[both, :2], axis=1) * scale
+        return float(np.median(distance)) / long_side
+
+    def _keyframe(self, frame, gray):
+        from .pose import detect_keypoint_array
+
+        self.stats["dnn_calls"] += 1
+        self.keypoints = detect_keypoint_array(frame, self.size)
+        self.prev_gray = gray
+        self.since_keyframe = 0
+        return self.keypoints
+
+    def update(self, frame):
+        # 다음 프레임의 (15, 3) float32 키포인트 [x, y, 신뢰도] (프레임 좌표계)
+        self.stats["frames"] += 1
+        gray, scale = self._prepare(frame)
+        if self.keypoints is None:
+            return self._keyframe(frame, gray)
+
+        tracked, ok, motion = self._track(gray, scale)
+        if self.since_keyframe + 1 >= self.interval:
+            keypoints = self._keyframe(frame, gray)
+            drift = self._drift(tracked, keypoints, scale, max(gray.shape)) if ok else None
+            if drift is not None and drift <= self.drift_tolerance:
+                self.interval = min(self.interval + 1, self.max_interval)
+            else:
+                self.interval = max(self.interval // 2, self.min_interval)
+            return keypoints
+
+        if not ok or motion > self.max_motion:
+            self.stats["forced"] += 1
+            self.interval = max(self.interval // 2, self.min_interval)
+            return self._keyframe(frame, gray)
+
+        self.keypoints = tracked
+        self.prev_gray = gray
+        self.since_keyframe += 1
+        return tracked
+
+    def track(self, indexed_frames):
+        # iter_keypoint_arrays 와 같은 형태: (index, frame, (15, 3) 키포인트) 를 프레임 순서대로
+        for frame_index, frame in indexed_frames:
+            yield frame_index, frame, self.update(frame)
+
+    def summary(self):
+        frames = self.stats["frames"]
+        calls = self.stats["dnn_calls"]
+        reduction = 1.0 - calls / frames if frames else 0.0
+        return (f"DNN calls: {calls} of {frames} frames ({reduction:.0%} fewer), "
+                f"forced keyframes {self.stats['forced']}, final interval {self.interval}")
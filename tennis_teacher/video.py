@@ -0,0 +1,341 @@
+import os
+import sys
+import time
+import queue
+import argparse
+import threading
+
+from .profiling import lazy_import
+
+# 디코딩 단계: 영상 열기와 프레임 추출
+#
+# 특정 프레임 하나가 필요할 때는 처음부터 모든 프레임을 디코딩하지 않습니다.
+#  - "seek": CAP_PROP_POS_FRAMES 로 이동합니다. FFmpeg 백엔드는 직전 키프레임으로 이동한 뒤
+#            목표 프레임까지 앞으로 디코딩하므로 순차 디코딩과 같은 프레임을 얻습니다.
+#            이동 후 위치가 맞지 않으면(인덱스가 불안정한 컨테이너) 영상을 다시 열고 "grab" 으로 처리합니다.
+#  - "grab": 처음부터 cap.grab() 으로 건너뛰고(retrieve 없음, 색변환/복사 생략) 목표 프레임만 가져옵니다.
+#  - "sequential": 예전 방식. 모든 프레임을 cap.read() 합니다.
+#
+# 여러 프레임을 차례로 훑을 때는 FramePrefetcher 가 백그라운드 스레드에서 미리 디코딩해
+# 재사용하는 버퍼 링에 채워 두고, 추론 루프는 그 링에서 꺼내 씁니다 (cap.read 는 GIL 을 풀어 줍니다).
+# 프레임 소스는 작업마다 고를 수 있습니다 (config.FRAME_SOURCES: cv2.VideoCapture 또는 ffmpeg 파이프).
+
+SEEK_METHODS = ("seek", "grab", "sequential")
+
+
+def open_video(video_path):
+    # 파일 존재 여부 확인
+    if not os.path.exists(video_path):
+        print(f"Error: video file does not exist: {video_path}")
+        return None
+
+    cv2 = lazy_import("cv2")
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print(f"Error opening video file: {video_path}")
+        return None
+    return cap
+
+
+def get_frame_count(cap):
+    cv2 = lazy_import("cv2")
+    return int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+
+def probe_frame_count(video_path):
+    # 컨테이너에 적힌 프레임 수 (진행률/ETA 용 추정치). 알 수 없으면 None.
+    cv2 = lazy_import("cv2")
+    cap = cv2.VideoCapture(video_path)
+    try:
+        count = get_frame_count(cap) if cap.isOpened() else 0
+    finally:
+        cap.release()
+    return count if count > 0 else None
+
+
+def read_frame_at(cap, frame_index):
+    current_frame_index = 0
+    while cap.isOpened():
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        if current_frame_index == frame_index:
+            return frame
+
+        current_frame_index += 1
+    return None
+
+
+def grab_to_frame(cap, frame_index):
+    # 현재 위치가 0 인 cap 에서 frame_index 번째 프레임을 가져옵니다.
+    for _ in range(frame_index):
+        if not cap.grab():
+            return None
+    ret, frame = cap.read()
+    return frame if ret else None
+
+
+def seek_to_frame(cap, frame_index):
+    cv2 = lazy_import("cv2")
+    if not cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index):
+        return None
+    if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != frame_index:
+        return None
+    ret, frame = cap.read()
+    return frame if ret else None
+
+
+def read_frame(cap, video_path, frame_index, method="seek"):
+    # cap 은 아직 프레임을 읽지 않은 상태여야 합니다. 대체 경로로 다시 연 경우 새 cap 은 여기서 닫습니다.
+    if method == "sequential":
+        return read_frame_at(cap, frame_index)
+    if method == "grab" or frame_index == 0:
+        return grab_to_frame(cap, frame_index)
+
+    frame = seek_to_frame(cap, frame_index)
+    if frame is not None:
+        return frame
+
+    print(f"Seek to frame {frame_index} failed, falling back to grab-only skipping")
+    fallback_cap = open_video(video_path)
+    if fallback_cap is None:
+        return None
+    try:
+        return grab_to_frame(fallback_cap, frame_index)
+    finally:
+        fallback_cap.release()
+
+
+def iter_frame_range(video_path, start, stop):
+    # [start, stop) 구간의 프레임을 (index, frame) 으로 돌려줍니다. start 로는 seek 하고, 실패하면 grab 으로 건너뜁니다.
+    cap = open_video(video_path)
+    if cap is None:
+        return
+    try:
+        frame = seek_to_frame(cap, start) if start > 0 else None
+        if frame is None:
+            cap.release()
+            cap = open_video(video_path)
+            if cap is None:
+                return
+            frame = grab_to_frame(cap, start)
+        index = start
+        while frame is not None and index < stop:
+            yield index, frame
+            index += 1
+            ret, frame = cap.read()
+            if not ret:
+                break
+    finally:
+        if cap is not None:
+            cap.release()
+
+
+def check_seek(video_path, frame_indices=None):
+    # seek/grab 으로 얻은 프레임이 순차 디코딩한 프레임과 같은지 확인합니다. 일치하지 않는 인덱스 목록을 반환.
+    np = lazy_import("numpy")
+
+    cap = open_video(video_path)
+    if cap is None:
+        raise FileNotFoundError(video_path)
+    try:
+        frame_count = get_frame_count(cap)
+        if frame_indices is None:
+            frame_indices = sorted({0, 1, frame_count // 4, frame_count // 2, (3 * frame_count) // 4, frame_count - 1})
+        wanted = set(frame_indices)
+        reference = {index: frame for index, frame in iter_frames(cap) if index in wanted}
+    finally:
+        cap.release()
+
+    mismatches = []
+    for method in ("seek", "grab"):
+        for index in frame_indices:
+            cap = open_video(video_path)
+            try:
+                frame = read_frame(cap, video_path, index, method)
+            finally:
+                cap.release()
+            expected = reference.get(index)
+            if frame is None or expected is None or not np.array_equal(frame, expected):
+                mismatches.append((method, index))
+    return mismatches
+
+
+class CaptureReader:
+    # cv2.VideoCapture 를 FramePrefetcher 가 쓰는 프레임 리더 형태로 감쌉니다.
+    #   read(buffer) -> (index, frame) 또는 None(끝). buffer 가 주어지면 그 배열에 디코딩합니다.
+    # stride 가 1 보다 크면 stride 번째 프레임만 retrieve 하고 나머지는 grab 으로 넘깁니다.
+    def __init__(self, cap, stride=1):
+        self.cap = cap
+        self.stride = stride
+        self.frames = 0
+
+    def read(self, buffer=None):
+        while self.cap.grab():
+            index = self.frames
+            self.frames += 1
+            if index % self.stride:
+                continue
+            ret, frame = self.cap.retrieve(buffer)
+            if not ret:
+                return None
+            if buffer is not None and frame is not buffer:
+                if frame.shape != buffer.shape:
+                    raise ValueError(f"frame size changed mid-stream: {buffer.shape} -> {frame.shape}")
+                buffer[...] = frame
+                frame = buffer
+            return index, frame
+        return None
+
+    def close(self):
+        self.cap.release()
+
+
+def open_frame_reader(video_path, source="opencv", stride=1, max_side=None):
+    # 프레임 소스를 골라 리더를 엽니다. 열 수 없으면 None.
+    #  - "opencv": cv2.VideoCapture (원본 해상도, max_side 무시)
+    #  - "ffmpeg": ffmpeg 서브프로세스가 골라내기/축소까지 해서 raw BGR 을 파이프로 보냅니다 (ffmpeg_video.py)
+    if source == "ffmpeg":
+        from .ffmpeg_video import FFmpegReader
+        return FFmpegReader.open(video_path, stride=stride, max_side=max_side)
+    if source != "opencv":
+        raise ValueError(f"unknown frame source: {source}")
+    cap = open_video(video_path)
+    if cap is None:
+        return None
+    return CaptureReader(cap, stride)
+
+
+class FramePrefetcher:
+    # 프레임 리더(CaptureReader, FFmpegReader)를 백그라운드 스레드에서 읽어 (index, frame) 으로 내보냅니다.
+    #
+    # - 버퍼는 hold + depth 개로, 처음 채울 때 한 번만 만들고 이후에는 리더가 그 버퍼에 바로 디코딩합니다.
+    # - 소비자는 최근 hold 개의 프레임까지만 붙잡고 있을 수 있습니다 (그보다 오래된 버퍼는 다시 채워짐).
+    #   프레임을 더 오래 쓰려면 복사해야 합니다.
+    # - stats: decode_stalls/decode_wait 는 빈 버퍼를 기다린 횟수/초 (추론이 병목),
+    #          inference_stalls/inference_wait 는 디코딩된 프레임을 기다린 횟수/초 (디코딩이 병목).
+    # - 프레임을 내보낼 때마다 디코딩한 프레임 수를 progress.current() 에 알립니다 (소비자 스레드에서).
+    def __init__(self, reader, depth=None, hold=1):
+        from . import config
+
+        self.reader = reader
+        self.depth = config.PREFETCH_DEPTH if depth is None else depth
+        self.hold = hold
+        self.stats = {"frames": 0, "decode_stalls": 0, "decode_wait": 0.0,
+                      "inference_stalls": 0, "inference_wait": 0.0}
+        self.buffers = []
+        self.free = queue.Queue()
+        self.filled = queue.Queue()
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self._produce, name="frame-prefetch", daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _take_slot(self):
+        try:
+            return self.free.get_nowait()
+        except queue.Empty:
+            pass
+        start = time.perf_counter()
+        slot = self.free.get()
+        self.stats["decode_stalls"] += 1
+        self.stats["decode_wait"] += time.perf_counter() - start
+        return slot
+
+    def _produce(self):
+        for slot in range(self.hold + self.depth):
+            self.free.put(slot)
+        try:
+            while not self.stopping.is_set():
+                slot = self._take_slot()
+                if self.stopping.is_set():
+                    break
+                # 슬롯은 0 부터 차례로 처음 쓰이므로, 아직 없는 버퍼는 리더가 만든 프레임을 그대로 버퍼로 씁니다.
+                buffer = self.buffers[slot] if slot < len(self.buffers) else None
+                item = self.reader.read(buffer)
+                self.stats["frames"] = self.reader.frames
+                if item is None:
+                    break
+                frame_index, frame = item
+                if buffer is None:
+                    self.buffers.append(frame)
+                self.filled.put((frame_index, slot))
+        except Exception as e:
+            self.filled.put(e)
+        self.filled.put(None)
+
+    def __iter__(self):
+        from . import progress
+
+        tracker = progress.current()
+        held = []
+        while True:
+            try:
+                item = self.filled.get_nowait()
+            except queue.Empty:
+                start = time.perf_counter()
+                item = self.filled.get()
+                self.stats["inference_stalls"] += 1
+                self.stats["inference_wait"] += time.perf_counter() - start
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            frame_index, slot = item
+            held.append(slot)
+            if len(held) > self.hold:
+                self.free.put(held.pop(0))
+            tracker.frame_decoded(self.stats["frames"])
+            yield frame_index, self.buffers[slot]
+
+    def close(self):
+        # 디코더 스레드를 멈추고 기다립니다. 리더는 호출한 쪽에서 닫습니다.
+        if self.thread is None:
+            return
+        self.stopping.set()
+        for slot in range(self.hold + self.depth):
+            self.free.put(slot)
+        self.thread.join()
+        self.thread = None
+
+    def summary(self):
+        stats = self.stats
+        bottleneck = "inference" if stats["decode_wait"] >= stats["inference_wait"] else "decode"
+        return (f"Prefetch: decoder waited {stats['decode_wait']:.2f}s ({stats['decode_stalls']} stalls), "
+                f"inference waited {stats['inference_wait']:.2f}s ({stats['inference_stalls']} stalls) "
+                f"-> {bottleneck} bound")
+
+
+def iter_frames(cap):
+    frame_index = 0
+    while cap.isOpened():
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield frame_index, frame
+        frame_index += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that seeked frames match sequentially decoded frames.")
+    parser.add_argument("video_path")
+    parser.add_argument("frames", nargs="*", type=int, help="frame indices (default: spread over the clip)")
+    args = parser.parse_args(argv)
+
+    mismatches = check_seek(args.video_path, args.frames or None)
+    if mismatches:
+        print(f"seeked frames differ from sequential decode: {mismatches}")
+        return 1
+    print("seeked frames match sequential decode")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
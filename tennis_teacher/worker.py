@@ -0,0 +1,187 @@
+import os
+import sys
+import json
+import queue
+import struct
+import threading
+import traceback
+
+from . import cache, config, models, pipeline, progress
+from .profiling import lazy_import
+
+# 상주 분석 워커
+#
+# server.js 가 `python3 -m tennis_teacher.worker` 로 이 프로세스를 한 번 띄워 두고
+# stdin/stdout 파이프로 작업을 보냅니다. Caffe 네트워크, 라벨 인코더, 분류 모델은
+# 시작할 때 한 번만 로드되고 이후의 모든 분석 요청에서 재사용됩니다.
+#
+# 프로토콜: 각 메시지는 4바이트 big-endian 길이 + UTF-8 JSON 본문으로 이루어집니다.
+#   요청: {"id": 1, "type": "analyze", "video_path": "/app/uploads/123.mp4", "impact_mode": "middle"}
+#         (선택: "frame_source": "opencv" | "ffmpeg", "save_keypoints": true, "tracking": true,
+#          "player_roi": true, "resolution": "fast" | "balanced" | "accurate", "use_cache": false,
+#          "job_id": "..." → 출력을 작업별 디렉토리에 씀, tennis_teacher.jobs)
+#         {"id": 4, "type": "stream", "video_path": "..."} (선택: "frame_source", "tracking", "player_roi", "resolution")
+#           → 모든 프레임을 분석하며 pipeline.iter_frame_results 의 레코드를 하나씩 보낸 뒤 응답합니다.
+#         {"id": 2, "type": "ping"}
+#         {"id": 3, "type": "shutdown"}
+#         {"type": "cancel", "request_id": 4} → 처리 중(또는 대기 중)인 stream 요청을 다음 프레임에서 멈춥니다.
+#           이 메시지에는 응답하지 않고, 멈춘 요청이 {"id": 4, "ok": false, "error": "cancelled"} 로 응답합니다.
+#   요청은 별도 스레드가 읽어 두므로 분석하는 동안에도 cancel 을 받을 수 있습니다.
+#   응답: {"id": 1, "ok": true, "result": [...]}
+#         {"id": 1, "ok": false, "error": "..."}
+#         {"id": 4, "type": "record", "record": {"type": "frame", ...}} (stream 요청의 응답 전, 프레임마다)
+#         {"id": 4, "ok": true, "result": {"frames": 60}}
+#   분석 중에는 응답 전에 같은 id 로 진행 상황(tennis_teacher.progress 의 레코드)을 여러 번 보냅니다.
+#         {"id": 1, "type": "progress", "progress": {"stage": "scan", "frames_decoded": 120, ...}}
+#   시작 시 준비가 끝나면 {"id": null, "type": "ready", "pid": ...} 를 한 번 보냅니다.
+
+HEADER = struct.Struct(">I")
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+
+def read_message(stream):
+    header = stream.read(HEADER.size)
+    if not header:
+        return None
+    if len(header) < HEADER.size:
+        raise EOFError("incomplete frame header")
+    (length,) = HEADER.unpack(header)
+    if length > MAX_MESSAGE_SIZE:
+        raise ValueError(f"frame too large: {length} bytes")
+    payload = stream.read(length)
+    if len(payload) < length:
+        raise EOFError("incomplete frame payload")
+    return json.loads(payload.decode("utf-8"))
+
+
+def write_message(stream, message):
+    payload = json.dumps(message, ensure_ascii=False, default=_json_default).encode("utf-8")
+    stream.write(HEADER.pack(len(payload)) + payload)
+    stream.flush()
+
+
+def _json_default(value):
+    # numpy 스칼라(np.int64 등)를 일반 파이썬 값으로 변환
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+STREAM_OPTIONS = ("frame_source", "tracking", "player_roi", "resolution")
+
+
+def handle_request(request, emit=None, cancelled=None):
+    # emit(record): stream 요청에서 응답 전에 보낼 레코드 (serve 가 type "record" 메시지로 보냄)
+    # cancelled(): 이 요청에 cancel 이 왔는지. stream 요청은 프레임마다 확인합니다.
+    request_type = request.get("type")
+    if request_type == "ping":
+        return {"ok": True, "result": "pong"}
+    if request_type == "analyze":
+        video_path = request.get("video_path")
+        if not video_path:
+            return {"ok": False, "error": "video_path is required"}
+        scan_options = {}
+        for option in ("frame_source", "save_keypoints", "tracking", "player_roi", "resolution", "use_cache",
+                       "job_id"):
+            if option in request:
+                scan_options[option] = request[option]
+        try:
+            result = pipeline.run_analysis(video_path, request.get("impact_mode", "middle"), **scan_options)
+        except ValueError as e:
+            # 열 수 없는 영상 등 요청의 문제는 traceback 없이 그 이유를 돌려줍니다.
+            return {"ok": False, "error": str(e)}
+        if result is None:
+            return {"ok": False, "error": "임팩트 지점 프레임을 추출하지 못했습니다."}
+        return {"ok": True, "result": result}
+    if request_type == "stream":
+        video_path = request.get("video_path")
+        if not video_path:
+            return {"ok": False, "error": "video_path is required"}
+        options = {option: request[option] for option in STREAM_OPTIONS if option in request}
+        frames = 0
+        records = pipeline.iter_frame_results(video_path, **options)
+        try:
+            for record in records:
+                if cancelled is not None and cancelled():
+                    return {"ok": False, "error": "cancelled"}
+                if record["type"] == "frame":
+                    frames += 1
+                if emit is not None:
+                    emit(record)
+        finally:
+            # 멈춘 경우에도 디코더 스레드와 리더를 바로 정리합니다.
+            records.close()
+        return {"ok": True, "result": {"frames": frames}}
+    return {"ok": False, "error": f"unknown request type: {request_type}"}
+
+
+def _read_requests(stdin, requests, cancelled):
+    # 요청을 읽어 requests 큐에 넣습니다. cancel 은 처리 중인 요청에 닿아야 하므로 큐를 거치지 않고 바로 반영합니다.
+    try:
+        while True:
+            message = read_message(stdin)
+            if message is None:
+                break
+            if message.get("type") == "cancel":
+                cancelled.add(message.get("request_id"))
+                continue
+            requests.put(message)
+    except Exception as e:
+        requests.put(e)
+    requests.put(None)
+
+
+def serve(stdin, stdout):
+    if config.CV_THREADS > 0:
+        lazy_import("cv2").setNumThreads(config.CV_THREADS)
+    models.init()
+    if config.CACHE_ENABLED:
+        # 지금 로드한 모델 파일의 버전을 기억해 두어, 실행 중에 파일이 바뀌면 캐시와 모델을 함께 갱신합니다.
+        cache.check_model_version()
+    write_message(stdout, {"id": None, "type": "ready", "pid": os.getpid()})
+
+    requests = queue.Queue()
+    cancelled = set()
+    threading.Thread(target=_read_requests, args=(stdin, requests, cancelled), name="worker-requests",
+                     daemon=True).start()
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        if isinstance(request, Exception):
+            raise request
+        request_id = request.get("id")
+        if request.get("type") == "shutdown":
+            write_message(stdout, {"id": request_id, "ok": True, "result": "bye"})
+            break
+        def send_progress(record, request_id=request_id):
+            write_message(stdout, {"id": request_id, "type": "progress", "progress": record})
+
+        def send_record(record, request_id=request_id):
+            write_message(stdout, {"id": request_id, "type": "record", "record": record})
+
+        try:
+            with progress.reporting(send_progress):
+                response = handle_request(request, send_record, lambda request_id=request_id: request_id in cancelled)
+        except Exception as e:
+            traceback.print_exc()
+            response = {"ok": False, "error": str(e)}
+        cancelled.discard(request_id)
+        response["id"] = request_id
+        write_message(stdout, response)
+
+
+def main():
+    # 프로토콜 전용으로 원래 stdout(fd 1)을 복제해 잡아두고, fd 1 자체를 stderr 로 돌립니다.
+    # 이 프로세스는 Caffe 네트워크와 분류기를 직접 로드하므로 print 뿐 아니라 네이티브 코드(Caffe/OpenCV 로그)의
+    # stdout 출력도 길이 프레이밍을 깨뜨리지 않게 stderr 로 가야 합니다 (parallel._worker_main 과 같은 방식).
+    protocol_in = sys.stdin.buffer
+    sys.stdout.flush()
+    protocol_out = os.fdopen(os.dup(1), "wb", buffering=0)
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    serve(protocol_in, protocol_out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+const test = require('node:test');
+const assert = require('node:assert');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { JobQueue, QueueFullError } = require('../jobQueue');
+
+// 워커 대신 쓰는 가짜 풀: 실행을 기록만 하고, finish(jobId) 를 부를 때까지 끝나지 않습니다.
+class StubPool {
+    constructor() {
+        this.started = [];
+        this.pending = new Map();
+    }
+
+    run(filePath, options) {
+        const jobId = options.job_id || filePath;
+        this.started.push(jobId);
+        return new Promise((resolve, reject) => {
+            this.pending.set(jobId, { resolve, reject });
+        });
+    }
+
+    analyze(filePath, options) {
+        return this.run(filePath, options);
+    }
+
+    stream(filePath, options) {
+        return this.run(filePath, options);
+    }
+
+    finish(jobId) {
+        this.pending.get(jobId).resolve({ jobId });
+        this.pending.delete(jobId);
+    }
+}
+
+function submit(queue, id, priority = 'normal', mode = 'analyze') {
+    return queue.submit({ id, filePath: `/uploads/${id}.mp4`, priority, mode, options: {} });
+}
+
+// update 이벤트로 작업이 끝난 뒤 다음 작업이 시작될 때까지 기다립니다.
+function finished(queue, jobId) {
+    return new Promise((resolve) => {
+        const onUpdate = (job) => {
+            if (job.id === jobId && job.status === 'done') {
+                queue.off('update', onUpdate);
+                resolve(job);
+            }
+        };
+        queue.on('update', onUpdate);
+    });
+}
+
+async function finishAll(queue, pool) {
+    while (pool.pending.size) {
+        const [jobId] = pool.pending.keys();
+        const done = finished(queue, jobId);
+        pool.finish(jobId);
+        await done;
+    }
+}
+
+function tempStatePath(t) {
+    const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'jobqueue-'));
+    t.after(() => fs.rmSync(dir, { recursive: true, force: true }));
+    return path.join(dir, 'queue.json');
+}
+
+test('runs higher priority jobs first, then in submission order', async () => {
+    const pool = new StubPool();
+    const queue = new JobQueue(pool, { concurrency: 1 });
+
+    submit(queue, 'busy');
+    submit(queue, 'low', 'low');
+    submit(queue, 'normal-1');
+    submit(queue, 'high', 'high');
+    submit(queue, 'normal-2');
+
+    assert.deepStrictEqual(pool.started, ['busy']);
+    assert.strictEqual(queue.position(queue.get('high')), 1);
+    assert.strictEqual(queue.position(queue.get('low')), 4);
+
+    await finishAll(queue, pool);
+    assert.deepStrictEqual(pool.started, ['busy', 'high', 'normal-1', 'normal-2', 'low']);
+});
+
+test('unknown priority falls back to normal', () => {
+    const queue = new JobQueue(new StubPool());
+    assert.strictEqual(submit(queue, 'job', 'urgent').priority, 'normal');
+});
+
+test('a job that waited agingMs per level moves ahead of higher priorities', async () => {
+    const pool = new StubPool();
+    const queue = new JobQueue(pool, { concurrency: 1, agingMs: 1000 });
+
+    submit(queue, 'busy');
+    const low = submit(queue, 'low', 'low');
+    submit(queue, 'high', 'high');
+    // low 는 두 단계 차이보다 오래(2.5 × agingMs) 기다렸습니다.
+    low.createdAt = new Date(Date.now() - 2500).toISOString();
+
+    assert.strictEqual(queue.position(low), 1);
+    await finishAll(queue, pool);
+    assert.deepStrictEqual(pool.started, ['busy', 'low', 'high']);
+});
+
+test('throws QueueFullError with retryAfter once maxQueued jobs are waiting', async () => {
+    const pool = new StubPool();
+    const queue = new JobQueue(pool, { concurrency: 2, maxQueued: 2, defaultDurationMs: 9000 });
+
+    for (const id of ['run-1', 'run-2', 'wait-1', 'wait-2']) {
+        submit(queue, id);
+    }
+    assert.throws(() => submit(queue, 'rejected'), (err) => {
+        assert.ok(err instanceof QueueFullError);
+        // 평균 9초, 워커 2개 → 4.5초 → 올림
+        assert.strictEqual(err.retryAfter, 5);
+        return true;
+    });
+    assert.strictEqual(queue.has('rejected'), false);
+
+    // 실행 중인 작업이 끝나 대기 작업이 빠지면 다시 받습니다.
+    const done = finished(queue, 'run-1');
+    pool.finish('run-1');
+    await done;
+    assert.strictEqual(submit(queue, 'accepted').status, 'queued');
+    assert.ok(queue.retryAfterSeconds() >= 1);
+    await finishAll(queue, pool);
+});
+
+test('reloads persisted jobs after a restart', async (t) => {
+    const statePath = tempStatePath(t);
+    const before = new JobQueue(new StubPool(), { concurrency: 1, statePath });
+    submit(before, 'interrupted');
+    submit(before, 'waiting', 'high');
+    submit(before, 'stream', 'high', 'stream');
+    clearTimeout(before.saveTimer);
+    before.saveTimer = null;
+    before.saveNow();
+
+    const pool = new StubPool();
+    const after = new JobQueue(pool, { concurrency: 1, statePath });
+    after.load();
+
+    // 실행 중에 멈춘 작업은 우선순위와 상관없이 먼저 다시 실행합니다.
+    assert.deepStrictEqual(pool.started, ['interrupted']);
+    const interrupted = after.get('interrupted');
+    assert.strictEqual(interrupted.status, 'running');
+    assert.strictEqual(interrupted.requeued, 1);
+    assert.strictEqual(after.get('waiting').status, 'queued');
+    // stream 작업은 받을 연결이 없으므로 이어서 실행하지 않습니다.
+    assert.strictEqual(after.get('stream').status, 'error');
+
+    await finishAll(after, pool);
+    assert.deepStrictEqual(pool.started, ['interrupted', 'waiting']);
+    clearTimeout(after.saveTimer);
+    after.saveNow();
+
+    const state = JSON.parse(fs.readFileSync(statePath, 'utf8'));
+    assert.deepStrictEqual(state.jobs.map((job) => [job.id, job.status]),
+        [['interrupted', 'done'], ['waiting', 'done'], ['stream', 'error']]);
+    assert.strictEqual(state.durations.length, 2);
+});
+
+test('ignores a missing or foreign state file', (t) => {
+    const statePath = tempStatePath(t);
+    const queue = new JobQueue(new StubPool(), { statePath });
+    queue.load();
+    fs.writeFileSync(statePath, JSON.stringify({ version: 0, jobs: [{ id: 'old', status: 'queued' }] }));
+    queue.load();
+    assert.strictEqual(queue.has('old'), false);
+});
@@ -0,0 +1,98 @@
+import os
+import types
+
+import pytest
+
+from tennis_teacher import cache, config, models
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    # 모델 버전에 들어가는 파일들을 작은 가짜 파일로 바꾸고, 캐시는 tmp_path 아래에 둡니다.
+    pose_lib = tmp_path / "pose_lib"
+    pose_lib.mkdir()
+    files = {
+        "PROTOTXT_PATH": "pose.prototxt",
+        "MODEL_PATH": "tennis_pose_model.pkl",
+        "LABEL_ENCODER_FROM_PATH": "label_encoder_from.pkl",
+        "LABEL_ENCODER_TO_PATH": "label_encoder_to.pkl",
+        "RULES_PATH": "feedback_rules.json",
+    }
+    for name, filename in files.items():
+        path = pose_lib / filename
+        path.write_bytes(filename.encode("utf-8"))
+        monkeypatch.setattr(config, name, str(path))
+    (pose_lib / config.CAFFEMODEL_NAME).write_bytes(b"caffemodel")
+    monkeypatch.setattr(config, "POSE_LIB_DIR", str(pose_lib))
+    monkeypatch.setattr(config, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(cache, "_file_hashes", {})
+    monkeypatch.setattr(cache, "_model_version", None)
+    resets = []
+    monkeypatch.setattr(models, "reset", lambda: resets.append(True))
+    return types.SimpleNamespace(path=pose_lib, cache_dir=str(tmp_path / "cache"), resets=resets)
+
+
+@pytest.fixture
+def outputs(tmp_path):
+    # store/restore 가 복사하는 result.json / result.html 자리
+    result_json = tmp_path / "result.json"
+    result_html = tmp_path / "result.html"
+    result_json.write_text("[]", encoding="utf-8")
+    result_html.write_text("<html></html>", encoding="utf-8")
+    return types.SimpleNamespace(result_json=str(result_json), result_html=str(result_html))
+
+
+def make_video(tmp_path, name):
+    path = tmp_path / name
+    path.write_bytes(name.encode("utf-8") * 100)
+    return str(path)
+
+
+def cached_key(video, model_dir, outputs, max_bytes=1 << 30):
+    key = cache.analysis_key(video, "middle", {}, model_dir.cache_dir)
+    assert key is not None
+    cache.store(key, paths=outputs, cache_dir=model_dir.cache_dir, max_bytes=max_bytes)
+    return key
+
+
+def set_last_used(key, model_dir, timestamp):
+    os.utime(os.path.join(cache.entry_dir(key, model_dir.cache_dir), cache.ENTRY_NAME), (timestamp, timestamp))
+
+
+def test_evicts_least_recently_used_entry(tmp_path, model_dir, outputs):
+    keys = [cached_key(make_video(tmp_path, f"{name}.mp4"), model_dir, outputs) for name in "abc"]
+    for index, key in enumerate(keys):
+        set_last_used(key, model_dir, 1000 + index)
+    entry_size = cache.list_entries(model_dir.cache_dir)[0]["size"]
+
+    # a 를 다시 쓰면 가장 오래 쓰지 않은 항목은 b 가 됩니다.
+    assert cache.restore(keys[0], make_video(tmp_path, "a.mp4"), paths=outputs,
+                         cache_dir=model_dir.cache_dir) is not None
+    newest = cached_key(make_video(tmp_path, "d.mp4"), model_dir, outputs, max_bytes=3 * entry_size)
+
+    remaining = {entry["key"] for entry in cache.list_entries(model_dir.cache_dir)}
+    assert remaining == {keys[0], keys[2], newest}
+    assert cache.restore(keys[1], make_video(tmp_path, "b.mp4"), paths=outputs, cache_dir=model_dir.cache_dir) is None
+
+
+def test_model_change_misses_and_drops_stale_entries(tmp_path, model_dir, outputs):
+    video = make_video(tmp_path, "a.mp4")
+    key = cached_key(video, model_dir, outputs)
+    assert cache.restore(key, video, paths=outputs, cache_dir=model_dir.cache_dir) is not None
+
+    (model_dir.path / "tennis_pose_model.pkl").write_bytes(b"retrained model")
+    new_key = cache.analysis_key(video, "middle", {}, model_dir.cache_dir)
+
+    assert new_key is not None and new_key != key
+    assert cache.restore(new_key, video, paths=outputs, cache_dir=model_dir.cache_dir) is None
+    assert cache.list_entries(model_dir.cache_dir) == []
+    assert model_dir.resets == [True]
+
+
+def test_only_model_hashes_are_persisted(tmp_path, model_dir):
+    cache.model_version()
+    cache.cached_file_sha256(make_video(tmp_path, "a.mp4"))
+
+    memo = cache._read_hash_memo(os.path.join(model_dir.cache_dir, cache.HASH_MEMO_NAME))
+    assert str(model_dir.path / "tennis_pose_model.pkl") in memo
+    assert str(tmp_path / "a.mp4") not in memo
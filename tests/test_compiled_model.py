@@ -0,0 +1,43 @@
+import os
+import json
+
+import numpy as np
+import pytest
+
+from tennis_teacher import compiled_model
+
+joblib = pytest.importorskip("joblib")
+pytest.importorskip("sklearn")
+
+POSE_LIB_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "openpose", "pose_lib")
+
+
+@pytest.fixture(scope="module")
+def model():
+    return joblib.load(os.path.join(POSE_LIB_DIR, "tennis_pose_model.pkl"))
+
+
+@pytest.fixture(scope="module")
+def predictor(model):
+    # .npz 캐시를 쓰지 않고 pkl 에서 바로 컴파일합니다.
+    label_encoder_from = joblib.load(os.path.join(POSE_LIB_DIR, "label_encoder_from.pkl"))
+    label_encoder_to = joblib.load(os.path.join(POSE_LIB_DIR, "label_encoder_to.pkl"))
+    return compiled_model.compile_estimator(model, label_encoder_from, label_encoder_to)
+
+
+def test_recorded_inputs_match_model_predict(model, predictor):
+    recorded = compiled_model.recorded_inputs(compiled_model.RECORDED_INPUTS_PATH)
+    assert len(recorded)
+
+    total, mismatches = compiled_model.verify(model, predictor, recorded)
+
+    assert total >= len(recorded)
+    assert not len(mismatches), f"{len(mismatches)} of {total} predictions differ (rows {mismatches[:10]})"
+
+
+def test_recorded_inputs_keep_recorded_labels(predictor):
+    with open(compiled_model.RECORDED_INPUTS_PATH, "r", encoding="utf-8") as f:
+        rows = json.load(f)
+    X = np.array([[row["From_encoded"], row["To_encoded"], row["Angle"]] for row in rows], dtype=np.float64)
+
+    assert predictor.predict_features(X).tolist() == [row["IsCorrect"] for row in rows]
@@ -0,0 +1,57 @@
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from tennis_teacher import config, video
+
+cv2 = pytest.importorskip("cv2")
+
+if shutil.which(config.FFMPEG_BINARY) is None:
+    pytest.skip(f"{config.FFMPEG_BINARY} not found", allow_module_level=True)
+
+FRAME_COUNT = 12
+
+
+@pytest.fixture
+def rotated_clip(tmp_path):
+    # 휴대폰 세로 영상처럼 가로로 저장하고 90° 회전 메타데이터만 붙인 영상
+    source = str(tmp_path / "landscape.mp4")
+    writer = cv2.VideoWriter(source, cv2.VideoWriter_fourcc(*"mp4v"), 30, (160, 96))
+    assert writer.isOpened()
+    for index in range(FRAME_COUNT):
+        frame = np.full((96, 160, 3), 30, np.uint8)
+        cv2.circle(frame, (10 + 10 * index, 48), 8, (255, 255, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+    path = str(tmp_path / "rotated.mp4")
+    result = subprocess.run([config.FFMPEG_BINARY, "-v", "error", "-y", "-display_rotation", "90", "-i", source,
+                             "-c", "copy", path], stdin=subprocess.DEVNULL, capture_output=True)
+    if result.returncode != 0:
+        pytest.skip("ffmpeg cannot write display rotation metadata")
+    return path
+
+
+def first_frame(path, source, max_side=None):
+    reader = video.open_frame_reader(path, source, max_side=max_side)
+    assert reader is not None
+    try:
+        item = reader.read()
+    finally:
+        reader.close()
+    assert item is not None
+    return item[1]
+
+
+def test_rotated_clip_has_same_shape_in_both_sources(rotated_clip):
+    expected = first_frame(rotated_clip, "opencv")
+
+    assert expected.shape == (160, 96, 3)
+    assert first_frame(rotated_clip, "ffmpeg").shape == expected.shape
+
+
+def test_rotated_clip_is_scaled_along_its_displayed_axes(rotated_clip):
+    # 긴 변(세로)이 max_side 가 되어야 합니다.
+    assert first_frame(rotated_clip, "ffmpeg", max_side=80).shape == (80, 48, 3)
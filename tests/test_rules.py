@@ -0,0 +1,127 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from tennis_teacher import feedback, rules, scoring
+from tennis_teacher.body import POSE_PAIRS
+from tennis_teacher.features import PoseAngles
+
+# 규칙 표(feedback_rules.json)로 바꾸기 전의 if/elif 구현과 결과가 같은지 각도 격자 위에서 비교합니다.
+
+PERFECT = "자세가 완벽합니다!"
+
+
+def baseline_message(partFrom, partTo, current_angle):
+    # 예전 feedback.build_feedback 의 분기 그대로 (왼쪽 무릎 문구 앞의 공백만 뺐습니다)
+    if partFrom == "Chest" and partTo == "LHip":
+        return "허리를 좀 더 숙이시오." if current_angle < 77.886546 else "허리를 좀 더 피시오."
+    elif partFrom == "Chest" and partTo == "RHip":
+        return "허리를 좀 더 숙이시오." if current_angle < 99.894308 else "허리를 좀 더 피시오."
+    elif partFrom == "LHip" and partTo == "LKnee":
+        return "왼쪽 무릎을 좀 더 피시오." if current_angle < 75.916891 else "왼쪽 무릎을 좀 더 구부리시오."
+    elif partFrom == "LKnee" and partTo == "LAnkle":
+        return "왼쪽 무릎을 좀 더 구부리시오." if current_angle < 104.983467 else "왼쪽 무릎을 좀 더 피시오."
+    elif partFrom == "Neck" and partTo == "RShoulder":
+        return "오른쪽 어깨를 좀 더 피시오." if current_angle < 115.946267 else "오른쪽 어깨를 좀 더 접으시오."
+    elif partFrom == "RElbow" and partTo == "RWrist":
+        return "오른쪽 손목을 좀 더 내리십시오." if current_angle < 13.692950 else "오른쪽 손목을 좀 더 올리십시오."
+    elif partFrom == "RHip" and partTo == "RKnee":
+        return "오른쪽 무릎을 좀 더 피시오." if current_angle < 94.449991 else "오른쪽 무릎을 좀 더 구부리시오."
+    elif partFrom == "RKnee" and partTo == "RAnkle":
+        return "오른쪽 무릎을 좀 더 구부리시오." if current_angle < 124.503426 else "오른쪽 무릎을 좀 더 피시오."
+    elif partFrom == "RShoulder" and partTo == "RElbow":
+        return ("오른쪽 팔을 좀 더 뒤로 당기십시오." if current_angle < 52.455323
+                else "오른쪽 팔을 좀 더 앞으로 당기십시오.")
+    return None
+
+
+def baseline_feedback(angles, is_correct, valid):
+    incorrect = (valid & (is_correct == 0)).nonzero()[0].tolist()
+    if not incorrect:
+        return [PERFECT]
+    messages = []
+    for index in incorrect:
+        message = baseline_message(*POSE_PAIRS[index], float(angles[index]))
+        if message is not None:
+            messages.append(message)
+    return messages
+
+
+def baseline_score(angles, is_correct, valid):
+    # 예전 점수: 맞으면 100점, 틀리면 90도와의 편차 1도당 100점 감점, 유효한 쌍의 평균
+    scores = []
+    for angle, correct in zip(angles[valid].tolist(), is_correct[valid].tolist()):
+        scores.append(100.0 if correct == 1 else max(0.0, 100 - abs(angle - 90) / 1 * 100))
+    return sum(scores) / len(scores)
+
+
+def angle_grid():
+    # 모든 쌍에 같은 각도를 넣은 프레임들과, 쌍마다 자기 기준 각도 바로 아래/위/그 값을 넣은 프레임들
+    table = rules.get_rules()
+    frames = [np.full(len(POSE_PAIRS), angle) for angle in np.arange(-180.0, 180.0, 7.5)]
+    frames += [np.full(len(POSE_PAIRS), angle) for angle in (89.0, 89.995, 90.0, 90.005, 91.0)]
+    means = np.where(table.has_rule, table.mean_angle, 90.0)
+    for offset in (-1.0, -1e-6, 0.0, 1e-6, 1.0):
+        frames.append(means + offset)
+    return np.stack(frames)
+
+
+def correctness_grid(count):
+    # 쌍별 분류 결과: 맞음(1) / 틀림(0) / 무효(-1) 를 섞은 패턴들
+    rng = np.random.default_rng(0)
+    patterns = [np.zeros(len(POSE_PAIRS), dtype=np.int64), np.ones(len(POSE_PAIRS), dtype=np.int64)]
+    patterns += [rng.integers(-1, 2, len(POSE_PAIRS)) for _ in range(count)]
+    return patterns
+
+
+@pytest.fixture(autouse=True)
+def default_rules():
+    rules.get_rules.cache_clear()
+    yield
+    rules.get_rules.cache_clear()
+
+
+def test_feedback_and_score_match_baseline_on_grid():
+    checked = 0
+    for angles, is_correct in itertools.product(angle_grid(), correctness_grid(6)):
+        valid = is_correct >= 0
+        if not valid.any():
+            continue
+        features = PoseAngles(np.where(valid, angles, np.nan), valid)
+        features.is_correct = is_correct
+
+        assert feedback.build_feedback(features) == baseline_feedback(features.angles, is_correct, valid)
+        assert scoring.calculate_scores(features) == pytest.approx(baseline_score(angles, is_correct, valid))
+        checked += 1
+    assert checked > 400
+
+
+def test_array_pass_matches_per_frame_baseline():
+    angles = angle_grid()
+    is_correct = np.stack([pattern for pattern, _ in zip(itertools.cycle(correctness_grid(6)), angles)])
+    valid = is_correct >= 0
+    table = rules.get_rules()
+
+    codes = feedback.feedback_codes(angles, is_correct, valid)
+    for frame_angles, frame_correct, frame_valid, frame_codes in zip(angles, is_correct, valid, codes):
+        expected = baseline_feedback(frame_angles, frame_correct, frame_valid)
+        if expected == [PERFECT]:
+            expected = []
+        assert [table.messages[code] for code in frame_codes[frame_codes >= 0].tolist()] == expected
+
+    expected_scores = [baseline_score(a, c, v) if v.any() else np.nan for a, c, v in zip(angles, is_correct, valid)]
+    np.testing.assert_allclose(scoring.score_frames(angles, is_correct, valid), expected_scores)
+
+
+def test_summary_counts_frames_per_message():
+    angles = angle_grid()
+    is_correct = np.zeros(angles.shape, dtype=np.int64)
+    valid = np.ones(angles.shape, dtype=bool)
+
+    summary = dict(feedback.summarize_feedback(feedback.feedback_codes(angles, is_correct, valid)))
+    expected = {}
+    for frame_angles in angles:
+        for message in set(baseline_feedback(frame_angles, is_correct[0], valid[0])):
+            expected[message] = expected.get(message, 0) + 1
+    assert summary == expected
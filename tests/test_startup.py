@@ -0,0 +1,47 @@
+import os
+import sys
+import json
+import subprocess
+
+from tennis_teacher import profiling
+
+HEAVY_MODULES = ("cv2", "sklearn", "pandas", "jinja2", "matplotlib")
+
+# 오류 경로를 실행한 뒤 무거운 모듈 중 로드된 것을 출력합니다.
+_LOADED_AFTER_ERROR = """
+import sys, json
+from tennis_teacher.cli import main
+code = main([sys.argv[1]])
+print(json.dumps(sorted({name.split(".")[0] for name in sys.modules} & set(sys.argv[2:]))))
+sys.exit(code)
+"""
+
+
+def _isolate_paths(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENPOSE_DIR", str(tmp_path / "openpose"))
+    monkeypatch.setenv("PUBLIC_DIR", str(tmp_path / "public"))
+
+
+def test_cli_cold_start_within_budget(tmp_path, monkeypatch):
+    # 없는 영상으로 CLI 를 새 인터프리터에서 실행 (오류 경로): 무거운 의존성을 시작할 때 import 하면 예산을 넘습니다.
+    _isolate_paths(tmp_path, monkeypatch)
+    budget = float(os.environ.get(profiling.BUDGET_ENV, profiling.DEFAULT_BUDGET))
+
+    elapsed, result = profiling.measure_cold_start([str(tmp_path / "missing.mp4")])
+
+    assert result.returncode == 1, result.stderr
+    assert "could not open video" in result.stderr
+    assert elapsed <= budget, f"cold start {elapsed:.3f}s is over the {budget:.3f}s budget (${profiling.BUDGET_ENV})"
+
+
+def test_cli_error_path_does_not_import_heavy_modules(tmp_path, monkeypatch):
+    _isolate_paths(tmp_path, monkeypatch)
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH")]))
+
+    result = subprocess.run([sys.executable, "-c", _LOADED_AFTER_ERROR, str(tmp_path / "missing.mp4"), *HEAVY_MODULES],
+                            env=env, capture_output=True, text=True, check=False)
+
+    assert result.returncode == 1, result.stderr
+    assert json.loads(result.stdout.splitlines()[-1]) == []
@@ -0,0 +1,73 @@
+import os
+import types
+
+import numpy as np
+import pytest
+
+from tennis_teacher import cache, config, jobs, timeseries
+from tennis_teacher.jobs import JobPaths
+
+
+@pytest.fixture
+def series_dir(tmp_path, monkeypatch):
+    # 작업 디렉토리와 공유 시계열 위치를 tmp_path 아래에 두고, DNN 대신 가짜 시계열을 만듭니다.
+    monkeypatch.setattr(config, "JOBS_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setattr(config, "PUBLIC_JOBS_DIR", str(tmp_path / "public_jobs"))
+    monkeypatch.setattr(cache, "_file_hashes", {})
+    extracted = []
+
+    def fake_extract(video_path, size, batch_size, workers, frame_source, tracking, player_roi, max_side):
+        extracted.append(video_path)
+        keypoints = np.zeros((3, 15, 3), dtype=np.float32)
+        meta = timeseries.series_meta(video_path, 30.0, [64, 48], size, frame_source, tracking, player_roi, max_side)
+        meta["timestamps_ms"] = [timeseries.timestamp_ms(i, 30.0) for i in range(len(keypoints))]
+        return keypoints, meta
+
+    monkeypatch.setattr(timeseries, "extract_keypoint_series", fake_extract)
+    return types.SimpleNamespace(path=str(tmp_path / "series"), extract_calls=extracted)
+
+
+def make_video(tmp_path, name, content=b"same swing"):
+    path = tmp_path / name
+    path.write_bytes(content * 100)
+    return str(path)
+
+
+def job_series(job_id, video, series_dir):
+    paths = JobPaths(job_id)
+    paths.makedirs()
+    location = timeseries.shared_series_location(video, timeseries.series_settings(), series_dir.path)
+    paths.link_series(location["path"], location["meta_path"])
+    keypoints, _ = timeseries.get_keypoint_series(video, **location)
+    return paths, keypoints
+
+
+def test_jobs_reuse_the_series_of_the_same_video_content(tmp_path, series_dir):
+    first, keypoints = job_series("job-1", make_video(tmp_path, "a.mp4"), series_dir)
+    second, reused = job_series("job-2", make_video(tmp_path, "b.mp4"), series_dir)
+
+    assert series_dir.extract_calls == [str(tmp_path / "a.mp4")]
+    assert first.keypoints == second.keypoints
+    assert not first.keypoints.startswith(first.output_dir)
+    assert np.array_equal(keypoints, reused)
+
+
+def test_other_content_gets_its_own_series(tmp_path, series_dir):
+    first, _ = job_series("job-1", make_video(tmp_path, "a.mp4"), series_dir)
+    second, _ = job_series("job-2", make_video(tmp_path, "b.mp4", b"other swing"), series_dir)
+
+    assert len(series_dir.extract_calls) == 2
+    assert first.keypoints != second.keypoints
+
+
+def test_prune_keeps_series_referenced_by_jobs(tmp_path, series_dir):
+    paths, _ = job_series("job-1", make_video(tmp_path, "a.mp4"), series_dir)
+    job_series("job-2", make_video(tmp_path, "b.mp4", b"other swing"), series_dir)
+    referenced = os.path.dirname(paths.keypoints)
+    os.remove(os.path.join(config.JOBS_DIR, "job-2", jobs.SERIES_REF_NAME))
+
+    removed = timeseries.prune_series(keep=0, series_dir=series_dir.path,
+                                     in_use=jobs.referenced_series(config.JOBS_DIR))
+
+    assert removed == 1
+    assert os.listdir(series_dir.path) == [os.path.basename(referenced)]
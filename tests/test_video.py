@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from tennis_teacher import video
+
+cv2 = pytest.importorskip("cv2")
+
+FRAME_COUNT = 40
+
+
+@pytest.fixture(params=[("clip.mp4", "mp4v"), ("clip.avi", "MJPG")], ids=["mp4v", "mjpg"])
+def clip(request, tmp_path):
+    # 프레임마다 다른 작은 영상 (위치가 바뀌는 원 + 프레임 번호)
+    name, fourcc = request.param
+    path = str(tmp_path / name)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), 30, (160, 96))
+    assert writer.isOpened()
+    for index in range(FRAME_COUNT):
+        frame = np.full((96, 160, 3), 30, np.uint8)
+        cv2.circle(frame, (10 + 3 * index, 48), 8, (255, 255, 255), -1)
+        cv2.putText(frame, str(index), (4, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def read_with(method, path, index):
+    cap = video.open_video(path)
+    try:
+        return method(cap, index)
+    finally:
+        cap.release()
+
+
+@pytest.mark.parametrize("index", [1, 7, FRAME_COUNT // 2, 31, FRAME_COUNT - 1])
+def test_seek_matches_grab(clip, index):
+    expected = read_with(video.grab_to_frame, clip, index)
+    frame = read_with(video.seek_to_frame, clip, index)
+
+    assert expected is not None
+    assert frame is not None, f"seek to frame {index} failed"
+    assert np.array_equal(frame, expected)
+
+
+def test_check_seek_finds_no_mismatches(clip):
+    assert video.check_seek(clip) == []